@@ -8,6 +8,7 @@ from app.infrastructure.database.models import Base
 from alembic import context
 import sys
 import os
+import re
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 # this is the Alembic Config object, which provides
@@ -40,6 +41,16 @@ target_metadata = Base.metadata
 # ... etc.
 
 
+# Monthly/default partitions are created at runtime by the partition manager
+PARTITION_NAME = re.compile(r"^(events|clicks)_(p\d{4}_\d{2}|default)$")
+
+
+def include_name(name, type_, parent_names):
+    if type_ == "table":
+        return not PARTITION_NAME.match(name)
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -58,6 +69,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -79,7 +91,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,132 @@
+"""partition events and clicks by month
+
+Revision ID: 1c159b1c49c7
+Revises: f725bfabe171
+Create Date: 2026-10-18 15:40:12.118203
+
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c159b1c49c7'
+down_revision: Union[str, None] = 'f725bfabe171'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months pre-created past the current one; the scheduler keeps this topped up
+MONTHS_AHEAD = 3
+
+TABLES = {
+    "events": {
+        "columns": """
+            id UUID NOT NULL,
+            user_id UUID REFERENCES users (id),
+            event_type VARCHAR,
+            event_data JSONB,
+            "timestamp" TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now()
+        """,
+        "column_names": 'id, user_id, event_type, event_data, "timestamp"',
+        "copy_columns": 'id, user_id, event_type, event_data, COALESCE("timestamp", now())',
+        "indexes": [
+            ("ix_events_event_type", "btree", "event_type"),
+            ("ix_events_user_id_timestamp", "btree", 'user_id, "timestamp"'),
+            ("ix_events_timestamp_user_id", "btree", '"timestamp", user_id'),
+        ],
+    },
+    "clicks": {
+        "columns": """
+            id UUID NOT NULL,
+            link_id UUID REFERENCES links (id),
+            "timestamp" TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            ip_address VARCHAR,
+            user_agent VARCHAR
+        """,
+        "column_names": 'id, link_id, "timestamp", ip_address, user_agent',
+        "copy_columns": 'id, link_id, COALESCE("timestamp", now()), ip_address, user_agent',
+        "indexes": [
+            ("ix_clicks_link_id_timestamp", "btree", 'link_id, "timestamp"'),
+            ("ix_clicks_timestamp_brin", "brin", '"timestamp"'),
+        ],
+    },
+}
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.year * 12 + (day.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _partition_months(conn, table: str):
+    first = conn.execute(sa.text(
+        f'SELECT min("timestamp") FROM {table}_unpartitioned'
+    )).scalar()
+
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    month = first.astimezone(timezone.utc).date().replace(day=1) if first else current
+
+    last = _add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        yield month
+        month = _add_months(month, 1)
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    for table, spec in TABLES.items():
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_unpartitioned")
+        op.execute(f"ALTER TABLE {table}_unpartitioned RENAME CONSTRAINT {table}_pkey TO {table}_unpartitioned_pkey")
+
+        # Primary key must include the partition key
+        op.execute(f"""
+            CREATE TABLE {table} (
+                {spec["columns"]},
+                CONSTRAINT {table}_pkey PRIMARY KEY (id, "timestamp")
+            ) PARTITION BY RANGE ("timestamp")
+        """)
+
+        for month in _partition_months(conn, table):
+            op.execute(
+                f"CREATE TABLE {table}_p{month.year:04d}_{month.month:02d} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()} 00:00+00') "
+                f"TO ('{_add_months(month, 1).isoformat()} 00:00+00')"
+            )
+        # Catches rows outside every monthly range instead of rejecting them
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+        op.execute(f"""
+            INSERT INTO {table} ({spec["column_names"]})
+            SELECT {spec["copy_columns"]} FROM {table}_unpartitioned
+        """)
+        op.execute(f"DROP TABLE {table}_unpartitioned")
+
+        for name, method, columns in spec["indexes"]:
+            op.execute(f"CREATE INDEX {name} ON {table} USING {method} ({columns})")
+
+
+def downgrade() -> None:
+    for table, spec in TABLES.items():
+        op.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned")
+        op.execute(f"ALTER TABLE {table}_partitioned RENAME CONSTRAINT {table}_pkey TO {table}_partitioned_pkey")
+        for name, _, _ in spec["indexes"]:
+            op.execute(f"ALTER INDEX {name} RENAME TO {name}_partitioned")
+
+        op.execute(f"""
+            CREATE TABLE {table} (
+                {spec["columns"].replace("NOT NULL DEFAULT now()", "DEFAULT now()")},
+                CONSTRAINT {table}_pkey PRIMARY KEY (id)
+            )
+        """)
+        op.execute(f"""
+            INSERT INTO {table} ({spec["column_names"]})
+            SELECT {spec["column_names"]} FROM {table}_partitioned
+        """)
+        op.execute(f"DROP TABLE {table}_partitioned")
+
+        for name, method, columns in spec["indexes"]:
+            op.execute(f"CREATE INDEX {name} ON {table} USING {method} ({columns})")
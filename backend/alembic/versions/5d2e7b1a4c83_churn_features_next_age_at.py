@@ -0,0 +1,34 @@
+"""churn features next_age_at
+
+Revision ID: 5d2e7b1a4c83
+Revises: 3e8a1d2c9f04
+Create Date: 2026-10-18 21:05:12.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e7b1a4c83'
+down_revision: Union[str, None] = '3e8a1d2c9f04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('churn_features', sa.Column('next_age_at', sa.DateTime(timezone=True), nullable=True))
+    # Same arithmetic as the scoring service: whole days of 86400 seconds
+    op.execute(
+        "UPDATE churn_features "
+        "SET next_age_at = last_event_at + (days_since_last_event + 1) * interval '86400 seconds' "
+        "WHERE last_event_at IS NOT NULL"
+    )
+    op.create_index('ix_churn_features_next_age_at', 'churn_features', ['next_age_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_churn_features_next_age_at', table_name='churn_features')
+    op.drop_column('churn_features', 'next_age_at')
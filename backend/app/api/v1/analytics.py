@@ -1,29 +1,48 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.services.experiment_service import assign_user_to_experiment, churn_by_variant, evaluate_experiment
+from app.core.config import settings
+from app.core.database import get_db, get_async_db, SessionLocal
+from app.core.hll import standard_error
+from app.core.metrics import server_timing_header
+from app.core.streaming import stream_rows, stream_batches
+from app.services.experiment_service import assign_variant, get_stored_variant, persist_assignment, save_assignment, churn_by_variant, evaluate_experiment
 from app.core.dependencies import get_current_user
 from app.infrastructure.database.models import User
-from app.services.analytics_service import get_daily_active_users, get_rolling_dau, get_mau, get_top_churn_risk_users, update_all_churn_probabilities
+from app.services.analytics_service import get_daily_active_users, get_rolling_dau, get_mau, get_top_churn_risk_users
+from app.services.churn_scoring_service import update_all_churn_probabilities, update_churn_probabilities_incremental
 from app.services.analytics_service import get_day1_retention, get_cohort_retention
-from app.services.analytics_service import generate_churn_features, get_user_churn_features, get_executive_metrics
+from app.services.analytics_service import iter_churn_features, get_user_churn_features, get_executive_metrics_async, CHURN_FEATURE_COLUMNS
 from app.ml_inference.churn_predictor import churn_predictor
 from app.services.analytics_service import (
     get_click_count_for_link,
     get_top_links,
-    get_clicks_by_day
+    get_clicks_by_day,
+    get_event_counts_by_day
 )
-from app.services.sql_service import execute_readonly_query
-from pydantic import BaseModel
+from app.services.sql_service import run_console_query, open_console_stream
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from datetime import date
+import json
+import time
 
 
 
 router = APIRouter()
 
+def approximate_fields(approx: bool):
+    if not approx:
+        return {}
+    return {
+        "approximate": True,
+        "standard_error": round(standard_error(settings.HLL_PRECISION), 5)
+    }
+
 @router.get("/dau")
-def daily_active_users(db: Session = Depends(get_db)):
-    dau = get_daily_active_users(db)
-    return {"daily_active_users": dau}
+def daily_active_users(day: Optional[date] = None, approx: bool = False, db: Session = Depends(get_db)):
+    dau = get_daily_active_users(db, day, approx)
+    return {"daily_active_users": dau, **approximate_fields(approx)}
 
 @router.get("/links/{link_id}/clicks")
 def click_count(link_id: str, db: Session = Depends(get_db)):
@@ -47,6 +66,14 @@ def clicks_by_day(db: Session = Depends(get_db)):
         for r in results
     ]
 
+@router.get("/events-by-day")
+def events_by_day(db: Session = Depends(get_db)):
+    results = get_event_counts_by_day(db)
+    return [
+        {"date": str(r[0]), "event_type": r[1], "events": r[2]}
+        for r in results
+    ]
+
 @router.get("/retention/day1")
 def day1_retention(db: Session = Depends(get_db)):
     return {
@@ -54,22 +81,37 @@ def day1_retention(db: Session = Depends(get_db)):
     }
 
 @router.get("/rolling-dau")
-def rolling_dau(days: int = 7, db: Session = Depends(get_db)):
+def rolling_dau(days: int = 7, approx: bool = False, db: Session = Depends(get_db)):
     return {
-        "rolling_active_users": get_rolling_dau(db, days)
+        "rolling_active_users": get_rolling_dau(db, days, approx),
+        **approximate_fields(approx)
     }
 
 @router.get("/mau")
-def mau(db: Session = Depends(get_db)):
-    return {"monthly_active_users": get_mau(db)}
+def mau(approx: bool = False, db: Session = Depends(get_db)):
+    return {"monthly_active_users": get_mau(db, approx), **approximate_fields(approx)}
 
 @router.get("/retention/cohort")
-def cohort_retention(max_days: int = 7, db: Session = Depends(get_db)):
-    return get_cohort_retention(db, max_days)
+def cohort_retention(
+    max_days: int = 7,
+    granularity: Literal["day", "week", "month"] = "day",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    return get_cohort_retention(db, max_days, granularity, start_date, end_date)
 
 @router.get("/churn/features")
-def churn_features(db: Session = Depends(get_db)):
-    return generate_churn_features(db)
+def churn_features(fmt: Literal["json", "ndjson", "csv"] = Query("json", alias="format")):
+    # The stream outlives the request dependencies, so it owns its session
+    def rows():
+        db = SessionLocal()
+        try:
+            yield from iter_churn_features(db)
+        finally:
+            db.close()
+
+    return stream_rows(rows(), CHURN_FEATURE_COLUMNS, fmt)
 
 @router.get("/churn/predict/{user_id}")
 def predict_churn(user_id: str, db: Session = Depends(get_db)):
@@ -88,37 +130,73 @@ def predict_churn(user_id: str, db: Session = Depends(get_db)):
         "churn_probability": probability
     }
 
+@router.get("/churn/model")
+def churn_model():
+    # The version this worker is serving (workers converge within MODEL_REFRESH_SECONDS)
+    if churn_predictor.model is None:
+        return {"error": "Model not loaded"}
+    return {"version": churn_predictor.version, "metadata": churn_predictor.metadata}
+
 @router.post("/churn/update-all")
-def update_churn(db: Session = Depends(get_db)):
-    return update_all_churn_probabilities(db)
+def update_churn(chunk_size: Optional[int] = None, db: Session = Depends(get_db)):
+    # Full rebuild from events (also resets the incremental watermark)
+    return update_all_churn_probabilities(db, chunk_size)
+
+@router.post("/churn/update")
+def update_churn_incremental(chunk_size: Optional[int] = None, db: Session = Depends(get_db)):
+    return update_churn_probabilities_incremental(db, chunk_size)
 
 @router.get("/executive")
-def executive_dashboard(db: Session = Depends(get_db)):
-    return get_executive_metrics(db)
+async def executive_dashboard(response: Response, db: AsyncSession = Depends(get_async_db)):
+    start = time.perf_counter()
+    timings = {}
+
+    metrics = await get_executive_metrics_async(db, timings)
+
+    total = time.perf_counter() - start
+    timings["app"] = total - timings.get("db", 0)
+    timings["total"] = total
+    response.headers["Server-Timing"] = server_timing_header(timings)
+
+    return metrics
 
 @router.post("/experiments/assign/{experiment_name}")
 def assign_experiment(
     experiment_name: str,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    variant_id = assign_user_to_experiment(
-        db,
-        current_user.id,
-        experiment_name
-    )
+    # Hash-bucketed from the cached experiment config
+    assignment = assign_variant(db, current_user.id, experiment_name)
 
-    if variant_id is None:
+    if assignment is None:
         return {"error": "Experiment not found"}
 
+    # A recorded assignment wins (users assigned before hash bucketing keep
+    # their variant), so the variant served is the one conversions count for
+    experiment_id, variant_id = assignment
+    write_mode = settings.EXPERIMENT_ASSIGNMENT_WRITE
+    if write_mode == "sync":
+        variant_id = persist_assignment(db, current_user.id, experiment_id, variant_id)
+    else:
+        stored = get_stored_variant(db, current_user.id, experiment_id)
+        if stored is not None:
+            variant_id = stored
+        elif write_mode == "async":
+            background_tasks.add_task(save_assignment, current_user.id, experiment_id, variant_id)
+
     return {"variant_id": str(variant_id)}
 
 @router.get("/experiments/evaluate/{experiment_name}")
 def evaluate_experiment_endpoint(
     experiment_name: str,
+    control: Optional[str] = None,
+    alpha: float = Query(0.05, gt=0, lt=1),
+    correction: Literal["holm", "bonferroni", "fdr_bh"] = "holm",
     db: Session = Depends(get_db)
 ):
-    return evaluate_experiment(db, experiment_name)
+    return evaluate_experiment(db, experiment_name, control, alpha, correction)
 
 @router.get("/experiments/churn-impact/{experiment_name}")
 def churn_impact(experiment_name: str, db: Session = Depends(get_db)):
@@ -130,7 +208,27 @@ def top_risk_users(limit: int = 10, db: Session = Depends(get_db)):
 
 class SQLQuery(BaseModel):
     query: str
+    # None: buffered JSON (capped at MAX_LIMIT rows); otherwise streamed
+    format: Optional[Literal["ndjson", "csv", "arrow"]] = None
+    max_rows: Optional[int] = Field(None, gt=0)
 
 @router.post("/sql/query")
-def run_sql_query(payload: SQLQuery, db: Session = Depends(get_db)):
-    return execute_readonly_query(db, payload.query)
\ No newline at end of file
+def run_sql_query(payload: SQLQuery):
+    # Runs on the console pool behind EXPLAIN-based admission, never on get_db's
+    if payload.format is None:
+        return run_console_query(payload.query)
+
+    result = open_console_stream(payload.query, payload.max_rows)
+    if "error" in result:
+        return result
+
+    return stream_batches(
+        result["batches"],
+        result["columns"],
+        payload.format,
+        headers={
+            "X-Columns": json.dumps(result["columns"]),
+            "X-Max-Rows": str(result["max_rows"]),
+            "X-Query-Lane": result["plan"]["lane"]
+        }
+    )
\ No newline at end of file
@@ -0,0 +1,22 @@
+import json
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.core.dependencies import get_admin_user
+from app.core.profiling import load_profile
+
+router = APIRouter(dependencies=[Depends(get_admin_user)])
+
+@router.get("/profiles/{profile_id}")
+def get_profile(profile_id: str):
+    summary = load_profile(profile_id, "json")
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return json.loads(summary)
+
+@router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+def get_profile_stacks(profile_id: str):
+    # Folded stacks: `flamegraph.pl`, or drop the file into speedscope.app
+    folded = load_profile(profile_id, "folded")
+    if folded is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return folded
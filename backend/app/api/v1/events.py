@@ -1,18 +1,58 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.services.event_service import log_event
-from app.core.dependencies import get_current_user
+import json
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.services.event_service import log_event_async, log_events_batch_async
+from app.core.dependencies import get_current_user_async
 from app.infrastructure.database.models import User
 
 router = APIRouter()
 
 @router.post("/")
-def create_event(
+async def create_event(
     event_type: str,
     metadata: dict,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    event = log_event(db, current_user.id, event_type, metadata)
-    return {"id": str(event.id), "event_type": event.event_type}
\ No newline at end of file
+    event = await log_event_async(db, current_user.id, event_type, metadata)
+    return {"id": str(event.id), "event_type": event.event_type}
+
+def _parse_ndjson(body: bytes):
+    items = []
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError as e:
+            # Reported per item instead of failing the whole batch
+            items.append(ValueError(f"Invalid JSON: {e}"))
+    return items
+
+@router.post("/batch")
+async def create_events_batch(
+    request: Request,
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    body = await request.body()
+
+    if "ndjson" in request.headers.get("content-type", ""):
+        items = _parse_ndjson(body)
+    else:
+        try:
+            items = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or NDJSON")
+
+    if len(items) > settings.EVENT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.EVENT_BATCH_MAX_SIZE} events per batch"
+        )
+
+    return await log_events_batch_async(db, current_user.id, items)
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi.responses import RedirectResponse
-from app.core.database import get_db
-from app.services.link_service import create_short_link
-from app.infrastructure.database.models import Link, User
-from app.services.click_service import log_click
+from app.core.database import get_db, get_async_db
+from app.services.link_service import create_short_link, resolve_short_code_async
+from app.infrastructure.database.models import User
+from app.services.click_service import click_buffer
 from app.core.dependencies import get_current_user
 from app.schemas.link import LinkCreate
 
@@ -20,16 +22,22 @@ def create_link(
     return {"short_code": link.short_code}
 
 @router.get("/{short_code}")
-def redirect(short_code: str, request: Request, db: Session = Depends(get_db)):
-    link = db.query(Link).filter(Link.short_code == short_code).first()
+async def redirect(short_code: str, request: Request, db: AsyncSession = Depends(get_async_db)):
+    link = await resolve_short_code_async(db, short_code)
     if not link:
         raise HTTPException(status_code=404, detail="Link not found")
 
-    log_click(
-        db,
-        link.id,
+    link_id, original_url = link
+    click = (
+        link_id,
         request.client.host if request.client else None,
         request.headers.get("user-agent")
     )
 
-    return RedirectResponse(str(link.original_url))
\ No newline at end of file
+    if click_buffer.running:
+        click_buffer.add(*click)
+    else:
+        # Write-through (no flusher thread) must not block the event loop
+        await run_in_threadpool(click_buffer.add, *click)
+
+    return RedirectResponse(str(original_url))
\ No newline at end of file
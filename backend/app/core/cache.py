@@ -0,0 +1,62 @@
+import threading
+import time
+from collections import OrderedDict
+from app.core.metrics import CACHE_HITS, CACHE_MISSES
+
+MISSING = object()
+
+# Bounded in-process LRU cache with per-entry TTL. `None` values are cached
+# as negative entries with their own (usually shorter) TTL.
+class TTLCache:
+    def __init__(self, name: str, max_size: int, ttl: float, negative_ttl=None, clock=time.monotonic):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > self.clock():
+                    self._entries.move_to_end(key)
+                    CACHE_HITS.labels(cache=self.name).inc()
+                    return value
+                del self._entries[key]
+
+        CACHE_MISSES.labels(cache=self.name).inc()
+        return MISSING
+
+    def set(self, key, value):
+        ttl = self.negative_ttl if value is None else self.ttl
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (value, self.clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        value = self.get(key)
+        if value is MISSING:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,67 @@
+import threading
+import time
+from contextlib import contextmanager
+from app.core.metrics import LIMITER_ACTIVE, LIMITER_QUEUED, LIMITER_QUEUE_TIME, LIMITER_REJECTED
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+# Bounded concurrency for blocking work: at most `max_concurrent` callers run,
+# at most `max_queue` wait (each for up to `queue_timeout` seconds), the rest
+# are rejected straight away.
+class ConcurrencyLimiter:
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+
+    def acquire(self) -> float:
+        # Returns the time spent queued
+        with self._lock:
+            if self._queued >= self.max_queue:
+                LIMITER_REJECTED.labels(limiter=self.name, reason="queue_full").inc()
+                raise AdmissionRejected("queue_full", f"Too many queued {self.name} queries, try again later")
+            self._queued += 1
+            LIMITER_QUEUED.labels(limiter=self.name).set(self._queued)
+
+        start = time.perf_counter()
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        waited = time.perf_counter() - start
+
+        with self._lock:
+            self._queued -= 1
+            LIMITER_QUEUED.labels(limiter=self.name).set(self._queued)
+            if acquired:
+                self._active += 1
+                LIMITER_ACTIVE.labels(limiter=self.name).set(self._active)
+
+        LIMITER_QUEUE_TIME.labels(limiter=self.name).observe(waited)
+        if not acquired:
+            LIMITER_REJECTED.labels(limiter=self.name, reason="queue_timeout").inc()
+            raise AdmissionRejected(
+                "queue_timeout",
+                f"Timed out after {self.queue_timeout:g}s waiting for a {self.name} slot"
+            )
+        return waited
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+            LIMITER_ACTIVE.labels(limiter=self.name).set(self._active)
+        self._slots.release()
+
+    @contextmanager
+    def slot(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
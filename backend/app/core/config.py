@@ -1,8 +1,85 @@
 import os
+from app.core.hll import MAX_PRECISION, MIN_PRECISION
+
+def _env_choice(name: str, default: str, choices) -> str:
+    # Misspelled modes fail at startup instead of quietly meaning something else
+    value = os.getenv(name, default)
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {', '.join(sorted(choices))}, got {value!r}")
+    return value
+
+def _env_int_range(name: str, default: int, low: int, high: int) -> int:
+    value = int(os.getenv(name, str(default)))
+    if not low <= value <= high:
+        raise ValueError(f"{name} must be between {low} and {high}, got {value}")
+    return value
 
 class Settings:
     PROJECT_NAME = "AI SaaS Intelligence Platform"
     DATABASE_URL = os.getenv("DATABASE_URL")
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
+    # Comma-separated; admins may use debug features such as request profiling
+    ADMIN_EMAILS = frozenset(
+        email.strip().lower() for email in os.getenv("ADMIN_EMAILS", "").split(",") if email.strip()
+    )
+    # Connection pool (per engine, per process)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # -1: never
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Behind PgBouncer in transaction mode: no prepared statements cached per connection
+    DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+    # Fresh connection per checkout instead of a pool (tests: one event loop per request)
+    DB_NULL_POOL = os.getenv("DB_NULL_POOL", "false").lower() == "true"
+    # Versioned churn models; every worker polls CURRENT and hot-swaps on change
+    MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", os.path.join(os.getcwd(), "ml", "models", "churn"))
+    MODEL_REGISTRY_KEEP = int(os.getenv("MODEL_REGISTRY_KEEP", "5"))
+    MODEL_REFRESH_SECONDS = float(os.getenv("MODEL_REFRESH_SECONDS", "30"))
+    CHURN_SCORING_CHUNK_SIZE = int(os.getenv("CHURN_SCORING_CHUNK_SIZE", "5000"))
+    # Incremental churn scoring re-reads this much before its watermark (late commits)
+    CHURN_WATERMARK_LAG_SECONDS = int(os.getenv("CHURN_WATERMARK_LAG_SECONDS", "300"))
+    CLICK_BUFFER_MAX_BATCH = int(os.getenv("CLICK_BUFFER_MAX_BATCH", "500"))
+    CLICK_BUFFER_FLUSH_INTERVAL = float(os.getenv("CLICK_BUFFER_FLUSH_INTERVAL", "1.0"))
+    CLICK_BUFFER_MAX_QUEUE = int(os.getenv("CLICK_BUFFER_MAX_QUEUE", "50000"))
+    EVENT_BATCH_MAX_SIZE = int(os.getenv("EVENT_BATCH_MAX_SIZE", "10000"))
+    # Client timestamps may run this far ahead of the server clock; how far back
+    # they may go is ROLLUP_LOOKBACK_DAYS (older days are never re-rolled)
+    EVENT_MAX_CLOCK_SKEW_SECONDS = int(os.getenv("EVENT_MAX_CLOCK_SKEW_SECONDS", "300"))
+    ROLLUP_LOOKBACK_DAYS = int(os.getenv("ROLLUP_LOOKBACK_DAYS", "2"))
+    ROLLUP_REFRESH_MINUTES = int(os.getenv("ROLLUP_REFRESH_MINUTES", "15"))
+    HLL_PRECISION = _env_int_range("HLL_PRECISION", 14, MIN_PRECISION, MAX_PRECISION)
+    PARTITION_PREMAKE_MONTHS = int(os.getenv("PARTITION_PREMAKE_MONTHS", "3"))
+    PARTITION_RETENTION_MONTHS = int(os.getenv("PARTITION_RETENTION_MONTHS", "0"))
+    # Expired partitions: detach (kept as standalone tables) | drop (deleted)
+    PARTITION_RETENTION_ACTION = _env_choice("PARTITION_RETENTION_ACTION", "detach", {"detach", "drop"})
+    LINK_CACHE_MAX_SIZE = int(os.getenv("LINK_CACHE_MAX_SIZE", "100000"))
+    LINK_CACHE_TTL = float(os.getenv("LINK_CACHE_TTL", "3600"))
+    LINK_CACHE_NEGATIVE_TTL = float(os.getenv("LINK_CACHE_NEGATIVE_TTL", "30"))
+    SQL_STATEMENT_TIMEOUT_MS = int(os.getenv("SQL_STATEMENT_TIMEOUT_MS", "3000"))
+    SQL_STREAM_MAX_ROWS = int(os.getenv("SQL_STREAM_MAX_ROWS", "1000000"))
+    SQL_STREAM_BATCH_ROWS = int(os.getenv("SQL_STREAM_BATCH_ROWS", "5000"))
+    # SQL console admission: EXPLAIN estimates above MAX are rejected,
+    # above HEAVY they run in the (narrower) heavy lane
+    SQL_MAX_PLAN_COST = float(os.getenv("SQL_MAX_PLAN_COST", "5000000"))
+    SQL_MAX_PLAN_ROWS = float(os.getenv("SQL_MAX_PLAN_ROWS", "50000000"))
+    SQL_HEAVY_PLAN_COST = float(os.getenv("SQL_HEAVY_PLAN_COST", "100000"))
+    SQL_CONSOLE_LIGHT_CONCURRENCY = int(os.getenv("SQL_CONSOLE_LIGHT_CONCURRENCY", "4"))
+    SQL_CONSOLE_HEAVY_CONCURRENCY = int(os.getenv("SQL_CONSOLE_HEAVY_CONCURRENCY", "1"))
+    SQL_CONSOLE_MAX_QUEUE = int(os.getenv("SQL_CONSOLE_MAX_QUEUE", "20"))
+    SQL_CONSOLE_QUEUE_TIMEOUT = float(os.getenv("SQL_CONSOLE_QUEUE_TIMEOUT", "10"))
+    # Request profiling for admins: off | header (when PROFILING_HEADER is sent) | always
+    PROFILING_MODE = _env_choice("PROFILING_MODE", "header", {"off", "header", "always"})
+    PROFILING_HEADER = os.getenv("PROFILING_HEADER", "X-Debug-Profile")
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "2"))
+    # Warn when one statement shape runs more than this many times in a request
+    PROFILE_REPEATED_QUERY_THRESHOLD = int(os.getenv("PROFILE_REPEATED_QUERY_THRESHOLD", "10"))
+    PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.getcwd(), "profiles"))
+    # Saved profiles kept on disk; the oldest beyond this are deleted
+    PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+    EXPERIMENT_CACHE_MAX_SIZE = int(os.getenv("EXPERIMENT_CACHE_MAX_SIZE", "1000"))
+    EXPERIMENT_CACHE_TTL = float(os.getenv("EXPERIMENT_CACHE_TTL", "30"))
+    # sync | async (after the response) | off
+    EXPERIMENT_ASSIGNMENT_WRITE = _env_choice("EXPERIMENT_ASSIGNMENT_WRITE", "async", {"sync", "async", "off"})
 
 settings = Settings()
\ No newline at end of file
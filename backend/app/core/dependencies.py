@@ -1,11 +1,14 @@
-from fastapi import Depends, HTTPException
+from typing import Optional
+from fastapi import Depends, HTTPException, Request
 from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import os
 import uuid
 
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_db, get_async_db, AsyncSessionLocal
 from app.infrastructure.database.models import User
 
 security = HTTPBearer()
@@ -14,21 +17,58 @@ security = HTTPBearer()
 SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret")
 ALGORITHM = "HS256"
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
+def _token_user_id(credentials: HTTPAuthorizationCredentials) -> uuid.UUID:
     token = credentials.credentials
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub") # type: ignore
         if user_id is None:
             raise HTTPException(status_code=401)
-    except JWTError:
+        return uuid.UUID(user_id)
+    except (JWTError, ValueError):
+        raise HTTPException(status_code=401)
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+):
+    user = db.query(User).filter(User.id == _token_user_id(credentials)).first()
+    if user is None:
         raise HTTPException(status_code=401)
 
-    user = db.query(User).filter(User.id == uuid.UUID(user_id)).first()
+    return user
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+):
+    user = await db.get(User, _token_user_id(credentials))
     if user is None:
         raise HTTPException(status_code=401)
 
-    return user
\ No newline at end of file
+    return user
+
+def is_admin(user: User) -> bool:
+    return bool(user.email) and user.email.lower() in settings.ADMIN_EMAILS
+
+def get_admin_user(current_user: User = Depends(get_current_user)):
+    if not is_admin(current_user):
+        raise HTTPException(status_code=403)
+
+    return current_user
+
+async def request_admin(request: Request) -> Optional[User]:
+    # For middleware: the admin behind the request's bearer token, else None
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token or not settings.ADMIN_EMAILS:
+        return None
+
+    try:
+        user_id = _token_user_id(HTTPAuthorizationCredentials(scheme=scheme, credentials=token))
+    except HTTPException:
+        return None
+
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
+
+    return user if user is not None and is_admin(user) else None
@@ -0,0 +1,87 @@
+import math
+import numpy as np
+
+MIN_PRECISION = 4
+MAX_PRECISION = 18
+
+def standard_error(precision: int) -> float:
+    return 1.04 / math.sqrt(1 << precision)
+
+def _bit_length(values):
+    # Exact vectorized bit_length for uint64 arrays
+    values = values.copy()
+    lengths = np.zeros(values.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = values >= np.uint64(1 << shift)
+        lengths[mask] += shift
+        values[mask] >>= np.uint64(shift)
+    lengths += (values > 0).astype(np.uint8)
+    return lengths
+
+
+# Dense HyperLogLog over 64-bit hashes: 2**precision one-byte registers,
+# relative standard error 1.04 / sqrt(2**precision).
+class HyperLogLog:
+    def __init__(self, precision: int = 14, registers=None):
+        if not MIN_PRECISION <= precision <= MAX_PRECISION:
+            raise ValueError(f"precision must be between {MIN_PRECISION} and {MAX_PRECISION}")
+
+        self.precision = precision
+        self.m = 1 << precision
+        if registers is None:
+            registers = np.zeros(self.m, dtype=np.uint8)
+        self.registers = registers
+
+    def add_hashes(self, hashes):
+        hashes = np.asarray(hashes)
+        if hashes.dtype == np.int64:
+            hashes = hashes.view(np.uint64)
+        hashes = hashes.astype(np.uint64, copy=False)
+        if not hashes.size:
+            return self
+
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        rest = hashes << p
+
+        # Rank = position of the leftmost 1-bit in the remaining 64 - p bits
+        rank = (np.uint8(65) - _bit_length(rest)).astype(np.uint8)
+        rank = np.minimum(rank, np.uint8(64 - self.precision + 1))
+
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog"):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        m = self.m
+        if m == 16:
+            alpha = 0.673
+        elif m == 32:
+            alpha = 0.697
+        elif m == 64:
+            alpha = 0.709
+        else:
+            alpha = 0.7213 / (1 + 1.079 / m)
+
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+
+        # Small-range correction (linear counting)
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return bytes([self.precision]) + self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HyperLogLog":
+        precision = data[0]
+        registers = np.frombuffer(data, dtype=np.uint8, offset=1).copy()
+        return cls(precision, registers)
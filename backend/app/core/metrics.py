@@ -1,7 +1,19 @@
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
 from fastapi import Request, Response
+from contextvars import ContextVar
+from typing import Optional
+import sys
 import time
 
+try:
+    from greenlet import getcurrent
+except ImportError:  # only needed to attribute async-engine queries
+    getcurrent = None
+
+# "endpoint" is the matched route template (/api/v1/links/{short_code}),
+# never the raw path, so label cardinality is bounded by the number of routes
+UNMATCHED_ROUTE = "unmatched"
+
 REQUEST_COUNT = Counter(
     "app_requests_total",
     "Total HTTP requests",
@@ -14,23 +26,211 @@ REQUEST_LATENCY = Histogram(
     ["endpoint"]
 )
 
+REQUEST_DB_QUERIES = Histogram(
+    "app_request_db_queries",
+    "SQL statements executed per request",
+    ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+)
+
+REQUEST_DB_TIME = Histogram(
+    "app_request_db_seconds",
+    "Time per request spent in SQL statements (the rest of the latency is Python)",
+    ["endpoint"]
+)
+
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement duration by the service function that issued it",
+    ["service"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+CLICK_BUFFER_DEPTH = Gauge(
+    "click_buffer_depth",
+    "Clicks queued in memory waiting to be flushed"
+)
+
+CLICK_BUFFER_FLUSH_LATENCY = Histogram(
+    "click_buffer_flush_latency_seconds",
+    "Time spent writing one batch of buffered clicks"
+)
+
+CLICK_BUFFER_FLUSHED = Counter(
+    "click_buffer_flushed_total",
+    "Clicks written to the database by the click buffer"
+)
+
+CLICK_BUFFER_DROPPED = Counter(
+    "click_buffer_dropped_total",
+    "Clicks dropped because the buffer was full (flusher behind or database unavailable)"
+)
+
+CACHE_HITS = Counter(
+    "app_cache_hits_total",
+    "In-process cache hits",
+    ["cache"]
+)
+
+CACHE_MISSES = Counter(
+    "app_cache_misses_total",
+    "In-process cache misses",
+    ["cache"]
+)
+
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out",
+    "Connections currently checked out of the pool",
+    ["pool"]
+)
+
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow",
+    "Connections open beyond pool_size",
+    ["pool"]
+)
+
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    ["pool"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total",
+    "Checkouts that gave up after pool_timeout",
+    ["pool"]
+)
+
+LIMITER_ACTIVE = Gauge(
+    "limiter_active",
+    "Callers currently holding a concurrency limiter slot",
+    ["limiter"]
+)
+
+LIMITER_QUEUED = Gauge(
+    "limiter_queued",
+    "Callers waiting for a concurrency limiter slot",
+    ["limiter"]
+)
+
+LIMITER_QUEUE_TIME = Histogram(
+    "limiter_queue_seconds",
+    "Time spent waiting for a concurrency limiter slot",
+    ["limiter"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+LIMITER_REJECTED = Counter(
+    "limiter_rejected_total",
+    "Work rejected before running (queue full, queue timeout, estimated cost)",
+    ["limiter", "reason"]
+)
+
+def server_timing_header(timings: dict) -> str:
+    # Server-Timing header value from {phase: seconds}
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.2f}"
+        for name, seconds in timings.items()
+    )
+
+class QueryStats:
+    # SQL statements run on behalf of one request
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+# Shared (not copied) into the threadpool and greenlets that serve the request
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+# code object -> "module.function" for app.services frames, None for the rest
+_service_labels = {}
+
+def _service_on_stack(frame):
+    labels = _service_labels
+    while frame is not None:
+        code = frame.f_code
+        label = labels.get(code, False)
+        if label is False:
+            module = frame.f_globals.get("__name__", "")
+            label = None
+            if module.startswith("app.services."):
+                label = f"{module.rsplit('.', 1)[1]}.{code.co_name}"
+            labels[code] = label
+        if label:
+            return label
+        frame = frame.f_back
+    return None
+
+def query_origin() -> str:
+    # Innermost service function that issued the current statement
+    label = _service_on_stack(sys._getframe(1))
+    if label:
+        return label
+
+    # The async engine runs SQLAlchemy in a child greenlet whose stack stops
+    # at the driver; the awaiting service coroutine is on a parent's stack
+    if getcurrent is not None:
+        parent = getcurrent().parent
+        while parent is not None:
+            label = _service_on_stack(parent.gr_frame)
+            if label:
+                return label
+            parent = parent.parent
+    return "other"
+
+def record_query(seconds: float):
+    DB_QUERY_DURATION.labels(service=query_origin()).observe(seconds)
+
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += seconds
+
+def route_template(request: Request) -> str:
+    # Set on the scope by the router once a route matched
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
 async def metrics_middleware(request: Request, call_next):
-    start_time = time.time()
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    start_time = time.perf_counter()
+
+    try:
+        response = await call_next(request)
+    finally:
+        current_query_stats.reset(token)
+
+    def record():
+        process_time = time.perf_counter() - start_time
+        endpoint = route_template(request)
 
-    response = await call_next(request)
+        REQUEST_COUNT.labels(
+            method=request.method,
+            endpoint=endpoint,
+            http_status=response.status_code
+        ).inc()
 
-    process_time = time.time() - start_time
+        REQUEST_LATENCY.labels(endpoint=endpoint).observe(process_time)
+        REQUEST_DB_QUERIES.labels(endpoint=endpoint).observe(stats.count)
+        REQUEST_DB_TIME.labels(endpoint=endpoint).observe(stats.seconds)
 
-    REQUEST_COUNT.labels(
-        method=request.method,
-        endpoint=request.url.path,
-        http_status=response.status_code
-    ).inc()
+    # call_next returns once the headers are sent; streamed endpoints keep
+    # querying (into the same stats) until the last chunk, so record after it
+    body = response.body_iterator
 
-    REQUEST_LATENCY.labels(
-        endpoint=request.url.path
-    ).observe(process_time)
+    async def recorded_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            record()
 
+    response.body_iterator = recorded_body()
     return response
 
 async def metrics_endpoint():
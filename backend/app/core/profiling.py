@@ -0,0 +1,303 @@
+import asyncio
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from app.core.config import settings
+from app.core.metrics import route_template, server_timing_header
+
+# Statement text with literals and bind parameters folded, so the same query
+# with different arguments (or IN-list lengths) counts as one shape
+_PARAMETER = re.compile(r"%\(\w+\)s|\$\d+|\?|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMETER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    shape = _PARAMETER.sub("?", statement)
+    shape = _PARAMETER_LIST.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+class StackSampler:
+    # Wall-clock sampling of the thread serving one request: every `interval`
+    # seconds while its endpoint runs, that thread contributes one folded
+    # stack ("outer;inner;leaf"). Concurrent requests are never sampled.
+    def __init__(self, interval: float, serving):
+        self.interval = interval
+        # callable returning (thread ident, endpoint frame or None), or None
+        # when the endpoint is not running (see serving_endpoint)
+        self.serving = serving
+        self.stacks = Counter()
+        self.samples = 0
+        self._names = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _frame_name(self, frame):
+        code = frame.f_code
+        name = self._names.get(code)
+        if name is None:
+            name = f"{frame.f_globals.get('__name__', '?')}.{code.co_name}"
+            self._names[code] = name
+        return name
+
+    def _sample(self):
+        serving = self.serving()
+        if serving is None:
+            return
+
+        ident, endpoint_frame = serving
+        frame = sys._current_frames().get(ident)
+        stack = []
+        # A sync endpoint owns its worker thread; an async one shares the event
+        # loop thread, so only count stacks running this request's coroutine
+        running_endpoint = endpoint_frame is None
+        while frame is not None:
+            running_endpoint = running_endpoint or frame is endpoint_frame
+            stack.append(self._frame_name(frame))
+            frame = frame.f_back
+        if stack and running_endpoint:
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self) -> str:
+        # Brendan Gregg's folded format: flamegraph.pl, speedscope, inferno
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 10):
+        # Leaf ("self") samples per function
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [{"function": name, "samples": n} for name, n in leaves.most_common(limit)]
+
+
+class RequestProfile:
+    def __init__(self, request_id: str, repeated_threshold: int):
+        self.id = request_id
+        self.repeated_threshold = repeated_threshold
+        self.started = time.perf_counter()
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.shape_counts = Counter()
+        self.shape_seconds = Counter()
+        self.serving = None  # (thread ident, endpoint frame or None) while the endpoint runs
+
+    def record(self, statement: str, seconds: float):
+        shape = statement_shape(statement)
+        self.statements += 1
+        self.db_seconds += seconds
+        self.shape_counts[shape] += 1
+        self.shape_seconds[shape] += seconds
+
+    def repeated_shapes(self):
+        # Shapes above the threshold: N+1 suspects, most frequent first
+        return [
+            {
+                "statement": shape,
+                "count": count,
+                "total_ms": round(self.shape_seconds[shape] * 1000, 3)
+            }
+            for shape, count in self.shape_counts.most_common()
+            if count > self.repeated_threshold
+        ]
+
+    def summary(self, sampler: Optional[StackSampler] = None, **request):
+        repeated = self.repeated_shapes()
+        summary = {
+            "id": self.id,
+            **request,
+            "wall_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "db": {
+                "statements": self.statements,
+                "distinct_statements": len(self.shape_counts),
+                "db_ms": round(self.db_seconds * 1000, 3),
+            },
+            "repeated_statements": repeated,
+            "warnings": [
+                f"Statement ran {item['count']} times in one request "
+                f"(threshold {self.repeated_threshold}): {item['statement'][:200]}"
+                for item in repeated
+            ],
+        }
+        if sampler is not None:
+            summary["samples"] = {
+                "interval_ms": sampler.interval * 1000,
+                "count": sampler.samples,
+                "top_functions": sampler.top_functions(),
+            }
+        return summary
+
+
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("current_profile", default=None)
+
+def record_statement(statement: str, seconds: float):
+    profile = current_profile.get()
+    if profile is not None:
+        profile.record(statement, seconds)
+
+def serving_endpoint(call):
+    # Wraps a route's endpoint so a profiled request notes which thread runs
+    # it (the threadpool worker for sync endpoints, the event loop plus the
+    # coroutine's frame for async ones) for the sampler to follow
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def endpoint(**values):
+            profile = current_profile.get()
+            if profile is None:
+                return await call(**values)
+            coroutine = call(**values)
+            profile.serving = (threading.get_ident(), coroutine.cr_frame)
+            try:
+                return await coroutine
+            finally:
+                profile.serving = None
+    else:
+        @functools.wraps(call)
+        def endpoint(**values):
+            profile = current_profile.get()
+            if profile is None:
+                return call(**values)
+            profile.serving = (threading.get_ident(), None)
+            try:
+                return call(**values)
+            finally:
+                profile.serving = None
+    return endpoint
+
+def profile_endpoints(app: FastAPI):
+    # After the routers are included; FastAPI decided sync vs async already
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            route.dependant.call = serving_endpoint(route.dependant.call)
+
+# ---------------------------
+# Saved artifacts: <PROFILE_DIR>/<id>.json (summary) and <id>.folded (stacks)
+# ---------------------------
+_PROFILE_ID = re.compile(r"[0-9a-f]{32}")
+
+def new_profile_id() -> str:
+    return uuid.uuid4().hex
+
+def profile_path(profile_id: str, suffix: str) -> Optional[str]:
+    if not _PROFILE_ID.fullmatch(profile_id):
+        return None
+    return os.path.join(settings.PROFILE_DIR, f"{profile_id}.{suffix}")
+
+def save_profile(summary: dict, folded: str):
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    with open(profile_path(summary["id"], "folded"), "w") as f:
+        f.write(folded)
+    with open(profile_path(summary["id"], "json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    prune_profiles(settings.PROFILE_KEEP)
+
+def prune_profiles(keep: int):
+    # Oldest saved profiles beyond `keep` go (both artifacts)
+    saved = []
+    for name in os.listdir(settings.PROFILE_DIR):
+        profile_id, _, suffix = name.partition(".")
+        if suffix == "json" and _PROFILE_ID.fullmatch(profile_id):
+            saved.append((os.path.getmtime(os.path.join(settings.PROFILE_DIR, name)), profile_id))
+    saved.sort()
+    for _, profile_id in saved[:max(len(saved) - keep, 0)]:
+        for suffix in ("json", "folded"):
+            try:
+                os.remove(profile_path(profile_id, suffix))
+            except FileNotFoundError:
+                pass
+
+def load_profile(profile_id: str, suffix: str = "json") -> Optional[str]:
+    path = profile_path(profile_id, suffix)
+    if path is None or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read()
+
+# ---------------------------
+# Middleware
+# ---------------------------
+def _wants_profile(request: Request) -> bool:
+    if settings.PROFILING_MODE == "always":
+        return True
+    if settings.PROFILING_MODE == "header":
+        return request.headers.get(settings.PROFILING_HEADER, "").lower() in ("1", "true", "yes")
+    return False
+
+async def profiling_middleware(request: Request, call_next):
+    if not _wants_profile(request):
+        return await call_next(request)
+
+    from app.core.dependencies import request_admin
+    if await request_admin(request) is None:
+        # Not an admin: served normally, without revealing the feature
+        return await call_next(request)
+
+    profile = RequestProfile(new_profile_id(), settings.PROFILE_REPEATED_QUERY_THRESHOLD)
+    sampler = StackSampler(settings.PROFILE_SAMPLE_INTERVAL_MS / 1000, lambda: profile.serving)
+
+    token = current_profile.set(profile)
+    sampler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        sampler.stop()
+        current_profile.reset(token)
+
+    route = route_template(request)
+
+    # Headers go out before a streamed body runs, so they cover the handler;
+    # the saved profile is finalized after the last chunk and covers it all
+    response.headers["X-Profile-Id"] = profile.id
+    response.headers["X-Profile-Statements"] = str(profile.statements)
+    response.headers["X-Profile-Repeated-Statements"] = str(len(profile.repeated_shapes()))
+
+    timing = server_timing_header({"db": profile.db_seconds, "total": time.perf_counter() - profile.started})
+    existing = response.headers.get("Server-Timing")
+    response.headers["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+
+    async def finish():
+        summary = profile.summary(
+            sampler,
+            method=request.method,
+            path=request.url.path,
+            route=route,
+            status=response.status_code
+        )
+        await run_in_threadpool(save_profile, summary, sampler.folded())
+
+        for warning in summary["warnings"]:
+            print(f"Possible N+1 in {request.method} {route}:", warning)
+
+    body = response.body_iterator
+
+    async def profiled_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            await finish()
+
+    response.body_iterator = profiled_body()
+    return response
@@ -1,39 +1,111 @@
 from apscheduler.schedulers.background import BackgroundScheduler
+from concurrent.futures import ProcessPoolExecutor
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
-from app.services.analytics_service import update_all_churn_probabilities
-import subprocess
-import os
+from app.core.database import SessionLocal, advisory_lock
+from app.core.config import settings
+from app.services.churn_scoring_service import update_churn_probabilities_incremental
+from app.services.rollup_service import refresh_rollups
+from app.services.partition_service import maintain_partitions
+from datetime import datetime
+import multiprocessing
 
 scheduler = BackgroundScheduler()
 
+# Training runs in a child of a fork server that imported pandas/sklearn once,
+# so each retrain is a cheap fork rather than a cold interpreter, and the
+# child shares no threads or DB connections with the serving process
+_start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+training_context = multiprocessing.get_context(_start_method)
+if _start_method == "forkserver":
+    training_context.set_forkserver_preload(["ml.training.churn_training"])
+
 def retrain_model():
-    print("Retraining churn model...")
-    result = subprocess.run(
-        ["python", "-m", "app.ml.training.churn_training"],
-        capture_output=True
-    )
-    if result.returncode != 0:
-        print("Training failed:", result.stderr.decode())
-        return
-    # Reload model into memory
+    from ml.training.churn_training import train_and_publish
+
+    # Every worker schedules this; one trains, the rest pick the result up
+    # through refresh_model
+    with advisory_lock("retrain_churn_model") as acquired:
+        if not acquired:
+            print("Churn model retraining already running elsewhere, skipping.")
+            return
+
+        print("Retraining churn model...")
+        with ProcessPoolExecutor(max_workers=1, mp_context=training_context) as pool:
+            try:
+                metadata = pool.submit(train_and_publish).result()
+            except Exception as e:
+                print("Training failed:", e)
+                return
+
+    print(f"Churn model {metadata['version']} published:", metadata["metrics"])
+    refresh_model()
+
+def refresh_model():
+    # Hot-swap to the registry's current version if another process published one
     from app.ml_inference.churn_predictor import churn_predictor
-    churn_predictor.load_model()
-    print("Model retrained and reloaded.")
+    churn_predictor.refresh()
 
 def update_churn_scores():
-    print("Updating churn probabilities...")
-    db: Session = SessionLocal()
-    update_all_churn_probabilities(db)
-    db.close()
-    print("Churn scores updated.")
+    # Incremental: users with new events are rescored, the rest only age
+    with advisory_lock("update_churn_scores") as acquired:
+        if not acquired:
+            return
+        print("Updating churn probabilities...")
+        db: Session = SessionLocal()
+        try:
+            result = update_churn_probabilities_incremental(db)
+        finally:
+            db.close()
+    print("Churn scores updated:", result)
+
+def update_rollups():
+    # One worker re-rolls; concurrent upserts of the same days would only
+    # duplicate the work (and can deadlock)
+    with advisory_lock("refresh_rollups") as acquired:
+        if not acquired:
+            return
+        print("Refreshing daily rollups...")
+        db: Session = SessionLocal()
+        try:
+            result = refresh_rollups(db)
+        finally:
+            db.close()
+    print("Rollups refreshed:", result)
+
+def manage_partitions():
+    # One worker at a time: a concurrent CREATE/DETACH of the same partition
+    # fails and aborts the loser's maintenance transaction
+    with advisory_lock("maintain_partitions") as acquired:
+        if not acquired:
+            return
+        print("Maintaining events/clicks partitions...")
+        db: Session = SessionLocal()
+        try:
+            result = maintain_partitions(db)
+        finally:
+            db.close()
+    print("Partitions maintained:", result)
 
 def start_scheduler():
     # Retrain every 24 hours
     scheduler.add_job(retrain_model, "interval", hours=24)
 
+    # Poll the model registry (a one-line file read) and hot-swap on change
+    scheduler.add_job(refresh_model, "interval", seconds=settings.MODEL_REFRESH_SECONDS)
+
     # Update churn probabilities every hour
     scheduler.add_job(update_churn_scores, "interval", hours=1)
 
+    # Maintain daily rollups incrementally (first run at startup)
+    scheduler.add_job(
+        update_rollups,
+        "interval",
+        minutes=settings.ROLLUP_REFRESH_MINUTES,
+        next_run_time=datetime.now()
+    )
+
+    # Pre-create upcoming monthly partitions and expire old ones (first run at startup)
+    scheduler.add_job(manage_partitions, "interval", hours=24, next_run_time=datetime.now())
+
     scheduler.start()
     print("Scheduler started.")
\ No newline at end of file
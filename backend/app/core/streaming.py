@@ -0,0 +1,159 @@
+import csv
+import io
+import json
+from fastapi.responses import StreamingResponse
+
+STREAM_FORMATS = ("json", "ndjson", "csv", "arrow")
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+# Postgres type name -> Arrow type name; anything else is sent as a string
+ARROW_TYPES = {
+    "smallint": "int16",
+    "integer": "int32",
+    "bigint": "int64",
+    "real": "float32",
+    "double precision": "float64",
+    "boolean": "bool_",
+    "date": "date32",
+    "timestamp without time zone": "timestamp",
+    "timestamp with time zone": "timestamptz",
+}
+
+DEFAULT_CHUNK_ROWS = 1000
+
+def _chunked(lines, chunk_rows: int):
+    # Group encoded rows so each write to the socket carries many rows
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_rows:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+def encode_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row, default=str) + "\n"
+
+def encode_json_array(rows):
+    yield "["
+    first = True
+    for row in rows:
+        yield ("" if first else ",") + json.dumps(row, default=str)
+        first = False
+    yield "]"
+
+def encode_csv(rows, columns):
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    writer.writerow(columns)
+    yield out.getvalue()
+
+    for row in rows:
+        out.seek(0)
+        out.truncate()
+        writer.writerow([row.get(c) for c in columns] if isinstance(row, dict) else row)
+        yield out.getvalue()
+
+class _ChunkSink(io.RawIOBase):
+    # Write-only file that hands back whatever was written since the last take()
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _arrow_type(pa, pg_type: str):
+    name = ARROW_TYPES.get(pg_type)
+    if name == "timestamp":
+        return pa.timestamp("us")
+    if name == "timestamptz":
+        return pa.timestamp("us", tz="UTC")
+    if name is None:
+        return pa.string()
+    return getattr(pa, name)()
+
+def _arrow_value(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return str(value)
+
+def encode_arrow(batches, columns):
+    # One Arrow IPC stream; `columns` are {"name", "type"} with Postgres type names
+    import pyarrow as pa
+
+    schema = pa.schema([
+        pa.field(c["name"], _arrow_type(pa, c["type"]), metadata={"pg_type": c["type"]})
+        for c in columns
+    ])
+    sink = _ChunkSink()
+    writer = pa.ipc.new_stream(sink, schema)
+
+    for batch in batches:
+        arrays = []
+        for i, field in enumerate(schema):
+            values = [row[i] for row in batch]
+            if pa.types.is_string(field.type):
+                values = [_arrow_value(v) for v in values]
+            arrays.append(pa.array(values, type=field.type))
+        writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+        yield sink.take()
+
+    writer.close()
+    yield sink.take()
+
+def stream_batches(batches, columns, fmt: str = "ndjson", headers=None, background=None):
+    # Row batches (lists of sequences) straight to the client, one write per batch
+    if fmt == "arrow":
+        chunks = encode_arrow(batches, columns)
+    else:
+        names = [c["name"] for c in columns]
+        rows = (list(row) for batch in batches for row in batch)
+        lines = encode_csv(rows, names) if fmt == "csv" else encode_ndjson(rows)
+        chunks = _chunked(lines, DEFAULT_CHUNK_ROWS)
+
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[fmt],
+        headers=headers,
+        background=background
+    )
+
+def stream_rows(rows, columns, fmt: str = "ndjson", chunk_rows: int = DEFAULT_CHUNK_ROWS, headers=None):
+    if fmt == "csv":
+        lines = encode_csv(rows, columns)
+    elif fmt == "json":
+        lines = encode_json_array(rows)
+    else:
+        lines = encode_ndjson(rows)
+
+    return StreamingResponse(
+        _chunked(lines, chunk_rows),
+        media_type=MEDIA_TYPES.get(fmt, MEDIA_TYPES["ndjson"]),
+        headers=headers
+    )
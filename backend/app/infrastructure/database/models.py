@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, ForeignKey, DateTime, Float, Boolean, Integer
+from sqlalchemy import Column, String, ForeignKey, DateTime, Float, Boolean, Integer, Date, BigInteger, SmallInteger, LargeBinary, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 import uuid
 from app.core.database import Base
 
@@ -11,7 +11,7 @@ class User(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     email = Column(String, unique=True, index=True)
     password_hash = Column(String)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
 
     links = relationship("Link", back_populates="owner")
 
@@ -30,19 +30,41 @@ class Link(Base):
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # Per-user features / cohort joins
+        Index("ix_events_user_id_timestamp", "user_id", "timestamp"),
+        # Distinct users over a time window (index-only scans)
+        Index("ix_events_timestamp_user_id", "timestamp", "user_id"),
+        # Converted users per experiment (experiment evaluation)
+        Index(
+            "ix_events_experiment_conversion",
+            text("(event_data ->> 'experiment')"),
+            "user_id",
+            postgresql_where=text("event_type = 'experiment_conversion'")
+        ),
+        # Monthly partitions, managed by app.services.partition_service
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
     event_type = Column(String, index=True)
     event_data = Column(JSONB)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Partition key, so part of the primary key
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
 
 class Click(Base):
     __tablename__ = "clicks"
+    __table_args__ = (
+        Index("ix_clicks_link_id_timestamp", "link_id", "timestamp"),
+        # Append-only, so a BRIN index covers time-range scans cheaply
+        Index("ix_clicks_timestamp_brin", "timestamp", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     link_id = Column(UUID(as_uuid=True), ForeignKey("links.id"))
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=func.now())
     ip_address = Column(String)
     user_agent = Column(String)
 
@@ -66,9 +88,82 @@ class Variant(Base):
 
 class Assignment(Base):
     __tablename__ = "assignments"
+    __table_args__ = (
+        # One assignment per user and experiment (INSERT ... ON CONFLICT DO NOTHING)
+        UniqueConstraint("user_id", "experiment_id", name="uq_assignments_user_experiment"),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"))
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), index=True)
     experiment_id = Column(UUID(as_uuid=True), ForeignKey("experiments.id"))
-    variant_id = Column(UUID(as_uuid=True), ForeignKey("variants.id"))
-    assigned_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    variant_id = Column(UUID(as_uuid=True), ForeignKey("variants.id"), index=True)
+    assigned_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# ---------------------------
+# Rollups (maintained by app.services.rollup_service)
+# ---------------------------
+class DailyUserActivity(Base):
+    __tablename__ = "daily_user_activity"
+
+    day = Column(Date, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+
+
+class DailyLinkClicks(Base):
+    __tablename__ = "daily_link_clicks"
+
+    day = Column(Date, primary_key=True)
+    link_id = Column(UUID(as_uuid=True), primary_key=True, index=True)
+    clicks = Column(BigInteger, nullable=False)
+
+
+class DailyEventCounts(Base):
+    __tablename__ = "daily_event_counts"
+
+    day = Column(Date, primary_key=True)
+    event_type = Column(String, primary_key=True)
+    n = Column(BigInteger, nullable=False)
+
+
+class DailyUserSketch(Base):
+    __tablename__ = "daily_user_sketches"
+
+    day = Column(Date, primary_key=True)
+    precision = Column(SmallInteger, nullable=False)
+    sketch = Column(LargeBinary, nullable=False)  # HyperLogLog registers
+
+
+class RollupWatermark(Base):
+    __tablename__ = "rollup_watermarks"
+
+    name = Column(String, primary_key=True)
+    rolled_up_through = Column(Date, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+# ---------------------------
+# Churn scoring state (maintained by app.services.churn_scoring_service)
+# ---------------------------
+class ChurnFeatures(Base):
+    __tablename__ = "churn_features"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    total_events = Column(BigInteger, nullable=False)
+    last_event_at = Column(DateTime(timezone=True), nullable=True)
+    days_since_last_event = Column(Integer, nullable=False)  # as of the last scoring
+    # When days_since_last_event goes stale (null: never active); aging scans this
+    next_age_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_churn_features_next_age_at", "next_age_at"),
+    )
+
+
+class ChurnWatermark(Base):
+    __tablename__ = "churn_watermarks"
+
+    name = Column(String, primary_key=True)
+    events_through = Column(DateTime(timezone=True), nullable=False)
+    model_version = Column(String, nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
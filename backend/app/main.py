@@ -1,9 +1,11 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
-from app.api.v1 import auth, links, events, analytics
-from app.core.database import Base, engine
+from app.api.v1 import auth, links, events, analytics, debug
+from app.core.database import Base, engine, async_engine
 from app.core.scheduler import start_scheduler
 from app.core.metrics import metrics_middleware, metrics_endpoint
+from app.core.profiling import profiling_middleware, profile_endpoints
+from app.services.click_service import click_buffer
 from sqlalchemy import text
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
@@ -28,10 +30,13 @@ async def lifespan(app: FastAPI):
         raise Exception("Database connection failed after retries.")
 
     start_scheduler()
+    click_buffer.start()
 
     yield
 
-    # Shutdown logic (optional)
+    # Shutdown logic
+    click_buffer.stop()
+    await async_engine.dispose()
     print("Shutting down application.")
 
 app = FastAPI(lifespan=lifespan)
@@ -44,10 +49,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.middleware("http")(metrics_middleware)
+# Outermost, so the admin check it runs isn't counted in request metrics
+app.middleware("http")(profiling_middleware)
 
 app.include_router(auth.router, prefix="/api/v1/auth")
 app.include_router(links.router, prefix="/api/v1/links")
 app.include_router(events.router, prefix="/api/v1/events")
 app.include_router(analytics.router, prefix="/api/v1/analytics")
+app.include_router(debug.router, prefix="/api/v1/debug")
 app.add_api_route("/metrics", metrics_endpoint, methods=["GET"])
+profile_endpoints(app)
 
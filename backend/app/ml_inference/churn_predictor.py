@@ -1,39 +1,137 @@
 import pickle
 import os
+import threading
+from typing import NamedTuple, Optional
 import numpy as np
-import pandas as pd
+from app.ml_inference.compiled_model import LinearModel, compile_model, sigmoid
+from app.ml_inference.model_registry import ModelRegistry, model_registry
 
 BASE_DIR = os.getcwd()
+# Unversioned model from before the registry, served until one is published
 MODEL_PATH = os.path.join(BASE_DIR, "ml", "models", "churn_model.pkl")
 
+PREDICT_ARGUMENTS = ("total_events", "days_since_last_event", "experiment_exposed")
+
+class ServingModel(NamedTuple):
+    version: Optional[str]
+    model: object
+    engine: object
+    scalar_weights: Optional[tuple]
+    metadata: dict
+
+EMPTY_MODEL = ServingModel(None, None, None, None, {})
+
 class ChurnPredictor:
-    def __init__(self):
-        self.model = None
-        self.load_model()
+    def __init__(self, registry: Optional[ModelRegistry] = None, load: bool = True):
+        self.registry = registry or model_registry
+        # Everything a prediction needs, swapped as one reference: a request
+        # reads self._serving once and never mixes two versions
+        self._serving = EMPTY_MODEL
+        self._reload_lock = threading.Lock()
+        if load:
+            self.load_model()
+
+    @property
+    def model(self):
+        return self._serving.model
+
+    @property
+    def engine(self):
+        return self._serving.engine
+
+    @property
+    def version(self):
+        return self._serving.version
+
+    @property
+    def metadata(self):
+        return self._serving.metadata
+
+    def swap(self, model, version: Optional[str] = None, metadata: Optional[dict] = None):
+        # Compile first, then publish with a single assignment
+        engine = compile_model(model)
+        scalar_weights = None
+        if isinstance(engine, LinearModel):
+            scalar_weights = engine.weights_for(PREDICT_ARGUMENTS)
+        self._serving = ServingModel(version, model, engine, scalar_weights, metadata or {})
+
+    def refresh(self) -> bool:
+        # Swap to the registry's current version if it changed; cheap enough to poll
+        version = self.registry.current_version()
+        if version is None or version == self._serving.version:
+            return False
+
+        with self._reload_lock:
+            if version == self._serving.version:
+                return False
+            try:
+                model, metadata = self.registry.load(version)
+            except Exception as e:
+                # Keep serving the previous model
+                print(f"Could not load churn model {version}:", e)
+                return False
+            self.swap(model, version, metadata)
+
+        print(f"Churn model {version} loaded.")
+        return True
 
     def load_model(self):
-        print("Looking for model at:", MODEL_PATH)
+        if self.refresh():
+            return
 
-        if os.path.exists(MODEL_PATH):
+        if self._serving.model is None and os.path.exists(MODEL_PATH):
             with open(MODEL_PATH, "rb") as f:
-                self.model = pickle.load(f)
-            print("Churn model loaded.")
-        else:
+                self.swap(pickle.load(f))
+            print("Churn model loaded from", MODEL_PATH)
+        elif self._serving.model is None:
             print("Churn model not found.")
 
     def predict(self, total_events, days_since_last_event, experiment_exposed = 0):
-        if not self.model:
+        serving = self._serving
+        if not serving.model:
             return None
 
-        X = pd.DataFrame([{
+        if serving.scalar_weights is not None:
+            # Scalar fast path: a 3-term dot product on plain floats
+            w_events, w_days, w_exposed = serving.scalar_weights
+            z = (
+                serving.engine.intercept
+                + w_events * total_events
+                + w_days * days_since_last_event
+                + w_exposed * experiment_exposed
+            )
+            return round(sigmoid(z), 4)
+
+        arguments = dict(zip(PREDICT_ARGUMENTS, (total_events, days_since_last_event, experiment_exposed)))
+        values = [arguments.get(name, 0) for name in serving.engine.feature_names]
+        return round(serving.engine.predict_one(values), 4)
+
+    def predict_many(self, matrix, out=None):
+        # `matrix` columns in self.engine.feature_names order
+        serving = self._serving
+        if not serving.model:
+            return None
+        return serving.engine.predict_many(matrix, out)
+
+    def predict_batch(self, total_events, days_since_last_event, experiment_exposed=None):
+        engine = self._serving.engine
+        if engine is None:
+            return None
+
+        columns = {
             "total_events": total_events,
             "days_since_last_event": days_since_last_event,
             "experiment_exposed": experiment_exposed
-        }])
+        }
+
+        # Same column order / zero-fill as predict()
+        n = len(total_events)
+        X = np.zeros((n, len(engine.feature_names)), dtype=np.float64)
+        for i, name in enumerate(engine.feature_names):
+            if columns.get(name) is not None:
+                X[:, i] = columns[name]
 
-        X = X.reindex(columns=self.model.feature_names_in_, fill_value=0)
-        probability = self.model.predict_proba(X)[0][1]
-        return round(float(probability), 4)
+        return np.round(engine.predict_many(X), 4)
 
 
 # Singleton instance
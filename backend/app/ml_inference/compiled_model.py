@@ -0,0 +1,133 @@
+import math
+import warnings
+import numpy as np
+
+# Feature order used when a model doesn't record feature_names_in_
+DEFAULT_FEATURE_NAMES = ("total_events", "days_since_last_event", "experiment_exposed")
+
+# Max |compiled - sklearn| probability difference accepted at compile time
+VALIDATION_TOLERANCE = 1e-9
+
+def sigmoid(z: float) -> float:
+    # Split on the sign so exp() never overflows
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+class LinearModel:
+    # Binary linear classifier reduced to sigmoid(X @ coef + intercept)
+    def __init__(self, feature_names, coef, intercept: float):
+        self.feature_names = tuple(feature_names)
+        self.coef = np.ascontiguousarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        # Plain floats for the scalar path: no NumPy scalars, no arrays
+        self._weights = tuple(float(w) for w in self.coef)
+
+    def weights_for(self, names):
+        # Weights lined up with `names` (0.0 for features the model doesn't use)
+        lookup = dict(zip(self.feature_names, self._weights))
+        return tuple(lookup.get(name, 0.0) for name in names)
+
+    def predict_one(self, values) -> float:
+        z = self.intercept
+        for w, x in zip(self._weights, values):
+            z += w * x
+        return sigmoid(z)
+
+    def predict_many(self, matrix, out=None):
+        # `matrix` is (n, n_features) in feature_names order; pass `out`
+        # (float64, length n) to score without allocating
+        matrix = np.asarray(matrix, dtype=np.float64)
+        out = np.dot(matrix, self.coef, out=out)
+        out += self.intercept
+        with np.errstate(over="ignore"):
+            np.negative(out, out=out)
+            np.exp(out, out=out)
+        out += 1.0
+        np.reciprocal(out, out=out)
+        return out
+
+
+class SklearnModel:
+    # Fallback for models that can't be compiled: predict_proba on a matrix
+    def __init__(self, feature_names, model):
+        self.feature_names = tuple(feature_names)
+        self.model = model
+
+    def predict_one(self, values) -> float:
+        return float(self.predict_many(np.asarray([values], dtype=np.float64))[0])
+
+    def predict_many(self, matrix, out=None):
+        with warnings.catch_warnings():
+            # Model was fitted on a DataFrame; a bare matrix triggers a feature-name warning
+            warnings.simplefilter("ignore", UserWarning)
+            probabilities = self.model.predict_proba(np.asarray(matrix, dtype=np.float64))[:, 1]
+        if out is None:
+            return probabilities
+        out[:] = probabilities
+        return out
+
+def _feature_names(model):
+    names = getattr(model, "feature_names_in_", None)
+    if names is not None:
+        return [str(name) for name in names]
+    return list(DEFAULT_FEATURE_NAMES[:model.n_features_in_])
+
+def _linear_parameters(model):
+    # (coef, intercept) of sigmoid(X @ coef + intercept), or None
+    steps = [step for _, step in model.steps] if hasattr(model, "steps") else [model]
+    *transforms, estimator = steps
+
+    coef = getattr(estimator, "coef_", None)
+    intercept = getattr(estimator, "intercept_", None)
+    classes = getattr(estimator, "classes_", None)
+    if coef is None or intercept is None or classes is None or len(classes) != 2:
+        return None
+    if not hasattr(estimator, "predict_proba"):
+        return None
+    # SGDClassifier: only the log loss gives logistic probabilities
+    if getattr(estimator, "loss", "log_loss") not in ("log_loss", "log"):
+        return None
+
+    coef = np.asarray(coef, dtype=np.float64).ravel()
+    intercept = float(np.ravel(intercept)[0])
+
+    # Fold standardization into the weights: w . (x - mean) / scale
+    for transform in reversed(transforms):
+        if transform == "passthrough" or transform is None:
+            continue
+        if not (hasattr(transform, "mean_") and hasattr(transform, "scale_")):
+            return None
+        if transform.scale_ is not None:
+            coef = coef / transform.scale_
+        if transform.mean_ is not None:
+            intercept -= float(np.dot(coef, transform.mean_))
+
+    return coef, intercept
+
+def _probe_matrix(n_features: int):
+    rng = np.random.default_rng(0)
+    probe = rng.exponential(20.0, size=(256, n_features))
+    probe[:8] = 0.0
+    probe[8:16] = 999.0
+    return probe
+
+def compile_model(model, tolerance: float = VALIDATION_TOLERANCE):
+    # LinearModel when the model reduces to a logistic function of X and the
+    # result matches sklearn's predict_proba on a probe batch; else SklearnModel
+    feature_names = _feature_names(model)
+    parameters = _linear_parameters(model)
+    if parameters is None:
+        return SklearnModel(feature_names, model)
+
+    compiled = LinearModel(feature_names, *parameters)
+
+    probe = _probe_matrix(len(feature_names))
+    expected = SklearnModel(feature_names, model).predict_many(probe)
+    if not np.allclose(compiled.predict_many(probe), expected, rtol=0, atol=tolerance):
+        print("Compiled churn model disagrees with sklearn, using predict_proba.")
+        return SklearnModel(feature_names, model)
+
+    return compiled
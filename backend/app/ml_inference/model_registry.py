@@ -0,0 +1,108 @@
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timezone
+from app.core.config import settings
+
+# <root>/<version>/{model.pkl,metadata.json}, plus a CURRENT file naming the
+# version being served. Versions are immutable once published; switching
+# versions is a single rename of CURRENT, so readers see the old or the new
+# version, never a partial one.
+MODEL_FILE = "model.pkl"
+METADATA_FILE = "metadata.json"
+CURRENT_FILE = "CURRENT"
+
+
+def _write_atomic(path: str, data: bytes):
+    directory = os.path.dirname(path)
+    fd, partial = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(partial, 0o644)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+
+class ModelRegistry:
+    def __init__(self, root: str, keep: int = 5):
+        self.root = root
+        self.keep = keep
+
+    def _path(self, version: str, name: str = "") -> str:
+        return os.path.join(self.root, version, name)
+
+    def versions(self):
+        # Published versions, oldest first (names sort by publish time)
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            name for name in os.listdir(self.root)
+            if not name.startswith(".") and os.path.isfile(self._path(name, METADATA_FILE))
+        )
+
+    def current_version(self):
+        try:
+            with open(os.path.join(self.root, CURRENT_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def metadata(self, version: str) -> dict:
+        with open(self._path(version, METADATA_FILE)) as f:
+            return json.load(f)
+
+    def load(self, version: str):
+        with open(self._path(version, MODEL_FILE), "rb") as f:
+            model = pickle.load(f)
+        return model, self.metadata(version)
+
+    def publish(self, model, metadata: dict, activate: bool = True) -> str:
+        os.makedirs(self.root, exist_ok=True)
+
+        now = datetime.now(timezone.utc)
+        version = f"{now:%Y%m%dT%H%M%S.%f}-{uuid.uuid4().hex[:6]}"
+        metadata = {**metadata, "version": version, "published_at": now.isoformat()}
+
+        # Built in a hidden staging directory, then renamed into place whole
+        staging = tempfile.mkdtemp(dir=self.root, prefix=".staging-")
+        try:
+            with open(os.path.join(staging, MODEL_FILE), "wb") as f:
+                pickle.dump(model, f)
+            with open(os.path.join(staging, METADATA_FILE), "w") as f:
+                json.dump(metadata, f, indent=2, default=str)
+            # mkdtemp is owner-only; other serving users need to read it
+            os.chmod(staging, 0o755)
+            os.rename(staging, self._path(version))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if activate:
+            self.activate(version)
+        self.prune()
+        return version
+
+    def activate(self, version: str):
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+        _write_atomic(os.path.join(self.root, CURRENT_FILE), version.encode())
+
+    def prune(self):
+        # Oldest versions beyond `keep` go; the current one always stays
+        current = self.current_version()
+        removable = [v for v in self.versions() if v != current]
+        excess = len(removable) - max(self.keep - 1, 0)
+        for version in removable[:max(excess, 0)]:
+            shutil.rmtree(self._path(version), ignore_errors=True)
+
+
+model_registry = ModelRegistry(settings.MODEL_REGISTRY_DIR, settings.MODEL_REGISTRY_KEEP)
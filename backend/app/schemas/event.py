@@ -0,0 +1,8 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class EventCreate(BaseModel):
+    event_type: str = Field(min_length=1)
+    metadata: dict = {}
+    timestamp: Optional[datetime] = None
@@ -1,167 +1,388 @@
-import random
-import uuid
+"""Synthetic users, events, links, clicks and experiment assignments, COPY'd
+straight into Postgres.
+
+Work is split into fixed-size chunks: a chunk of users (with their
+assignments and events) or a chunk of links (with their clicks). Each chunk
+draws from its own RNG seeded with (--seed, kind, chunk) and every id is a
+function of (--seed, table, row index), so the output is the same whatever
+the number of workers. Chunks are generated and loaded by a pool of worker
+processes, each over its own connection; users load before links, which
+reference them.
+
+Shape of the data:
+- signups grow over the history window
+- lifetimes are Weibull with shape < 1: many users churn within days, and
+  the longer a user stays the less likely they are to leave
+- activity per user is lognormal (a few heavy users, a long quiet tail);
+  events fall in the user's active window, so churned users go silent
+- link popularity is Pareto; clicks fall between the link's creation and now
+- button_test: variant B converts better than A; variants come from the same
+  hash buckets the API assigns with
+
+    cd backend && python -m app.scripts.seed_data --users 10000000 --workers 8 --truncate
+"""
+import argparse
+import io
+import multiprocessing
 import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from typing import NamedTuple, Optional
 
-from app.infrastructure.database.models import (
-    User,
-    Event,
-    Link,
-    Click,
-    Experiment,
-    Variant,
-    Assignment
-)
+import numpy as np
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+EXPERIMENT = "button_test"
+VARIANTS = (("A", 50, 0.08), ("B", 50, 0.15))  # name, traffic %, conversion rate
 
-engine = create_engine(DATABASE_URL)  # type: ignore
-Session = sessionmaker(bind=engine)
-db = Session()
+EVENT_TYPES = np.array(["login", "page_view", "feature_use"])
+EVENT_TYPE_WEIGHTS = [0.3, 0.45, 0.25]
+EVENT_DATA = '{"source": "seed"}'
+CONVERSION_DATA = '{"experiment": "%s"}' % EXPERIMENT
+USER_AGENTS = np.array([
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4)",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X)",
+    "Mozilla/5.0 (Linux; Android 14)",
+    "curl/8.5.0",
+])
 
-NOW = datetime.now(timezone.utc)
+SIGNUP_GROWTH = 1.5  # > 1: more signups towards the end of the window
+LIFETIME_SHAPE = 0.5  # Weibull shape < 1: decreasing churn hazard
+LIFETIME_SCALE_DAYS = 30.0
+ACTIVITY_SIGMA = 1.2  # lognormal spread of per-user activity
+LINK_POPULARITY_ALPHA = 1.2  # Pareto tail of clicks per link
+COPY_BATCH_ROWS = 250_000
 
-# ---------------------------
-# Helper: realistic churn shaping
-# ---------------------------
-def generate_user_profile():
-    bucket = random.random()
+DAY_US = 86_400 * 1_000_000
 
-    if bucket < 0.3:  # high churn risk
-        total_events = random.randint(1, 5)
-        days_since_last = random.randint(10, 20)
-    elif bucket < 0.8:  # medium
-        total_events = random.randint(6, 20)
-        days_since_last = random.randint(3, 9)
-    else:  # healthy
-        total_events = random.randint(20, 50)
-        days_since_last = random.randint(0, 2)
+# Salts keep ids of different tables (and of short codes) apart
+_TABLE_KEYS = {"users": 1, "events": 2, "links": 3, "clicks": 4, "assignments": 5,
+               "experiments": 6, "variants": 7, "short_codes": 8}
+_KIND_KEYS = {"users": 1, "links": 2}
+_HEX = np.array([f"{i:02x}".encode() for i in range(256)], dtype="S2")
 
-    return total_events, days_since_last
 
+class GeneratorConfig(NamedTuple):
+    users: int = 500
+    events_per_user: float = 15.0
+    links_per_user: float = 0.04
+    clicks_per_link: float = 60.0
+    experiment_share: float = 1.0
+    days: int = 30
+    seed: int = 42
+    chunk_size: int = 20_000
+    now_us: Optional[int] = None  # end of the window, epoch microseconds
 
-# ---------------------------
-# Create Users
-# ---------------------------
-users = []
-for i in range(500):
-    created_days_ago = random.randint(0, 30)
-    user = User(
-        email=f"user{i}@test.com",
-        password_hash="fakehash",
-        created_at=NOW - timedelta(days=created_days_ago)
-    )
-    db.add(user)
-    users.append(user)
+    @property
+    def links(self) -> int:
+        return int(round(self.users * self.links_per_user))
 
-db.commit()
 
 # ---------------------------
-# Create Links (20 total)
+# Deterministic ids
 # ---------------------------
-links = []
-for i in range(20):
-    owner = random.choice(users)
-    link = Link(
-        original_url="https://example.com/product",
-        short_code=str(uuid.uuid4())[:6],
-        user_id=owner.id
-    )
-    db.add(link)
-    links.append(link)
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    # Bijective 64-bit mixer: distinct inputs give distinct outputs
+    with np.errstate(over="ignore"):
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
 
-db.commit()
+def _mix(seed: int, table: str, index: np.ndarray) -> np.ndarray:
+    salt = np.uint64(((_TABLE_KEYS[table] << 56) ^ (seed * 0x100000001B3)) & 0xFFFFFFFFFFFFFFFF)
+    return _splitmix64(index.astype(np.uint64) ^ salt)
+
+def row_ids(seed: int, table: str, index: np.ndarray) -> np.ndarray:
+    # Random-looking version 4 UUIDs as 32 hex digits (Postgres accepts the
+    # unhyphenated form), unique per (table, index) for index < 2**56
+    hi = _mix(seed, table, index)
+    with np.errstate(over="ignore"):
+        lo = _splitmix64(hi + np.uint64(0x632BE59BD9B4E019))
+    hi = (hi & ~np.uint64(0xF000)) | np.uint64(0x4000)
+    lo = (lo & ~np.uint64(0xC000000000000000)) | np.uint64(0x8000000000000000)
+    raw = np.stack([hi, lo], axis=1).astype(">u8").view(np.uint8).reshape(-1, 16)
+    return _HEX[raw].view("S32").ravel().astype("U32")
+
+def row_id(seed: int, table: str, index: int) -> uuid.UUID:
+    return uuid.UUID(hex=str(row_ids(seed, table, np.array([index]))[0]))
+
+def chunk_rng(config: GeneratorConfig, kind: str, chunk: int) -> np.random.Generator:
+    return np.random.default_rng([config.seed, _KIND_KEYS[kind], chunk])
+
+def _timestamps(us: np.ndarray) -> np.ndarray:
+    return np.datetime_as_string(us.astype("datetime64[us]"), unit="us")
+
+def _event_index(chunk: int, n: int) -> np.ndarray:
+    # Row indices unique across chunks without knowing other chunks' sizes
+    return (np.uint64(chunk) << np.uint64(32)) + np.arange(n, dtype=np.uint64)
 
-# ---------------------------
-# Create Experiment + Variants
-# ---------------------------
-experiment = Experiment(
-    name="button_test",
-    is_active=True
-)
-db.add(experiment)
-db.commit()
-
-variant_a = Variant(
-    experiment_id=experiment.id,
-    name="A",
-    traffic_percentage=50
-)
-
-variant_b = Variant(
-    experiment_id=experiment.id,
-    name="B",
-    traffic_percentage=50
-)
-
-db.add_all([variant_a, variant_b])
-db.commit()
 
 # ---------------------------
-# Assign Users + Create Events
+# Chunk generators: {table: (columns, rows as COPY text lines)}
 # ---------------------------
-for user in users:
-    total_events, days_since_last = generate_user_profile()
-
-    # Assign experiment variant (sticky random)
-    assigned_variant = random.choice([variant_a, variant_b])
-    assignment = Assignment(
-        user_id=user.id,
-        experiment_id=experiment.id,
-        variant_id=assigned_variant.id
-    )
-    db.add(assignment)
-
-    # Behavioral events
-    for _ in range(total_events):
-        days_ago = random.randint(0, 30)
-        event_type = random.choice(["login", "page_view", "feature_use"])
-
-        event = Event(
-            user_id=user.id,
-            event_type=event_type,
-            event_data={"source": "seed"},
-            timestamp=NOW - timedelta(days=days_ago)
-        )
-        db.add(event)
-
-    # Experiment conversion (Variant B wins intentionally)
-    if assigned_variant.name == "A": # type: ignore
-        convert_prob = 0.08
-    else:
-        convert_prob = 0.15
+def experiment_config(seed: int):
+    from app.services.experiment_service import ASSIGNMENT_BUCKETS, ExperimentConfig
+
+    variants = []
+    upper = 0
+    for i, (_, traffic, _) in enumerate(VARIANTS):
+        upper += traffic * ASSIGNMENT_BUCKETS // 100
+        variants.append((row_id(seed, "variants", i), upper))
+    return ExperimentConfig(row_id(seed, "experiments", 0), tuple(variants))
+
+def user_chunk(config: GeneratorConfig, chunk: int) -> dict:
+    from app.services.experiment_service import assignment_bucket, choose_variant
+
+    rng = chunk_rng(config, "users", chunk)
+    start = chunk * config.chunk_size
+    n = min(config.chunk_size, config.users - start)
+    index = np.arange(start, start + n)
+    now = config.now_us
+    history = config.days * DAY_US
+
+    user_ids = row_ids(config.seed, "users", index)
+    created = now - (history * rng.random(n) ** SIGNUP_GROWTH).astype(np.int64)
+
+    # Active from signup until churn (or now)
+    lifetime = (rng.weibull(LIFETIME_SHAPE, n) * LIFETIME_SCALE_DAYS * DAY_US).astype(np.int64)
+    active_end = np.minimum(now, created + lifetime)
+    active = active_end - created
+
+    # Heavy-tailed activity, scaled so the chunk averages events_per_user
+    rate = rng.lognormal(0.0, ACTIVITY_SIGMA, n) * (active / DAY_US + 1)
+    rate *= config.events_per_user * n / rate.sum()
+    owner = np.repeat(np.arange(n), rng.poisson(rate))
+    event_time = created[owner] + (rng.random(len(owner)) * active[owner]).astype(np.int64)
+    event_type = EVENT_TYPES[rng.choice(len(EVENT_TYPES), len(owner), p=EVENT_TYPE_WEIGHTS)]
+    event_data = np.full(len(owner), EVENT_DATA, dtype=object)
+
+    # Experiment: sticky hash buckets, conversions inside the active window
+    experiment = experiment_config(config.seed)
+    conversion_rates = {variant_id: rate for (variant_id, _), (_, _, rate) in zip(experiment.variants, VARIANTS)}
+    assigned = np.flatnonzero(rng.random(n) < config.experiment_share)
+    variant_ids = [
+        choose_variant(experiment, assignment_bucket(EXPERIMENT, uuid.UUID(hex=user_ids[i])))
+        for i in assigned
+    ]
+    assigned_at = created[assigned] + (rng.random(len(assigned)) * np.minimum(active[assigned], DAY_US)).astype(np.int64)
+    converts = rng.random(len(assigned)) < np.array([conversion_rates[v] for v in variant_ids])
+    converted = assigned[converts]
+    conversion_time = assigned_at[converts] + (rng.random(len(converted)) * (active_end[converted] - assigned_at[converts])).astype(np.int64)
 
-    if random.random() < convert_prob:
-        conversion = Event(
-            user_id=user.id,
-            event_type="experiment_conversion",
-            event_data={"experiment": "button_test"},
-            timestamp=NOW - timedelta(days=random.randint(0, 10))
-        )
-        db.add(conversion)
+    owner = np.concatenate([owner, converted])
+    event_time = np.concatenate([event_time, conversion_time])
+    event_type = np.concatenate([event_type, np.full(len(converted), "experiment_conversion")])
+    event_data = np.concatenate([event_data, np.full(len(converted), CONVERSION_DATA, dtype=object)])
+    event_ids = row_ids(config.seed, "events", _event_index(chunk, len(owner)))
+
+    return {
+        "users": (
+            ["id", "email", "password_hash", "created_at"],
+            [f"{user_id}\tuser{i}@test.com\tfakehash\t{ts}+00\n"
+             for user_id, i, ts in zip(user_ids.tolist(), index.tolist(), _timestamps(created).tolist())]
+        ),
+        "assignments": (
+            ["id", "user_id", "experiment_id", "variant_id", "assigned_at"],
+            [f"{assignment_id}\t{user_ids[i]}\t{experiment.id}\t{variant_id}\t{ts}+00\n"
+             for assignment_id, i, variant_id, ts in zip(
+                 row_ids(config.seed, "assignments", index[assigned]).tolist(),
+                 assigned.tolist(), variant_ids, _timestamps(assigned_at).tolist())]
+        ),
+        "events": (
+            ["id", "user_id", "event_type", "event_data", '"timestamp"'],
+            [f"{event_id}\t{user_id}\t{kind}\t{data}\t{ts}+00\n"
+             for event_id, user_id, kind, data, ts in zip(
+                 event_ids.tolist(), user_ids[owner].tolist(), event_type.tolist(),
+                 event_data.tolist(), _timestamps(event_time).tolist())]
+        ),
+    }
+
+def link_chunk(config: GeneratorConfig, chunk: int) -> dict:
+    rng = chunk_rng(config, "links", chunk)
+    start = chunk * config.chunk_size
+    n = min(config.chunk_size, config.links - start)
+    index = np.arange(start, start + n)
+    now = config.now_us
+
+    link_ids = row_ids(config.seed, "links", index)
+    owners = row_ids(config.seed, "users", rng.integers(0, config.users, n))
+    short_codes = _mix(config.seed, "short_codes", index)
+    created = now - (config.days * DAY_US * rng.random(n) ** SIGNUP_GROWTH).astype(np.int64)
+
+    # Pareto popularity, scaled so the chunk averages clicks_per_link
+    popularity = rng.pareto(LINK_POPULARITY_ALPHA, n) + 1
+    popularity *= config.clicks_per_link * n / popularity.sum()
+    link = np.repeat(np.arange(n), rng.poisson(popularity))
+    click_time = created[link] + (rng.random(len(link)) * (now - created[link])).astype(np.int64)
+    ips = rng.integers(0, 2**24, len(link))
+    agents = USER_AGENTS[rng.integers(0, len(USER_AGENTS), len(link))]
+
+    return {
+        "links": (
+            ["id", "original_url", "short_code", "user_id"],
+            [f"{link_id}\thttps://example.com/product/{i}\t{code:x}\t{owner}\n"
+             for link_id, i, code, owner in zip(link_ids.tolist(), index.tolist(), short_codes.tolist(), owners.tolist())]
+        ),
+        "clicks": (
+            ["id", "link_id", '"timestamp"', "ip_address", "user_agent"],
+            [f"{click_id}\t{link_id}\t{ts}+00\t10.{ip >> 16}.{(ip >> 8) & 255}.{ip & 255}\t{agent}\n"
+             for click_id, link_id, ts, ip, agent in zip(
+                 row_ids(config.seed, "clicks", _event_index(chunk, len(link))).tolist(),
+                 link_ids[link].tolist(), _timestamps(click_time).tolist(), ips.tolist(), agents.tolist())]
+        ),
+    }
+
+_GENERATORS = {"users": user_chunk, "links": link_chunk}
 
-db.commit()
 
 # ---------------------------
-# Create Clicks (traffic skew)
+# Loading
 # ---------------------------
-for link in links:
-    if links.index(link) < 3:
-        click_volume = random.randint(200, 400)
+def _copy_lines(db, table: str, columns, lines):
+    # Rows are already COPY text; same cursor as copy_rows, minus per-value escaping
+    cursor = db.connection().connection.cursor()
+    try:
+        for start in range(0, len(lines), COPY_BATCH_ROWS):
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(columns)}) FROM STDIN",
+                io.StringIO("".join(lines[start:start + COPY_BATCH_ROWS]))
+            )
+    finally:
+        cursor.close()
+
+def load_chunk(config: GeneratorConfig, kind: str, chunk: int) -> dict:
+    # One chunk, one transaction: parents first, then the rows referencing them
+    from sqlalchemy import text
+    from app.core.database import SessionLocal
+
+    tables = _GENERATORS[kind](config, chunk)
+    with SessionLocal() as db:
+        db.execute(text("SET LOCAL synchronous_commit TO off"))
+        for table, (columns, lines) in tables.items():
+            _copy_lines(db, table, columns, lines)
+        db.commit()
+    return {table: len(lines) for table, (_, lines) in tables.items()}
+
+def prepare_database(config: GeneratorConfig, truncate: bool = False):
+    from sqlalchemy import text
+    from app.core.database import SessionLocal
+    from app.infrastructure.database.models import Experiment, Variant
+    from app.services.partition_service import PARTITIONED_TABLES, add_months, create_partition
+
+    with SessionLocal() as db:
+        if truncate:
+            db.execute(text(
+                "TRUNCATE users, links, events, clicks, experiments, variants, assignments, "
+                "daily_user_activity, daily_link_clicks, daily_event_counts, daily_user_sketches, "
+                "rollup_watermarks, churn_features, churn_watermarks CASCADE"
+            ))
+
+        # Monthly partitions for the history window (migrations only create future ones)
+        now = datetime.fromtimestamp(config.now_us / 1e6, timezone.utc)
+        month = (now - timedelta(days=config.days)).date().replace(day=1)
+        while month <= now.date():
+            for table in PARTITIONED_TABLES:
+                create_partition(db, table, month)
+            month = add_months(month, 1)
+
+        experiment = experiment_config(config.seed)
+        db.add(Experiment(id=experiment.id, name=EXPERIMENT, is_active=True))
+        db.flush()
+        db.add_all([
+            Variant(id=variant_id, experiment_id=experiment.id, name=name, traffic_percentage=traffic)
+            for (variant_id, _), (name, traffic, _) in zip(experiment.variants, VARIANTS)
+        ])
+        db.commit()
+
+def generate(config: GeneratorConfig, workers: int = 1, truncate: bool = False, progress=None) -> dict:
+    if config.now_us is None:
+        config = config._replace(now_us=int(time.time()) * 1_000_000)
+
+    prepare_database(config, truncate)
+
+    totals = {}
+    phases = [
+        ("users", -(-config.users // config.chunk_size)),
+        ("links", -(-config.links // config.chunk_size)),
+    ]
+
+    def collect(counts):
+        for table, n in counts.items():
+            totals[table] = totals.get(table, 0) + n
+        if progress:
+            progress(totals)
+
+    if workers <= 1:
+        for kind, chunks in phases:
+            for chunk in range(chunks):
+                collect(load_chunk(config, kind, chunk))
     else:
-        click_volume = random.randint(20, 80)
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(method)) as pool:
+            # Links reference users: one phase at a time
+            for kind, chunks in phases:
+                for counts in pool.map(load_chunk, [config] * chunks, [kind] * chunks, range(chunks)):
+                    collect(counts)
+
+    from sqlalchemy import text
+    from app.core.database import engine
+
+    with engine.connect() as conn:
+        conn.execute(text("ANALYZE"))
+        conn.commit()
+
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    defaults = GeneratorConfig()
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--events-per-user", type=float, default=defaults.events_per_user, help="Mean events per user")
+    parser.add_argument("--links-per-user", type=float, default=defaults.links_per_user)
+    parser.add_argument("--clicks-per-link", type=float, default=defaults.clicks_per_link, help="Mean clicks per link")
+    parser.add_argument("--experiment-share", type=float, default=defaults.experiment_share,
+                        help=f"Fraction of users assigned to {EXPERIMENT}")
+    parser.add_argument("--days", type=int, default=defaults.days, help="History window")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--now", type=datetime.fromisoformat,
+                        help="End of the window (ISO timestamp, default now): fix it to reproduce a run exactly")
+    parser.add_argument("--chunk-size", type=int, default=defaults.chunk_size, help="Users or links per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--truncate", action="store_true", help="Empty the seeded and derived tables first")
+    args = parser.parse_args()
+
+    now_us = None
+    if args.now:
+        now = args.now if args.now.tzinfo else args.now.replace(tzinfo=timezone.utc)
+        now_us = int(now.timestamp() * 1_000_000)
+
+    config = GeneratorConfig(
+        users=args.users,
+        events_per_user=args.events_per_user,
+        links_per_user=args.links_per_user,
+        clicks_per_link=args.clicks_per_link,
+        experiment_share=args.experiment_share,
+        days=args.days,
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        now_us=now_us,
+    )
+
+    started = time.perf_counter()
+
+    def progress(totals):
+        rows = sum(totals.values())
+        print(f"{rows:,} rows in {time.perf_counter() - started:.1f}s:", totals)
 
-    for _ in range(click_volume):
-        click = Click(
-            link_id=link.id,
-            ip_address="127.0.0.1",
-            user_agent="seed-script",
-            timestamp=NOW - timedelta(days=random.randint(0, 30))
-        )
-        db.add(click)
+    totals = generate(config, args.workers, args.truncate, progress)
+    elapsed = time.perf_counter() - started
+    print(f"🚀 Seed data created: {sum(totals.values()):,} rows in {elapsed:.1f}s "
+          f"({sum(totals.values()) / elapsed:,.0f} rows/s)")
 
-db.commit()
 
-print("🚀 Seed data created successfully.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
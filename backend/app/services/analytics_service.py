@@ -1,58 +1,166 @@
-from collections import defaultdict
+from typing import Optional
+import time
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, cast, Date
+from sqlalchemy import func, cast, and_, true, exists, extract, select, union_all, BigInteger, Date, Integer
 from datetime import date, timedelta, datetime, timezone
 from app.infrastructure.database.models import Event, Click, Link, User, Assignment
+from app.infrastructure.database.models import DailyUserActivity, DailyLinkClicks, DailyEventCounts
+from app.services.rollup_service import live_tail_start
+from app.services.sketch_service import active_users_sketch
 
-def get_daily_active_users(db: Session):
-    today = date.today()
+def get_approx_active_users(db: Session, start_day: date, end_day: date):
+    # HyperLogLog estimate of distinct active users over whole days [start_day, end_day]
+    sketch = active_users_sketch(db, start_day, end_day, live_tail_start(db))
+    return sketch.count()
 
-    dau = (
-        db.query(func.count(func.distinct(Event.user_id)))
-        .filter(func.date(Event.timestamp) == today)
-        .scalar()
-    )
+def get_daily_active_users(db: Session, day: Optional[date] = None, approx: bool = False):
+    day = day or date.today()
+
+    if approx:
+        return get_approx_active_users(db, day, day)
+
+    tail_start = live_tail_start(db)
+
+    # Closed days come from the rollup, today (and anything after the watermark) from events
+    if tail_start and day < tail_start:
+        dau = (
+            db.query(func.count())
+            .filter(DailyUserActivity.day == day)
+            .scalar()
+        )
+    else:
+        dau = (
+            db.query(func.count(func.distinct(Event.user_id)))
+            .filter(
+                Event.timestamp >= day,
+                Event.timestamp < day + timedelta(days=1)
+            )
+            .scalar()
+        )
 
     return dau or 0
 
 def get_click_count_for_link(db: Session, link_id):
-    return (
-        db.query(func.count(Click.id))
-        .filter(Click.link_id == link_id)
-        .scalar()
-    ) or 0
+    tail_start = live_tail_start(db)
+
+    live_clicks = db.query(func.count(Click.id)).filter(Click.link_id == link_id)
+    rolled_up_clicks = 0
+
+    if tail_start:
+        live_clicks = live_clicks.filter(Click.timestamp >= tail_start)
+        rolled_up_clicks = (
+            db.query(func.sum(DailyLinkClicks.clicks))
+            .filter(
+                DailyLinkClicks.link_id == link_id,
+                DailyLinkClicks.day < tail_start
+            )
+            .scalar()
+        ) or 0
+
+    return int(rolled_up_clicks) + (live_clicks.scalar() or 0)
 
 def get_top_links(db: Session, limit: int = 5):
+    tail_start = live_tail_start(db)
+
+    link_clicks = (
+        select(Click.link_id, func.count(Click.id).label("clicks"))
+        .group_by(Click.link_id)
+    )
+
+    if tail_start:
+        link_clicks = union_all(
+            select(DailyLinkClicks.link_id, DailyLinkClicks.clicks)
+            .where(DailyLinkClicks.day < tail_start),
+            link_clicks.where(Click.timestamp >= tail_start)
+        )
+
+    link_clicks = link_clicks.subquery()
+    click_count = cast(func.sum(link_clicks.c.clicks), BigInteger)
+
     return (
         db.query(
             Link.short_code,
-            func.count(Click.id).label("click_count")
+            click_count.label("click_count")
         )
-        .join(Click, Click.link_id == Link.id)
+        .join(link_clicks, link_clicks.c.link_id == Link.id)
         .group_by(Link.short_code)
-        .order_by(func.count(Click.id).desc())
+        .order_by(click_count.desc())
         .limit(limit)
         .all()
     )
 
 def get_clicks_by_day(db: Session):
-    return (
-        db.query(
-            cast(Click.timestamp, Date).label("date"),
-            func.count(Click.id).label("clicks")
+    tail_start = live_tail_start(db)
+
+    rolled_up = []
+    live = db.query(
+        cast(Click.timestamp, Date).label("date"),
+        func.count(Click.id).label("clicks")
+    )
+
+    if tail_start:
+        rolled_up = (
+            db.query(
+                DailyLinkClicks.day.label("date"),
+                cast(func.sum(DailyLinkClicks.clicks), BigInteger).label("clicks")
+            )
+            .filter(DailyLinkClicks.day < tail_start)
+            .group_by(DailyLinkClicks.day)
+            .order_by(DailyLinkClicks.day)
+            .all()
         )
-        .group_by(cast(Click.timestamp, Date))
+        live = live.filter(Click.timestamp >= tail_start)
+
+    live = (
+        live.group_by(cast(Click.timestamp, Date))
         .order_by(cast(Click.timestamp, Date))
         .all()
     )
 
+    return rolled_up + live
+
+def get_event_counts_by_day(db: Session):
+    tail_start = live_tail_start(db)
+
+    rolled_up = []
+    live = db.query(
+        cast(Event.timestamp, Date).label("date"),
+        Event.event_type,
+        func.count(Event.id).label("events")
+    )
+
+    if tail_start:
+        rolled_up = (
+            db.query(DailyEventCounts.day, DailyEventCounts.event_type, DailyEventCounts.n)
+            .filter(DailyEventCounts.day < tail_start)
+            .order_by(DailyEventCounts.day, DailyEventCounts.event_type)
+            .all()
+        )
+        live = live.filter(Event.timestamp >= tail_start)
+
+    live = (
+        live.filter(Event.event_type.isnot(None))
+        .group_by(cast(Event.timestamp, Date), Event.event_type)
+        .order_by(cast(Event.timestamp, Date), Event.event_type)
+        .all()
+    )
+
+    return rolled_up + live
+
 def get_day1_retention(db: Session):
-    # Users who signed up yesterday
-    yesterday = func.current_date() - timedelta(days=1)
+    # Half-open day ranges keep the timestamp indexes usable
+    today = func.current_date()
+    yesterday = today - 1
+    tomorrow = today + 1
 
+    # Users who signed up yesterday
     cohort_select = (
         db.query(User.id)
-        .filter(func.date(User.created_at) == yesterday)
+        .filter(
+            User.created_at >= yesterday,
+            User.created_at < today
+        )
     )
 
     # Users from that cohort who were active today
@@ -60,7 +168,8 @@ def get_day1_retention(db: Session):
         db.query(func.count(func.distinct(Event.user_id)))
         .filter(
             Event.user_id.in_(cohort_select),
-            func.date(Event.timestamp) == func.current_date()
+            Event.timestamp >= today,
+            Event.timestamp < tomorrow
         )
         .scalar()
     )
@@ -73,8 +182,13 @@ def get_day1_retention(db: Session):
 
     return round((retained_users / total_cohort) * 100, 2)
 
-def get_rolling_dau(db: Session, days: int = 7):
-    cutoff = datetime.utcnow() - timedelta(days=days)
+def get_rolling_dau(db: Session, days: int = 7, approx: bool = False):
+    if approx:
+        # Day-aligned window: the last `days` calendar days including today
+        today = date.today()
+        return get_approx_active_users(db, today - timedelta(days=days - 1), today)
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
 
     count = (
         db.query(func.count(func.distinct(Event.user_id)))
@@ -84,8 +198,11 @@ def get_rolling_dau(db: Session, days: int = 7):
 
     return count or 0
 
-def get_mau(db: Session):
-    cutoff = datetime.utcnow() - timedelta(days=30)
+def get_mau(db: Session, approx: bool = False):
+    if approx:
+        return get_rolling_dau(db, 30, approx=True)
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=30)
 
     return (
         db.query(func.count(func.distinct(Event.user_id)))
@@ -93,38 +210,98 @@ def get_mau(db: Session):
         .scalar()
     ) or 0
 
-def get_cohort_retention(db: Session, max_days: int = 7):
-    # Step 1: Fetch users grouped by signup date
-    users = db.query(User.id, func.date(User.created_at)).all()
+COHORT_GRANULARITIES = ("day", "week", "month")
+
+def _cohort_window(granularity: str, periods: int):
+    # Interval covering `periods` cohort periods (make_interval(years, months, weeks, days))
+    if granularity == "month":
+        return func.make_interval(0, periods)
+    if granularity == "week":
+        return func.make_interval(0, 0, periods)
+    return func.make_interval(0, 0, 0, periods)
+
+def _cohort_period_offset(granularity: str, cohort, timestamp):
+    # Number of whole cohort periods between the cohort start and an event
+    if granularity == "month":
+        return cast(
+            (extract("year", timestamp) - extract("year", cohort)) * 12
+            + extract("month", timestamp) - extract("month", cohort),
+            Integer
+        )
+    if granularity == "week":
+        return (cast(func.date_trunc("week", timestamp), Date) - cast(cohort, Date)) / 7
+    return cast(timestamp, Date) - cast(cohort, Date)
+
+def get_cohort_retention(
+    db: Session,
+    max_days: int = 7,
+    granularity: str = "day",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    if granularity not in COHORT_GRANULARITIES:
+        return {"error": f"Granularity must be one of {', '.join(COHORT_GRANULARITIES)}"}
+
+    # Step 1: Assign every user (in the requested signup range) to a cohort
+    cohort = func.date_trunc(granularity, User.created_at)
+
+    filters = []
+    if start_date:
+        filters.append(User.created_at >= start_date)
+    if end_date:
+        filters.append(User.created_at < end_date + timedelta(days=1))
+
+    cohort_users = (
+        db.query(User.id.label("user_id"), cohort.label("cohort"))
+        .filter(*filters)
+        .subquery()
+    )
 
-    cohorts = defaultdict(list)
-    for user_id, signup_date in users:
-        cohorts[signup_date].append(user_id)
+    # Step 2: Cohort sizes
+    cohort_sizes = (
+        db.query(cohort_users.c.cohort, func.count())
+        .group_by(cohort_users.c.cohort)
+        .order_by(cohort_users.c.cohort)
+        .all()
+    )
 
-    results = {}
+    # Step 3: Active users per cohort x period offset, in a single pass over events
+    period = _cohort_period_offset(granularity, cohort_users.c.cohort, Event.timestamp)
 
-    for cohort_date, user_ids in cohorts.items():
-        cohort_size = len(user_ids)
-        results[str(cohort_date)] = {}
+    active_counts = (
+        db.query(
+            cohort_users.c.cohort,
+            period.label("period"),
+            func.count(func.distinct(Event.user_id))
+        )
+        .select_from(cohort_users)
+        .join(
+            Event,
+            and_(
+                Event.user_id == cohort_users.c.user_id,
+                Event.timestamp >= cohort_users.c.cohort,
+                Event.timestamp < cohort_users.c.cohort + _cohort_window(granularity, max_days + 1)
+            )
+        )
+        .group_by(cohort_users.c.cohort, "period")
+        .all()
+    )
 
-        for day in range(max_days + 1):
-            target_date = cohort_date + timedelta(days=day)
+    active = {
+        (cohort_start, offset): count
+        for cohort_start, offset, count in active_counts
+    }
 
-            active_count = (
-                db.query(func.count(func.distinct(Event.user_id)))
-                .filter(
-                    Event.user_id.in_(user_ids),
-                    func.date(Event.timestamp) == target_date
-                )
-                .scalar()
-            )
+    results = {}
 
-            if cohort_size == 0:
-                retention = 0
-            else:
-                retention = round((active_count / cohort_size) * 100, 2)
+    for cohort_start, cohort_size in cohort_sizes:
+        cohort_key = str(cohort_start.date())
+        results[cohort_key] = {}
 
-            results[str(cohort_date)][f"day_{day}"] = retention
+        for offset in range(max_days + 1):
+            active_count = active.get((cohort_start, offset), 0)
+            retention = round((active_count / cohort_size) * 100, 2)
+            results[cohort_key][f"{granularity}_{offset}"] = retention
 
     return results
 
@@ -139,45 +316,57 @@ def get_user_experiment_flag(db: Session, user_id):
         return 1
     return 0
 
-def generate_churn_features(db: Session, inactivity_days: int = 7):
-    cutoff = datetime.now(timezone.utc) - timedelta(days=inactivity_days)
+CHURN_FEATURE_COLUMNS = [
+    "user_id",
+    "total_events",
+    "days_since_last_event",
+    "experiment_exposed",
+    "churned"
+]
 
-    users = db.query(User).all()
-    features = []
+CHURN_FEATURE_CHUNK_SIZE = 5000
 
-    for user in users:
-        total_events = (
-            db.query(func.count(Event.id))
-            .filter(Event.user_id == user.id)
-            .scalar()
-        )
+def iter_churn_features(
+    db: Session,
+    inactivity_days: int = 7,
+    chunk_size: int = CHURN_FEATURE_CHUNK_SIZE
+):
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=inactivity_days)
 
-        last_event = (
-            db.query(func.max(Event.timestamp))
-            .filter(Event.user_id == user.id)
-            .scalar()
+    experiment_exposed = exists().where(Assignment.user_id == User.id)
+
+    # One grouped pass over events, read through a server-side cursor
+    rows = (
+        db.query(
+            User.id,
+            func.count(Event.id),
+            func.max(Event.timestamp),
+            experiment_exposed
         )
+        .outerjoin(Event, Event.user_id == User.id)
+        .group_by(User.id)
+        .yield_per(chunk_size)
+    )
 
-        days_since_last_event = None
+    for user_id, total_events, last_event, exposed in rows:
         if last_event:
-            now = datetime.now(timezone.utc)
             days_since_last_event = (now - last_event).days
         else:
             days_since_last_event = 999  # never active
 
         churned = last_event is None or last_event < cutoff
 
-        experiment_flag = get_user_experiment_flag(db, user.id)
-
-        features.append({
-            "user_id": str(user.id),
+        yield {
+            "user_id": str(user_id),
             "total_events": total_events,
             "days_since_last_event": days_since_last_event,
-            "experiment_exposed": experiment_flag,
+            "experiment_exposed": int(exposed),
             "churned": int(churned)
-        })
+        }
 
-    return features
+def generate_churn_features(db: Session, inactivity_days: int = 7):
+    return list(iter_churn_features(db, inactivity_days))
 
 def get_user_churn_features(db: Session, user_id):
     total_events = (
@@ -200,43 +389,60 @@ def get_user_churn_features(db: Session, user_id):
 
     return total_events, days_since_last_event
 
-def update_all_churn_probabilities(db: Session):
-    users = db.query(User).all()
-
-    from app.ml_inference.churn_predictor import churn_predictor
-
-    for user in users:
-        total_events, days_since_last_event = get_user_churn_features(db, user.id)
-
-        probability = churn_predictor.predict(
-            total_events,
-            days_since_last_event
+def _executive_metrics_query():
+    today = date.today()
+    tomorrow = today + timedelta(days=1)
+    mau_cutoff = datetime.now(timezone.utc) - timedelta(days=30)
+
+    # One scan of users...
+    user_stats = select(
+        func.count(User.id).label("total_users"),
+        func.avg(User.churn_probability).label("average_churn"),
+        func.count(User.id).filter(User.churn_probability > 0.7).label("high_risk")
+    ).cte("user_stats")
+
+    # ...and one scan of the last 30 days of events (DAU is a FILTER over the same rows)
+    active_user = func.count(func.distinct(Event.user_id))
+    event_stats = (
+        select(
+            active_user.filter(
+                and_(Event.timestamp >= today, Event.timestamp < tomorrow)
+            ).label("dau"),
+            active_user.label("mau")
         )
+        .where(Event.timestamp >= mau_cutoff)
+        .cte("event_stats")
+    )
 
-        user.churn_probability = probability # type: ignore
-
-    db.commit()
+    return (
+        select(user_stats, event_stats)
+        .select_from(user_stats.join(event_stats, true()))
+    )
 
-    return {"updated_users": len(users)}
+def _executive_metrics(row):
+    return {
+        "total_users": row.total_users,
+        "daily_active_users": row.dau or 0,
+        "monthly_active_users": row.mau or 0,
+        "average_churn_probability": round(float(row.average_churn or 0), 4),
+        "high_risk_users": row.high_risk
+    }
 
-def get_executive_metrics(db: Session):
-    total_users = db.query(func.count(User.id)).scalar()
-    dau = get_daily_active_users(db)
-    mau = get_mau(db)
+def get_executive_metrics(db: Session, timings: Optional[dict] = None):
+    start = time.perf_counter()
+    row = db.execute(_executive_metrics_query()).one()
+    if timings is not None:
+        timings["db"] = time.perf_counter() - start
 
-    avg_churn = db.query(func.avg(User.churn_probability)).scalar() or 0
+    return _executive_metrics(row)
 
-    high_risk = db.query(func.count(User.id))\
-        .filter(User.churn_probability > 0.7)\
-        .scalar()
+async def get_executive_metrics_async(db: AsyncSession, timings: Optional[dict] = None):
+    start = time.perf_counter()
+    row = (await db.execute(_executive_metrics_query())).one()
+    if timings is not None:
+        timings["db"] = time.perf_counter() - start
 
-    return {
-        "total_users": total_users,
-        "daily_active_users": dau,
-        "monthly_active_users": mau,
-        "average_churn_probability": round(float(avg_churn), 4),
-        "high_risk_users": high_risk
-    }
+    return _executive_metrics(row)
 
 def get_top_churn_risk_users(db: Session, limit: int = 10):
     users = (
@@ -0,0 +1,298 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import numpy as np
+from sqlalchemy import func, select, union, update, values, column, extract, DateTime, Float, Integer
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.infrastructure.database.models import Event, User, ChurnFeatures, ChurnWatermark
+
+CHURN_SCORING = "churn"
+
+NEVER_ACTIVE_DAYS = 999
+
+def get_churn_watermark(db: Session):
+    return db.get(ChurnWatermark, CHURN_SCORING)
+
+def _set_churn_watermark(db: Session, events_through, model_version):
+    stmt = insert(ChurnWatermark).values(
+        name=CHURN_SCORING,
+        events_through=events_through,
+        model_version=model_version
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_={
+                "events_through": stmt.excluded.events_through,
+                "model_version": stmt.excluded.model_version,
+                "updated_at": func.now()
+            }
+        )
+    )
+
+def _days_since(now: float, last_event):
+    # Whole days since the last event (epoch seconds, NaN: never active)
+    return np.where(
+        np.isnan(last_event),
+        NEVER_ACTIVE_DAYS,
+        np.floor((now - last_event) / 86400)
+    )
+
+def _next_age_at(last_event, days_since_last_event):
+    # When the stored whole-day age goes stale (None: never active, never ages)
+    return [
+        None if np.isnan(last) else datetime.fromtimestamp(last + (days + 1) * 86400, timezone.utc)
+        for last, days in zip(last_event.tolist(), days_since_last_event.tolist())
+    ]
+
+def _epochs(seconds):
+    return np.array([np.nan if s is None else float(s) for s in seconds], dtype=np.float64)
+
+def _churn_feature_chunk(db: Session, after_user_id, chunk_size: int):
+    chunk = select(User.id).order_by(User.id).limit(chunk_size)
+    if after_user_id is not None:
+        chunk = chunk.where(User.id > after_user_id)
+    chunk = chunk.subquery()
+
+    return (
+        db.query(
+            chunk.c.id,
+            func.count(Event.id),
+            extract("epoch", func.max(Event.timestamp))
+        )
+        .select_from(chunk)
+        .outerjoin(Event, Event.user_id == chunk.c.id)
+        .group_by(chunk.c.id)
+        .order_by(chunk.c.id)
+        .all()
+    )
+
+def _churn_features_for_users(db: Session, user_ids):
+    # Same features as _churn_feature_chunk for an explicit set of users
+    # (per-user lookups on ix_events_user_id_timestamp)
+    users = select(User.id).where(User.id.in_(user_ids)).subquery()
+
+    return (
+        db.query(
+            users.c.id,
+            func.count(Event.id),
+            extract("epoch", func.max(Event.timestamp))
+        )
+        .select_from(users)
+        .outerjoin(Event, Event.user_id == users.c.id)
+        .group_by(users.c.id)
+        .all()
+    )
+
+def _store_scores(db: Session, user_ids, probabilities, days_since_last_event, total_events=None, last_event=None):
+    # Bulk UPDATE users ... FROM (VALUES ...), and the stored features with it:
+    # a full feature upsert when counts/last event were recomputed, else just the age
+    # (last_event, in epoch seconds, is required either way for next_age_at)
+    scores = values(
+        column("id", UUID(as_uuid=True)),
+        column("churn_probability", Float),
+        name="scores"
+    ).data(list(zip(user_ids, probabilities.tolist())))
+
+    db.execute(
+        update(User)
+        .where(User.id == scores.c.id)
+        .values(churn_probability=scores.c.churn_probability)
+        .execution_options(synchronize_session=False)
+    )
+
+    days = days_since_last_event.astype(np.int64).tolist()
+    next_age_at = _next_age_at(last_event, days_since_last_event)
+
+    if total_events is None:
+        ages = values(
+            column("user_id", UUID(as_uuid=True)),
+            column("days_since_last_event", Integer),
+            column("next_age_at", DateTime(timezone=True)),
+            name="ages"
+        ).data(list(zip(user_ids, days, next_age_at)))
+
+        db.execute(
+            update(ChurnFeatures)
+            .where(ChurnFeatures.user_id == ages.c.user_id)
+            .values(days_since_last_event=ages.c.days_since_last_event, next_age_at=ages.c.next_age_at)
+            .execution_options(synchronize_session=False)
+        )
+        return
+
+    stmt = insert(ChurnFeatures).values([
+        {
+            "user_id": user_id,
+            "total_events": int(events),
+            "last_event_at": None if np.isnan(last) else datetime.fromtimestamp(last, timezone.utc),
+            "days_since_last_event": age,
+            "next_age_at": next_at
+        }
+        for user_id, events, last, age, next_at in zip(user_ids, total_events, last_event, days, next_age_at)
+    ])
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={
+                "total_events": stmt.excluded.total_events,
+                "last_event_at": stmt.excluded.last_event_at,
+                "days_since_last_event": stmt.excluded.days_since_last_event,
+                "next_age_at": stmt.excluded.next_age_at
+            }
+        )
+    )
+
+def _score_feature_rows(db: Session, predictor, rows, now: float):
+    user_ids = [row[0] for row in rows]
+    total_events = np.array([row[1] for row in rows], dtype=np.float64)
+    last_event = _epochs(row[2] for row in rows)
+    days_since_last_event = _days_since(now, last_event)
+
+    # One predict call for the whole chunk
+    probabilities = predictor.predict_batch(total_events, days_since_last_event)
+    _store_scores(db, user_ids, probabilities, days_since_last_event, total_events, last_event)
+    return len(user_ids)
+
+def update_all_churn_probabilities(db: Session, chunk_size: Optional[int] = None, progress=None):
+    # Full rebuild: features for every user from events, then the watermark
+    from app.ml_inference.churn_predictor import churn_predictor
+
+    if not churn_predictor.model:
+        return {"error": "Model not loaded"}
+
+    chunk_size = chunk_size or settings.CHURN_SCORING_CHUNK_SIZE
+    total_users = db.query(func.count(User.id)).scalar() or 0
+    started_at = db.execute(select(func.now())).scalar()
+    now = started_at.timestamp()
+    model_version = churn_predictor.version
+
+    updated = 0
+    after_user_id = None
+
+    while True:
+        # 1️⃣ Features for a chunk of users in one query (keyset paginated)
+        rows = _churn_feature_chunk(db, after_user_id, chunk_size)
+        if not rows:
+            break
+
+        # 2️⃣ Score the chunk, 3️⃣ bulk-write scores and stored features
+        updated += _score_feature_rows(db, churn_predictor, rows, now)
+        db.commit()
+
+        after_user_id = rows[-1][0]
+
+        if progress:
+            progress(updated, total_users)
+        else:
+            print(f"Churn scoring: {updated}/{total_users} users updated")
+
+    # Events from after the rebuild started are picked up incrementally
+    _set_churn_watermark(db, started_at, model_version)
+    db.commit()
+
+    return {"mode": "full", "updated_users": updated}
+
+def _active_user_ids(db: Session, since, until):
+    # Users with events in (since, until], plus signups (who may have none)
+    active = (
+        select(Event.user_id)
+        .where(Event.timestamp > since, Event.timestamp <= until, Event.user_id.isnot(None))
+    )
+    signups = select(User.id).where(User.created_at > since)
+    return sorted(user_id for (user_id,) in db.execute(union(active, signups)))
+
+def age_churn_scores(db: Session, now: float, chunk_size: int, rescore_all: bool = False, predictor=None):
+    # Vectorized pass over the stored features whose whole-day age went stale
+    # (next_age_at has passed; an index range scan, so cost follows the rows
+    # due rather than the number of users), or all of them when the model
+    # changed. Never-active users don't age.
+    if predictor is None:
+        from app.ml_inference.churn_predictor import churn_predictor as predictor
+
+    aged = 0
+    after_user_id = None
+
+    while True:
+        query = (
+            db.query(
+                ChurnFeatures.user_id,
+                ChurnFeatures.total_events,
+                extract("epoch", ChurnFeatures.last_event_at)
+            )
+        )
+        if not rescore_all:
+            query = query.filter(ChurnFeatures.next_age_at <= datetime.fromtimestamp(now, timezone.utc))
+        if after_user_id is not None:
+            query = query.filter(ChurnFeatures.user_id > after_user_id)
+
+        rows = query.order_by(ChurnFeatures.user_id).limit(chunk_size).all()
+        if not rows:
+            break
+        after_user_id = rows[-1][0]
+
+        # Every selected row is written back, even if its day count held
+        # (a stale next_age_at), so it leaves the due set
+        total_events = np.array([row[1] for row in rows], dtype=np.float64)
+        last_event = _epochs(row[2] for row in rows)
+        days_since_last_event = _days_since(now, last_event)
+
+        probabilities = predictor.predict_batch(total_events, days_since_last_event)
+        _store_scores(db, [row[0] for row in rows], probabilities, days_since_last_event, last_event=last_event)
+        db.commit()
+
+        aged += len(rows)
+
+    return aged
+
+def update_churn_probabilities_incremental(db: Session, chunk_size: Optional[int] = None):
+    # Rescore users with events since the watermark; age the stored features
+    # that crossed a day boundary. Cost follows activity and the rows due to
+    # age, not the number of users (except after a model change).
+    from app.ml_inference.churn_predictor import churn_predictor
+
+    if not churn_predictor.model:
+        return {"error": "Model not loaded"}
+
+    watermark = get_churn_watermark(db)
+    if watermark is None:
+        # Nothing stored yet
+        return update_all_churn_probabilities(db, chunk_size)
+
+    chunk_size = chunk_size or settings.CHURN_SCORING_CHUNK_SIZE
+    events_through = db.execute(select(func.now())).scalar()
+    now = events_through.timestamp()
+    model_version = churn_predictor.version
+
+    # Overlap covers events committed late with an earlier timestamp, including
+    # batch events backdated up to ROLLUP_LOOKBACK_DAYS; rescoring a user twice
+    # is harmless (features are recomputed, not added)
+    since = watermark.events_through - max(
+        timedelta(seconds=settings.CHURN_WATERMARK_LAG_SECONDS),
+        timedelta(days=settings.ROLLUP_LOOKBACK_DAYS)
+    )
+
+    # 1️⃣ Recompute features and scores for users with new activity
+    user_ids = _active_user_ids(db, since, events_through)
+    rescored = 0
+    for start in range(0, len(user_ids), chunk_size):
+        rows = _churn_features_for_users(db, user_ids[start:start + chunk_size])
+        if rows:
+            rescored += _score_feature_rows(db, churn_predictor, rows, now)
+        db.commit()
+
+    # 2️⃣ Age everyone else (rescore all stored features if the model changed)
+    rescore_all = model_version != watermark.model_version
+    aged = age_churn_scores(db, now, chunk_size, rescore_all, churn_predictor)
+
+    # 3️⃣ Advance the watermark
+    _set_churn_watermark(db, events_through, model_version)
+    db.commit()
+
+    return {
+        "mode": "incremental",
+        "rescored_users": rescored,
+        "aged_users": aged,
+        "model_changed": rescore_all,
+        "events_through": events_through.isoformat()
+    }
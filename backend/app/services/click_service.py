@@ -1,4 +1,17 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import (
+    CLICK_BUFFER_DEPTH,
+    CLICK_BUFFER_FLUSH_LATENCY,
+    CLICK_BUFFER_FLUSHED,
+    CLICK_BUFFER_DROPPED
+)
 from app.infrastructure.database.models import Click
 
 def log_click(db: Session, link_id, ip, user_agent):
@@ -10,4 +23,122 @@ def log_click(db: Session, link_id, ip, user_agent):
     db.add(click)
     db.commit()
     db.refresh(click)
-    return click
\ No newline at end of file
+    return click
+
+def insert_clicks(rows):
+    # Multi-row INSERT for the whole batch (insertmanyvalues)
+    with SessionLocal() as db:
+        db.execute(insert(Click), rows)
+        db.commit()
+
+# Write-behind queue for redirect clicks. Clicks are stamped when they happen
+# and flushed in batches, when `max_batch` are queued or every `flush_interval`
+# seconds. Until start() is called (scripts, tests) clicks are written through.
+class ClickBuffer:
+    def __init__(
+        self,
+        writer=insert_clicks,
+        max_batch: int = settings.CLICK_BUFFER_MAX_BATCH,
+        flush_interval: float = settings.CLICK_BUFFER_FLUSH_INTERVAL,
+        max_queue: int = settings.CLICK_BUFFER_MAX_QUEUE
+    ):
+        self.writer = writer
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+
+        self._queue = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def add(self, link_id, ip, user_agent):
+        click = {
+            "id": uuid.uuid4(),
+            "link_id": link_id,
+            "ip_address": ip,
+            "user_agent": user_agent,
+            "timestamp": datetime.now(timezone.utc)
+        }
+
+        running = self.running
+        with self._lock:
+            full = running and len(self._queue) >= self.max_queue
+            if not full:
+                self._queue.append(click)
+            depth = len(self._queue)
+        CLICK_BUFFER_DEPTH.set(depth)
+
+        if full:
+            # Backpressure: the flusher is falling behind. Never write on the
+            # caller's thread (the event loop, for redirects): drop the click
+            CLICK_BUFFER_DROPPED.inc()
+            self._wakeup.set()
+            return False
+
+        if not running:
+            self.flush()
+        elif depth >= self.max_batch:
+            self._wakeup.set()
+        return True
+
+    def flush(self):
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = self._queue[:self.max_batch]
+                    del self._queue[:self.max_batch]
+                if not batch:
+                    break
+
+                start = time.perf_counter()
+                try:
+                    self.writer(batch)
+                except Exception as e:
+                    print("Click buffer flush failed:", e)
+                    self._requeue(batch)
+                    break
+                CLICK_BUFFER_FLUSH_LATENCY.observe(time.perf_counter() - start)
+                CLICK_BUFFER_FLUSHED.inc(len(batch))
+
+        CLICK_BUFFER_DEPTH.set(len(self._queue))
+
+    def _requeue(self, batch):
+        with self._lock:
+            room = max(self.max_queue - len(self._queue), 0)
+            kept = batch[:room]
+            self._queue[:0] = kept
+        if len(batch) > len(kept):
+            CLICK_BUFFER_DROPPED.inc(len(batch) - len(kept))
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="click-buffer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # Drain whatever is still queued before shutdown
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+
+# Singleton instance
+click_buffer = ClickBuffer()
@@ -1,5 +1,15 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import copy_rows, copy_rows_async
 from app.infrastructure.database.models import Event
+from app.schemas.event import EventCreate
+
+EVENT_COPY_COLUMNS = ["id", "user_id", "event_type", "event_data", "timestamp"]
 
 def log_event(db: Session, user_id, event_type: str, metadata: dict):
     event = Event(
@@ -10,4 +20,103 @@ def log_event(db: Session, user_id, event_type: str, metadata: dict):
     db.add(event)
     db.commit()
     db.refresh(event)
-    return event
\ No newline at end of file
+    return event
+
+async def log_event_async(db: AsyncSession, user_id, event_type: str, metadata: dict):
+    event = Event(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        event_type=event_type,
+        event_data=metadata
+    )
+    db.add(event)
+    await db.commit()
+    return event
+
+def _format_validation_error(error: ValidationError):
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'event'}: {err['msg']}"
+        for err in error.errors()
+    )
+
+def _contains_nul(value):
+    # Postgres text and JSONB cannot store U+0000; one such value would fail the whole COPY
+    if isinstance(value, str):
+        return "\x00" in value
+    if isinstance(value, dict):
+        return any(_contains_nul(k) or _contains_nul(v) for k, v in value.items())
+    if isinstance(value, list):
+        return any(_contains_nul(v) for v in value)
+    return False
+
+def _validate_events(user_id, items: list):
+    now = datetime.now(timezone.utc)
+    # Backdated past the rollup re-roll window (or the churn rescoring overlap),
+    # an event would never be counted; too far ahead it would miss the partitions
+    earliest = now - timedelta(days=settings.ROLLUP_LOOKBACK_DAYS)
+    latest = now + timedelta(seconds=settings.EVENT_MAX_CLOCK_SKEW_SECONDS)
+    rows = []
+    errors = []
+
+    for index, item in enumerate(items):
+        if isinstance(item, Exception):
+            errors.append({"index": index, "error": str(item)})
+            continue
+
+        try:
+            event = EventCreate.model_validate(item)
+        except ValidationError as e:
+            errors.append({"index": index, "error": _format_validation_error(e)})
+            continue
+
+        if _contains_nul(event.event_type) or _contains_nul(event.metadata):
+            errors.append({"index": index, "error": "event: text must not contain NUL (\\u0000) characters"})
+            continue
+
+        timestamp = event.timestamp or now
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        if not earliest <= timestamp <= latest:
+            errors.append({
+                "index": index,
+                "error": f"timestamp: must be between {earliest.isoformat()} and {latest.isoformat()}"
+            })
+            continue
+
+        rows.append((uuid.uuid4(), user_id, event.event_type, event.metadata, timestamp))
+
+    return rows, errors
+
+def log_events_batch(db: Session, user_id, items: list):
+    # 1️⃣ Validate every item, collecting per-item errors
+    rows, errors = _validate_events(user_id, items)
+
+    # 2️⃣ Load all valid events with a single COPY
+    inserted = 0
+    if rows:
+        inserted = copy_rows(db, Event.__tablename__, EVENT_COPY_COLUMNS, rows)
+        db.commit()
+
+    return {
+        "inserted": inserted,
+        "errors": errors
+    }
+
+async def log_events_batch_async(db: AsyncSession, user_id, items: list):
+    rows, errors = _validate_events(user_id, items)
+
+    # asyncpg's binary COPY takes JSONB as text
+    inserted = 0
+    if rows:
+        inserted = await copy_rows_async(
+            db,
+            Event.__tablename__,
+            EVENT_COPY_COLUMNS,
+            [(*row[:3], json.dumps(row[3], default=str), row[4]) for row in rows]
+        )
+        await db.commit()
+
+    return {
+        "inserted": inserted,
+        "errors": errors
+    }
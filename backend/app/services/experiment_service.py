@@ -1,200 +1,316 @@
-import random
-import math
-import warnings
+import hashlib
+import uuid
+from typing import NamedTuple, Optional, Tuple
+import numpy as np
+from scipy import stats
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import SessionLocal
 from app.infrastructure.database.models import Experiment, User, Variant, Assignment, Event
-from statsmodels.stats.proportion import proportions_ztest
+from statsmodels.stats.multitest import multipletests
+from statsmodels.stats.proportion import proportion_confint
 from sqlalchemy import func, select
 
-def assign_user_to_experiment(db: Session, user_id, experiment_name):
-    # 1️⃣ Get active experiment
-    experiment = (
-        db.query(Experiment)
+# Assignment resolution: traffic percentages map onto ASSIGNMENT_BUCKETS buckets
+ASSIGNMENT_BUCKETS = 10000
+
+class ExperimentConfig(NamedTuple):
+    id: uuid.UUID
+    # (variant_id, exclusive upper bucket) in a stable order
+    variants: Tuple[Tuple[uuid.UUID, int], ...]
+
+# experiment name -> ExperimentConfig (None: missing or inactive)
+experiment_cache = TTLCache(
+    "experiment_config",
+    max_size=settings.EXPERIMENT_CACHE_MAX_SIZE,
+    ttl=settings.EXPERIMENT_CACHE_TTL
+)
+
+def load_experiment_config(db: Session, experiment_name: str) -> Optional[ExperimentConfig]:
+    rows = (
+        db.query(Experiment.id, Variant.id, Variant.traffic_percentage)
+        .join(Variant, Variant.experiment_id == Experiment.id)
         .filter(
             Experiment.name == experiment_name,
             Experiment.is_active.is_(True)
         )
-        .first()
+        .order_by(Variant.name, Variant.id)
+        .all()
     )
 
-    if not experiment:
+    if not rows:
         return None
 
-    # 2️⃣ Check existing assignment (sticky behavior)
-    existing = (
-        db.query(Assignment)
-        .filter(
-            Assignment.user_id == user_id,
-            Assignment.experiment_id == experiment.id
-        )
-        .first()
-    )
+    variants = []
+    cumulative = 0
+    for _, variant_id, traffic in rows:
+        cumulative += (traffic or 0) * ASSIGNMENT_BUCKETS // 100
+        variants.append((variant_id, cumulative))
 
-    if existing:
-        return existing.variant_id
+    return ExperimentConfig(rows[0][0], tuple(variants))
 
-    # 3️⃣ Load variants
-    variants = (
-        db.query(Variant)
-        .filter(Variant.experiment_id == experiment.id)
-        .all()
+def get_experiment_config(db: Session, experiment_name: str) -> Optional[ExperimentConfig]:
+    return experiment_cache.get_or_load(
+        experiment_name,
+        lambda: load_experiment_config(db, experiment_name)
     )
 
-    if not variants:
+def assignment_bucket(experiment_name: str, user_id) -> int:
+    # Stable across processes and restarts (unlike hash())
+    digest = hashlib.blake2b(f"{experiment_name}:{user_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % ASSIGNMENT_BUCKETS
+
+def choose_variant(config: ExperimentConfig, bucket: int):
+    for variant_id, upper in config.variants:
+        if bucket < upper:
+            return variant_id
+
+    # Fallback safety (if percentages don't sum to 100)
+    return config.variants[-1][0]
+
+def assign_variant(db: Session, user_id, experiment_name: str):
+    # Pure function of (experiment, user): sticky without reading assignments
+    config = get_experiment_config(db, experiment_name)
+    if config is None:
         return None
 
-    # 4️⃣ Weighted random assignment
-    rand = random.randint(1, 100)
-    cumulative = 0
-    selected_variant = None
-
-    for variant in variants:
-        # Access raw value safely
-        traffic = variant.__dict__["traffic_percentage"]
-        cumulative += traffic
-
-        if rand <= cumulative:
-            selected_variant = variant
-            break
-
-    # 5️⃣ Fallback safety (if percentages don't sum to 100)
-    if selected_variant is None:
-        selected_variant = variants[-1]
-
-    # 6️⃣ Create assignment
-    assignment = Assignment(
-        user_id=user_id,
-        experiment_id=experiment.id,
-        variant_id=selected_variant.id
+    variant_id = choose_variant(config, assignment_bucket(experiment_name, user_id))
+    return config.id, variant_id
+
+def get_stored_variant(db: Session, user_id, experiment_id):
+    # The recorded assignment, if any (unique on user and experiment)
+    return (
+        db.query(Assignment.variant_id)
+        .filter(Assignment.user_id == user_id, Assignment.experiment_id == experiment_id)
+        .scalar()
     )
 
-    db.add(assignment)
+def persist_assignment(db: Session, user_id, experiment_id, variant_id):
+    # Idempotent: the first recorded assignment wins, and is returned
+    stmt = insert(Assignment).values(user_id=user_id, experiment_id=experiment_id, variant_id=variant_id)
+    stored = db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["user_id", "experiment_id"],
+            set_={"variant_id": Assignment.variant_id}
+        )
+        .returning(Assignment.variant_id)
+    ).scalar()
     db.commit()
+    return stored
 
-    return selected_variant.id
+def save_assignment(user_id, experiment_id, variant_id):
+    # Background variant of persist_assignment, after the response is sent
+    with SessionLocal() as db:
+        persist_assignment(db, user_id, experiment_id, variant_id)
 
-def evaluate_experiment(db: Session, experiment_name: str):
+def assign_user_to_experiment(db: Session, user_id, experiment_name):
+    assignment = assign_variant(db, user_id, experiment_name)
+    if assignment is None:
+        return None
 
-    # 1️⃣ Fetch experiment safely
-    experiment = (
-        db.query(Experiment)
-        .filter(Experiment.name == experiment_name)
-        .first()
-    )
+    experiment_id, variant_id = assignment
+    return persist_assignment(db, user_id, experiment_id, variant_id)
 
-    if experiment is None:
-        return {"error": "Experiment not found"}
+CORRECTION_METHODS = ("holm", "bonferroni", "fdr_bh")
 
-    # 2️⃣ Fetch variants
-    variants = (
-        db.query(Variant)
-        .filter(Variant.experiment_id == experiment.id)
-        .all()
-    )
+def _rounded(values, digits=5):
+    return [None if np.isnan(v) else round(float(v), digits) for v in values]
 
-    if len(variants) < 2:
-        return {"error": "At least 2 variants required"}
+def multi_variant_test(conversions, nobs, control: int = 0, alpha: float = 0.05, correction: str = "holm"):
+    conversions = np.asarray(conversions, dtype=np.float64)
+    nobs = np.asarray(nobs, dtype=np.float64)
+    rates = conversions / nobs
+    z_crit = stats.norm.ppf(1 - alpha / 2)
 
-    results = []
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 1️⃣ Omnibus chi-square test of independence on the k x 2 table
+        observed = np.column_stack([conversions, nobs - conversions])
+        expected = observed.sum(axis=1, keepdims=True) * observed.sum(axis=0) / observed.sum()
+        chi_square = np.sum(np.where(expected > 0, (observed - expected) ** 2 / expected, 0.0))
+        dof = len(nobs) - 1
+        omnibus_p = stats.chi2.sf(chi_square, dof) if np.all(expected.sum(axis=0) > 0) else np.nan
 
-    for variant in variants:
+        # 2️⃣ Pooled two-proportion z-tests of every arm against control
+        treatments = np.array([i for i in range(len(nobs)) if i != control])
+        x_t, n_t, x_c, n_c = conversions[treatments], nobs[treatments], conversions[control], nobs[control]
 
-        # Total assigned users
-        total_users = (
-            db.query(func.count(Assignment.id))
-            .filter(Assignment.variant_id == variant.id)
-            .scalar()
+        pooled = (x_t + x_c) / (n_t + n_c)
+        z = (rates[treatments] - rates[control]) / np.sqrt(pooled * (1 - pooled) * (1 / n_t + 1 / n_c))
+        p_values = 2 * stats.norm.sf(np.abs(z))
+
+        # 3️⃣ Unpooled Wald intervals for the difference, Wilson intervals per arm
+        difference = rates[treatments] - rates[control]
+        se_difference = np.sqrt(
+            rates[treatments] * (1 - rates[treatments]) / n_t + rates[control] * (1 - rates[control]) / n_c
         )
+        rate_low, rate_high = proportion_confint(conversions, nobs, alpha=alpha, method="wilson")
+
+    adjusted = np.full(len(p_values), np.nan)
+    valid = ~np.isnan(p_values)
+    if valid.any():
+        adjusted[valid] = multipletests(p_values[valid], alpha=alpha, method=correction)[1]
 
-        # Users assigned to this variant
-        assigned_user_ids = select(Assignment.user_id).where(
-            Assignment.variant_id == variant.id
+    return {
+        "omnibus": {
+            "test": "chi_square",
+            "statistic": round(float(chi_square), 5),
+            "dof": dof,
+            "p_value": _rounded([omnibus_p])[0]
+        },
+        "rate_ci": list(zip(_rounded(rate_low, 4), _rounded(rate_high, 4))),
+        "comparisons": [
+            {
+                "index": int(index),
+                "difference": _rounded([difference[i]], 4)[0],
+                "difference_ci": _rounded(
+                    [difference[i] - z_crit * se_difference[i], difference[i] + z_crit * se_difference[i]], 4
+                ),
+                "z_stat": _rounded([z[i]])[0],
+                "p_value": _rounded([p_values[i]])[0],
+                "adjusted_p_value": _rounded([adjusted[i]])[0],
+                "significant": bool(adjusted[i] < alpha) if not np.isnan(adjusted[i]) else False
+            }
+            for i, index in enumerate(treatments)
+        ]
+    }
+
+def evaluate_experiment(
+    db: Session,
+    experiment_name: str,
+    control: Optional[str] = None,
+    alpha: float = 0.05,
+    correction: str = "holm"
+):
+    if correction not in CORRECTION_METHODS:
+        return {"error": f"Correction must be one of {', '.join(CORRECTION_METHODS)}"}
+
+    # Users who converted in this experiment (partial index on the JSONB key)
+    converted = (
+        select(Event.user_id)
+        .where(
+            Event.event_type == "experiment_conversion",
+            Event.event_data["experiment"].astext == experiment_name
         )
+        .distinct()
+        .subquery()
+    )
 
-        # Conversion events for this variant
-        conversions = (
-            db.query(func.count(func.distinct(Event.user_id)))
-            .filter(
-                Event.user_id.in_(assigned_user_ids),
-                Event.event_type == "experiment_conversion",
-                Event.event_data["experiment"].astext == experiment_name
-            )
-            .scalar()
+    # 1️⃣ Experiment, variants, assignment and conversion counts in one grouped join
+    rows = (
+        db.query(
+            Experiment.id,
+            Variant.name,
+            func.count(Assignment.id),
+            func.count(converted.c.user_id)
         )
+        .outerjoin(Variant, Variant.experiment_id == Experiment.id)
+        .outerjoin(Assignment, Assignment.variant_id == Variant.id)
+        .outerjoin(converted, converted.c.user_id == Assignment.user_id)
+        .filter(Experiment.name == experiment_name)
+        .group_by(Experiment.id, Variant.id, Variant.name)
+        .order_by(Variant.name)
+        .all()
+    )
+
+    if not rows:
+        return {"error": "Experiment not found"}
+
+    rows = [row for row in rows if row[1] is not None]
+    if len(rows) < 2:
+        return {"error": "At least 2 variants required"}
 
+    results = []
+    for _, variant_name, total_users, conversions in rows:
         conversion_rate = 0
         if total_users and total_users > 0:
             conversion_rate = conversions / total_users
 
         results.append({
-            "variant_name": variant.name,
+            "variant_name": variant_name,
             "total_users": total_users,
             "conversions": conversions,
             "conversion_rate": round(conversion_rate, 4)
         })
 
-    # 3️⃣ Only handle 2-variant experiments for now
-    if len(results) == 2:
-        count = [results[0]["conversions"], results[1]["conversions"]]
-        nobs = [results[0]["total_users"], results[1]["total_users"]]
-
-        # Prevent division-by-zero crash
-        if min(nobs) == 0:
-            return {
-                "variants": results,
-                "message": "Not enough data for statistical test"
-            }
+    names = [r["variant_name"] for r in results]
+    if control is None:
+        control = names[0]
+    if control not in names:
+        return {"error": f"Control variant '{control}' not found"}
+    control_index = names.index(control)
 
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            stat, pval = proportions_ztest(count, nobs)
+    # Prevent division-by-zero crash
+    nobs = [r["total_users"] for r in results]
+    if min(nobs) == 0:
+        return {
+            "variants": results,
+            "message": "Not enough data for statistical test"
+        }
 
-        if pval is None or math.isnan(pval) or math.isinf(pval):
-            return {
-                "variants": results,
-                "message": "Statistical test inconclusive (insufficient variance)"
-            }
+    # 2️⃣ Vectorized statistics across all arms
+    tests = multi_variant_test(
+        [r["conversions"] for r in results],
+        nobs,
+        control_index,
+        alpha,
+        correction
+    )
 
+    if tests["omnibus"]["p_value"] is None:
         return {
             "variants": results,
-            "p_value": round(float(pval), 5)
+            "message": "Statistical test inconclusive (insufficient variance)"
         }
 
-    return {
+    for result, ci in zip(results, tests["rate_ci"]):
+        result["conversion_rate_ci"] = list(ci)
+
+    comparisons = []
+    for comparison in tests["comparisons"]:
+        comparison = dict(comparison)
+        comparison["variant_name"] = names[comparison.pop("index")]
+        comparisons.append(comparison)
+
+    response = {
         "variants": results,
-        "message": "Statistical test only implemented for 2 variants"
+        "control": control,
+        "alpha": alpha,
+        "correction": correction,
+        "omnibus": tests["omnibus"],
+        "comparisons": comparisons
     }
 
+    # Two-arm experiments keep reporting the single z-test p-value
+    if len(results) == 2:
+        response["p_value"] = comparisons[0]["p_value"]
+
+    return response
+
 def churn_by_variant(db: Session, experiment_name: str):
-    experiment = (
-        db.query(Experiment)
+    experiment_id = (
+        db.query(Experiment.id)
         .filter(Experiment.name == experiment_name)
-        .first()
+        .scalar()
     )
 
-    if not experiment:
+    if not experiment_id:
         return {"error": "Experiment not found"}
 
-    variants = db.query(Variant)\
-        .filter(Variant.experiment_id == experiment.id)\
+    rows = (
+        db.query(Variant.name, func.avg(User.churn_probability))
+        .outerjoin(Assignment, Assignment.variant_id == Variant.id)
+        .outerjoin(User, User.id == Assignment.user_id)
+        .filter(Variant.experiment_id == experiment_id)
+        .group_by(Variant.id, Variant.name)
         .all()
+    )
 
-    results = []
-
-    for variant in variants:
-        user_ids = select(Assignment.user_id).where(
-            Assignment.variant_id == variant.id
-        )
-
-        avg_churn = (
-            db.query(func.avg(User.churn_probability))
-            .filter(User.id.in_(user_ids))
-            .scalar()
-        )
-
-        results.append({
-            "variant_name": variant.name,
+    return [
+        {
+            "variant_name": variant_name,
             "average_churn_probability": round(float(avg_churn or 0), 4)
-        })
-
-    return results
\ No newline at end of file
+        }
+        for variant_name, avg_churn in rows
+    ]
@@ -1,8 +1,20 @@
 import random
 import string
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core.cache import TTLCache, MISSING
+from app.core.config import settings
 from app.infrastructure.database.models import Link
 
+# short_code -> (link_id, original_url); short codes never change once created
+link_cache = TTLCache(
+    "short_code",
+    max_size=settings.LINK_CACHE_MAX_SIZE,
+    ttl=settings.LINK_CACHE_TTL,
+    negative_ttl=settings.LINK_CACHE_NEGATIVE_TTL
+)
+
 def generate_short_code(length=6):
     return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
 
@@ -16,4 +28,34 @@ def create_short_link(db: Session, original_url: str, user_id):
     db.add(link)
     db.commit()
     db.refresh(link)
-    return link
\ No newline at end of file
+
+    # Replaces any negative entry cached for this code
+    link_cache.set(short_code, (link.id, link.original_url))
+    return link
+
+def resolve_short_code(db: Session, short_code: str):
+    def load():
+        row = (
+            db.query(Link.id, Link.original_url)
+            .filter(Link.short_code == short_code)
+            .first()
+        )
+        return tuple(row) if row else None
+
+    return link_cache.get_or_load(short_code, load)
+
+async def resolve_short_code_async(db: AsyncSession, short_code: str):
+    link = link_cache.get(short_code)
+    if link is not MISSING:
+        return link
+
+    row = (
+        await db.execute(
+            select(Link.id, Link.original_url)
+            .where(Link.short_code == short_code)
+        )
+    ).first()
+
+    link = tuple(row) if row else None
+    link_cache.set(short_code, link)
+    return link
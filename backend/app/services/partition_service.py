@@ -0,0 +1,109 @@
+import re
+from datetime import date, datetime, timezone
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.core.config import settings
+
+# Append-only tables range-partitioned by month on "timestamp"
+PARTITIONED_TABLES = ("events", "clicks")
+RETENTION_ACTIONS = ("detach", "drop")
+
+def add_months(day: date, months: int) -> date:
+    month_index = day.year * 12 + (day.month - 1) + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+def _parse_partition_month(table: str, name: str) -> Optional[date]:
+    match = re.fullmatch(rf"{table}_p(\d{{4}})_(\d{{2}})", name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+def list_partitions(db: Session, table: str):
+    rows = db.execute(
+        text("""
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = :table
+            ORDER BY child.relname
+        """),
+        {"table": table}
+    ).all()
+    return [name for (name,) in rows]
+
+def create_partition(db: Session, table: str, month: date) -> bool:
+    name = partition_name(table, month)
+    if name in list_partitions(db, table):
+        return False
+
+    start = month.isoformat()
+    end = add_months(month, 1).isoformat()
+
+    # Savepoint: fails if the default partition already holds rows for this month
+    try:
+        with db.begin_nested():
+            db.execute(text(
+                f'CREATE TABLE "{name}" PARTITION OF "{table}" '
+                f"FOR VALUES FROM ('{start} 00:00+00') TO ('{end} 00:00+00')"
+            ))
+    except Exception as e:
+        print(f"Could not create partition {name}:", e)
+        return False
+
+    return True
+
+def ensure_future_partitions(db: Session, months_ahead: Optional[int] = None):
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_PREMAKE_MONTHS
+
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    created = []
+
+    for table in PARTITIONED_TABLES:
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            if create_partition(db, table, month):
+                created.append(partition_name(table, month))
+
+    db.commit()
+    return created
+
+def expire_partitions(db: Session, retention_months: Optional[int] = None, action: Optional[str] = None):
+    if retention_months is None:
+        retention_months = settings.PARTITION_RETENTION_MONTHS
+    action = action or settings.PARTITION_RETENTION_ACTION
+    if action not in RETENTION_ACTIONS:
+        raise ValueError(f"Unknown partition retention action {action!r} (expected detach or drop)")
+
+    # 0 keeps raw data forever (rollups keep the aggregates either way)
+    if retention_months <= 0:
+        return []
+
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    cutoff = add_months(current, -retention_months)
+    expired = []
+
+    for table in PARTITIONED_TABLES:
+        for name in list_partitions(db, table):
+            month = _parse_partition_month(table, name)
+            if month is None or add_months(month, 1) > cutoff:
+                continue
+
+            db.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+            if action == "drop":
+                db.execute(text(f'DROP TABLE "{name}"'))
+            expired.append(name)
+
+    db.commit()
+    return expired
+
+def maintain_partitions(db: Session):
+    return {
+        "created": ensure_future_partitions(db),
+        "expired": expire_partitions(db)
+    }
@@ -0,0 +1,139 @@
+from datetime import timedelta
+from typing import Optional
+from sqlalchemy import func, cast, select, Date
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.services.sketch_service import build_daily_sketches
+from app.infrastructure.database.models import (
+    Event,
+    Click,
+    DailyUserActivity,
+    DailyLinkClicks,
+    DailyEventCounts,
+    RollupWatermark
+)
+
+DAILY_ROLLUP = "daily"
+
+# Days rolled up per transaction during a backfill
+ROLLUP_BATCH_DAYS = 31
+
+def get_rollup_watermark(db: Session):
+    return (
+        db.query(RollupWatermark.rolled_up_through)
+        .filter(RollupWatermark.name == DAILY_ROLLUP)
+        .scalar()
+    )
+
+def live_tail_start(db: Session):
+    # First day not covered by the rollups (None: nothing rolled up yet)
+    watermark = get_rollup_watermark(db)
+    if watermark is None:
+        return None
+    return watermark + timedelta(days=1)
+
+def _first_raw_day(db: Session):
+    first_event = db.query(func.min(Event.timestamp)).scalar()
+    first_click = db.query(func.min(Click.timestamp)).scalar()
+    candidates = [ts for ts in (first_event, first_click) if ts is not None]
+    if not candidates:
+        return None
+    return db.query(cast(min(candidates), Date)).scalar()
+
+def _rollup_days(db: Session, start, end):
+    # Recompute every rollup for days in [start, end)
+    event_day = cast(Event.timestamp, Date)
+    click_day = cast(Click.timestamp, Date)
+
+    db.execute(
+        insert(DailyUserActivity)
+        .from_select(
+            ["day", "user_id"],
+            select(event_day, Event.user_id)
+            .where(
+                Event.timestamp >= start,
+                Event.timestamp < end,
+                Event.user_id.isnot(None)
+            )
+            .distinct()
+        )
+        .on_conflict_do_nothing()
+    )
+
+    event_counts = insert(DailyEventCounts).from_select(
+        ["day", "event_type", "n"],
+        select(event_day, Event.event_type, func.count())
+        .where(
+            Event.timestamp >= start,
+            Event.timestamp < end,
+            Event.event_type.isnot(None)
+        )
+        .group_by(event_day, Event.event_type)
+    )
+    db.execute(
+        event_counts.on_conflict_do_update(
+            index_elements=["day", "event_type"],
+            set_={"n": event_counts.excluded.n}
+        )
+    )
+
+    link_clicks = insert(DailyLinkClicks).from_select(
+        ["day", "link_id", "clicks"],
+        select(click_day, Click.link_id, func.count())
+        .where(
+            Click.timestamp >= start,
+            Click.timestamp < end,
+            Click.link_id.isnot(None)
+        )
+        .group_by(click_day, Click.link_id)
+    )
+    db.execute(
+        link_clicks.on_conflict_do_update(
+            index_elements=["day", "link_id"],
+            set_={"clicks": link_clicks.excluded.clicks}
+        )
+    )
+
+def _set_watermark(db: Session, day):
+    stmt = insert(RollupWatermark).values(name=DAILY_ROLLUP, rolled_up_through=day)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"rolled_up_through": stmt.excluded.rolled_up_through, "updated_at": func.now()}
+        )
+    )
+
+def refresh_rollups(db: Session, lookback_days: Optional[int] = None):
+    if lookback_days is None:
+        lookback_days = settings.ROLLUP_LOOKBACK_DAYS
+
+    # Only closed days are rolled up; today is always served from the live tail
+    today = db.query(func.current_date()).scalar()
+    through = today - timedelta(days=1)
+
+    watermark = get_rollup_watermark(db)
+    if watermark is None:
+        start = _first_raw_day(db)
+    else:
+        # Re-roll the last few days to pick up late-arriving rows
+        start = watermark + timedelta(days=1 - lookback_days)
+
+    if start is None or start > through:
+        return {"rolled_up_through": str(watermark) if watermark else None, "days": 0}
+
+    day = start
+    while day <= through:
+        end = min(day + timedelta(days=ROLLUP_BATCH_DAYS), through + timedelta(days=1))
+        _rollup_days(db, day, end)
+        build_daily_sketches(db, day, end)
+        rolled_up_through = end - timedelta(days=1)
+        if watermark is None or rolled_up_through > watermark:
+            _set_watermark(db, rolled_up_through)
+        db.commit()
+        day = end
+
+    return {
+        "rolled_up_through": str(through),
+        "days": (through - start).days + 1
+    }
@@ -0,0 +1,93 @@
+from datetime import timedelta
+from typing import Optional
+import numpy as np
+from sqlalchemy import func, cast, String
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.hll import HyperLogLog
+from app.infrastructure.database.models import Event, DailyUserActivity, DailyUserSketch
+
+def user_hash(user_id_column):
+    # 64-bit hash computed in Postgres so only hashes cross the wire
+    return func.hashtextextended(cast(user_id_column, String), 0)
+
+def _hash_array(rows):
+    return np.fromiter((row[0] for row in rows), dtype=np.int64)
+
+def build_daily_sketches(db: Session, start, end, precision: Optional[int] = None):
+    # One sketch per rolled-up day in [start, end), from daily_user_activity
+    precision = precision or settings.HLL_PRECISION
+
+    day = start
+    while day < end:
+        hashes = _hash_array(
+            db.query(user_hash(DailyUserActivity.user_id))
+            .filter(DailyUserActivity.day == day)
+            .all()
+        )
+        sketch = HyperLogLog(precision).add_hashes(hashes)
+
+        stmt = insert(DailyUserSketch).values(
+            day=day,
+            precision=precision,
+            sketch=sketch.to_bytes()
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["day"],
+                set_={"precision": stmt.excluded.precision, "sketch": stmt.excluded.sketch}
+            )
+        )
+        day += timedelta(days=1)
+
+def active_users_sketch(db: Session, start_day, end_day, tail_start=None, precision: Optional[int] = None):
+    # Merge the stored sketches for days in [start_day, end_day] that are rolled up,
+    # plus a sketch of the live tail (days from tail_start on) built from events
+    precision = precision or settings.HLL_PRECISION
+    sketch = HyperLogLog(precision)
+
+    rolled_up_end = min(end_day + timedelta(days=1), tail_start) if tail_start else start_day
+
+    if rolled_up_end > start_day:
+        stored = (
+            db.query(DailyUserSketch.day, DailyUserSketch.sketch)
+            .filter(
+                DailyUserSketch.day >= start_day,
+                DailyUserSketch.day < rolled_up_end,
+                DailyUserSketch.precision == precision
+            )
+            .all()
+        )
+
+        covered = set()
+        for day, data in stored:
+            sketch.merge(HyperLogLog.from_bytes(data))
+            covered.add(day)
+
+        # Days without a usable sketch (e.g. precision changed) fall back to the rollup
+        missing = [
+            start_day + timedelta(days=n)
+            for n in range((rolled_up_end - start_day).days)
+            if start_day + timedelta(days=n) not in covered
+        ]
+        if missing:
+            sketch.add_hashes(_hash_array(
+                db.query(user_hash(DailyUserActivity.user_id))
+                .filter(DailyUserActivity.day.in_(missing))
+                .all()
+            ))
+
+    tail_from = max(start_day, rolled_up_end)
+    if tail_from <= end_day:
+        sketch.add_hashes(_hash_array(
+            db.query(func.distinct(user_hash(Event.user_id)))
+            .filter(
+                Event.timestamp >= tail_from,
+                Event.timestamp < end_day + timedelta(days=1),
+                Event.user_id.isnot(None)
+            )
+            .all()
+        ))
+
+    return sketch
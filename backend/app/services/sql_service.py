@@ -1,5 +1,10 @@
-from sqlalchemy import text
+from typing import Optional
+from sqlalchemy import text, bindparam
 from sqlalchemy.orm import Session
+from app.core.concurrency import AdmissionRejected, ConcurrencyLimiter
+from app.core.config import settings
+from app.core.database import ConsoleSessionLocal
+from app.core.metrics import LIMITER_REJECTED
 
 FORBIDDEN_KEYWORDS = [
     "insert", "update", "delete", "drop",
@@ -17,6 +22,23 @@ FORBIDDEN_PATTERNS = [
 
 MAX_LIMIT = 100
 
+# Cheap queries and expensive ones queue separately, so one slow extract
+# doesn't hold up every quick lookup behind it
+console_lanes = {
+    "light": ConcurrencyLimiter(
+        "sql_console_light",
+        settings.SQL_CONSOLE_LIGHT_CONCURRENCY,
+        settings.SQL_CONSOLE_MAX_QUEUE,
+        settings.SQL_CONSOLE_QUEUE_TIMEOUT
+    ),
+    "heavy": ConcurrencyLimiter(
+        "sql_console_heavy",
+        settings.SQL_CONSOLE_HEAVY_CONCURRENCY,
+        settings.SQL_CONSOLE_MAX_QUEUE,
+        settings.SQL_CONSOLE_QUEUE_TIMEOUT
+    )
+}
+
 
 def enforce_limit(query: str) -> str:
     lowered = query.lower()
@@ -25,29 +47,48 @@ def enforce_limit(query: str) -> str:
     return query
 
 
-def execute_readonly_query(db: Session, query: str):
+def validate_query(query: str) -> Optional[str]:
     lowered = query.strip().lower()
 
     # Must start with SELECT
     if not lowered.startswith("select"):
-        return {"error": "Only SELECT queries are allowed."}
+        return "Only SELECT queries are allowed."
 
     # Block obvious destructive keywords
     for keyword in FORBIDDEN_KEYWORDS:
         if keyword in lowered:
-            return {"error": f"Keyword '{keyword}' not allowed."}
+            return f"Keyword '{keyword}' not allowed."
 
     # Block system schemas & risky functions
     for pattern in FORBIDDEN_PATTERNS:
         if pattern in lowered:
-            return {"error": f"Access to '{pattern}' is not allowed."}
+            return f"Access to '{pattern}' is not allowed."
+
+    # One statement only: EXPLAIN would cost just the first, and the rest
+    # would run during admission, outside any lane
+    statement = lowered[:-1] if lowered.endswith(";") else lowered
+    if ";" in statement:
+        return "Only a single statement is allowed."
+
+    return None
+
+
+def begin_readonly(db: Session):
+    # Transaction-scoped, so nothing leaks back into the pooled connection
+    db.execute(text("SET TRANSACTION READ ONLY"))
+    db.execute(text(f"SET LOCAL statement_timeout = {int(settings.SQL_STATEMENT_TIMEOUT_MS)}"))
+
+
+def execute_readonly_query(db: Session, query: str):
+    error = validate_query(query)
+    if error:
+        return {"error": error}
 
     # Enforce row limit
     safe_query = enforce_limit(query)
 
     try:
-        # Add timeout at DB level (3 seconds)
-        db.execute(text("SET statement_timeout = 3000;"))
+        begin_readonly(db)
 
         result = db.execute(text(safe_query))
         rows = result.fetchall()
@@ -59,4 +100,167 @@ def execute_readonly_query(db: Session, query: str):
         }
 
     except Exception as e:
-        return {"error": str(e)}
\ No newline at end of file
+        return {"error": str(e)}
+
+
+def column_types(db: Session, description):
+    # [{"name", "type"}] from the cursor description's type OIDs
+    oids = sorted({column.type_code for column in description})
+    names = dict(
+        db.execute(
+            text("SELECT oid, format_type(oid, NULL) FROM pg_type WHERE oid IN :oids")
+            .bindparams(bindparam("oids", expanding=True)),
+            {"oids": oids}
+        ).all()
+    )
+    return [
+        {"name": column.name, "type": names.get(column.type_code, "unknown")}
+        for column in description
+    ]
+
+
+def _capped_batches(result, max_rows: int, batch_rows: int, on_close=None):
+    # Cleanup lives here, not in a response background task: those are skipped
+    # when the body raises (e.g. a statement_timeout on a later fetch)
+    remaining = max_rows
+    try:
+        for batch in result.partitions(batch_rows):
+            if len(batch) >= remaining:
+                yield batch[:remaining]
+                return
+            remaining -= len(batch)
+            yield batch
+    finally:
+        try:
+            result.close()
+        finally:
+            if on_close is not None:
+                on_close()
+
+
+def stream_query_text(query: str, max_rows: int) -> str:
+    # The cap is part of the statement so the planner can pick a fast-start plan
+    return f"SELECT * FROM ({query.strip().rstrip(';')}) AS console_query LIMIT {int(max_rows)}"
+
+
+def stream_readonly_query(
+    db: Session,
+    query: str,
+    max_rows: Optional[int] = None,
+    batch_rows: Optional[int] = None,
+    on_close=None
+):
+    # Server-side cursor: only `batch_rows` rows are held in memory at a time.
+    # Returns column metadata plus a lazy iterator of row batches, which calls
+    # `on_close` once it is exhausted, fails or is closed.
+    error = validate_query(query)
+    if error:
+        return {"error": error}
+
+    max_rows = min(max_rows or settings.SQL_STREAM_MAX_ROWS, settings.SQL_STREAM_MAX_ROWS)
+    batch_rows = batch_rows or settings.SQL_STREAM_BATCH_ROWS
+
+    try:
+        begin_readonly(db)
+        result = db.execute(
+            text(stream_query_text(query, max_rows))
+            .execution_options(yield_per=batch_rows)
+        )
+        columns = column_types(db, result.cursor.description)
+    except Exception as e:
+        db.rollback()
+        return {"error": str(e)}
+
+    return {
+        "columns": columns,
+        "max_rows": max_rows,
+        "batches": _capped_batches(result, max_rows, batch_rows, on_close)
+    }
+
+
+def explain_query(db: Session, query: str):
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {query.strip().rstrip(';')}")).scalar()[0]["Plan"]
+    return {"cost": plan["Total Cost"], "rows": plan["Plan Rows"]}
+
+
+def admit_query(query: str):
+    # EXPLAIN (no execution) on a console connection, then pick a lane or refuse.
+    # Returns (lane, plan) or (None, error response).
+    with ConsoleSessionLocal() as db:
+        try:
+            begin_readonly(db)
+            plan = explain_query(db, query)
+        except Exception as e:
+            return None, {"error": str(e)}
+
+    if plan["cost"] > settings.SQL_MAX_PLAN_COST:
+        reason = "cost"
+        message = f"Estimated cost {plan['cost']:.0f} exceeds the limit of {settings.SQL_MAX_PLAN_COST:.0f}."
+    elif plan["rows"] > settings.SQL_MAX_PLAN_ROWS:
+        reason = "rows"
+        message = f"Estimated {plan['rows']:.0f} rows exceeds the limit of {settings.SQL_MAX_PLAN_ROWS:.0f}."
+    else:
+        lane = "heavy" if plan["cost"] > settings.SQL_HEAVY_PLAN_COST else "light"
+        return console_lanes[lane], {**plan, "lane": lane}
+
+    LIMITER_REJECTED.labels(limiter="sql_console", reason=reason).inc()
+    return None, {
+        "error": f"{message} Add filters or a LIMIT.",
+        "estimated_cost": plan["cost"],
+        "estimated_rows": plan["rows"]
+    }
+
+
+def run_console_query(query: str):
+    error = validate_query(query)
+    if error:
+        return {"error": error}
+
+    lane, plan = admit_query(enforce_limit(query))
+    if lane is None:
+        return plan
+
+    try:
+        with lane.slot():
+            with ConsoleSessionLocal() as db:
+                return execute_readonly_query(db, query)
+    except AdmissionRejected as e:
+        return {"error": str(e)}
+
+
+def open_console_stream(query: str, max_rows: Optional[int] = None):
+    # Like stream_readonly_query, on a console connection held (with its lane
+    # slot) until the batches are exhausted, fail or are closed
+    error = validate_query(query)
+    if error:
+        return {"error": error}
+
+    max_rows = min(max_rows or settings.SQL_STREAM_MAX_ROWS, settings.SQL_STREAM_MAX_ROWS)
+    lane, plan = admit_query(stream_query_text(query, max_rows))
+    if lane is None:
+        return plan
+
+    try:
+        lane.acquire()
+    except AdmissionRejected as e:
+        return {"error": str(e)}
+
+    db = ConsoleSessionLocal()
+
+    def close():
+        try:
+            db.close()
+        finally:
+            lane.release()
+
+    try:
+        result = stream_readonly_query(db, query, max_rows, on_close=close)
+    except BaseException:
+        close()
+        raise
+
+    if "error" in result:
+        close()
+        return result
+
+    return {**result, "plan": plan}
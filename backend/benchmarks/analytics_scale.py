@@ -0,0 +1,402 @@
+"""Analytics, experiment and churn functions at 10k / 100k / 1M rows.
+
+For each scale a scratch database (<name>_bench_<scale>) is created next to
+DATABASE_URL, migrated and seeded by app.scripts.seed_data. A child process
+pointed at it then times every service function and endpoint and reports
+p50/p95 latency, SQL statements per call and peak traced Python memory.
+Results are written as JSON; --compare diffs two result files and exits
+non-zero on regressions.
+
+    cd backend && python -m benchmarks.analytics_scale --scales 10k 100k --output bench.json
+    cd backend && python -m benchmarks.analytics_scale --compare baseline.json bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, NamedTuple, Optional
+
+import numpy as np
+from anyio.from_thread import start_blocking_portal
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from app.scripts.seed_data import EXPERIMENT
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+HISTORY_DAYS = 90
+
+
+class Case(NamedTuple):
+    name: str
+    group: str  # analytics | experiment | churn | endpoint
+    run: Callable[[], object]
+    route: Optional[str] = None  # endpoint cases: route template, for query counts
+    heavy: bool = False  # full scans: fewer repetitions
+
+
+# ---------------------------
+# Parent: scratch databases, one child process per scale
+# ---------------------------
+def bench_database_url(base_url: str, scale: str) -> str:
+    url = make_url(base_url)
+    return url.set(database=f"{url.database}_bench_{scale}").render_as_string(hide_password=False)
+
+def _admin(base_url: str, *statements):
+    admin = create_engine(base_url, isolation_level="AUTOCOMMIT")
+    try:
+        with admin.connect() as conn:
+            for statement in statements:
+                conn.execute(text(statement))
+    finally:
+        admin.dispose()
+
+def recreate_database(base_url: str, url: str):
+    name = make_url(url).database
+    _admin(base_url, f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)', f'CREATE DATABASE "{name}"')
+
+def drop_database(base_url: str, url: str):
+    _admin(base_url, f'DROP DATABASE IF EXISTS "{make_url(url).database}" WITH (FORCE)')
+
+def run_child(url: str, scale: str, args) -> dict:
+    env = {**os.environ, "DATABASE_URL": url}
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], env=env, check=True)
+
+    with tempfile.NamedTemporaryFile(suffix=".json") as output:
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.analytics_scale",
+             "--child", scale, "--child-output", output.name,
+             "--repeat", str(args.repeat), "--heavy-repeat", str(args.heavy_repeat),
+             "--seed", str(args.seed), "--workers", str(args.workers)],
+            env=env,
+            check=True
+        )
+        with open(output.name) as f:
+            return json.load(f)
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ---------------------------
+# Child: seed, prepare, measure
+# ---------------------------
+def seed_database(n_users: int, seed: int, workers: int) -> dict:
+    # About one event and one click per user, so each scale is N users and N events
+    from app.scripts.seed_data import GeneratorConfig, generate
+
+    config = GeneratorConfig(
+        users=n_users,
+        events_per_user=1,
+        links_per_user=0.01,
+        clicks_per_link=100,
+        days=HISTORY_DAYS,
+        seed=seed
+    )
+    return generate(config, workers)
+
+def benchmark_model():
+    import pandas as pd
+    from sklearn.linear_model import LogisticRegression
+
+    X = pd.DataFrame({
+        "total_events": [1, 2, 30, 40, 3, 25],
+        "days_since_last_event": [15, 12, 1, 0, 999, 2],
+        "experiment_exposed": [0, 1, 0, 1, 0, 1],
+    })
+    return LogisticRegression().fit(X, [1, 1, 0, 0, 1, 0])
+
+def prepare(db):
+    from app.ml_inference.churn_predictor import churn_predictor
+    from app.services.churn_scoring_service import update_all_churn_probabilities
+    from app.services.rollup_service import refresh_rollups
+
+    db.execute(text("ANALYZE"))
+    db.commit()
+    refresh_rollups(db)
+
+    # A fixed model, so timings don't depend on what's in the registry
+    churn_predictor.swap(benchmark_model(), "benchmark")
+    update_all_churn_probabilities(db, progress=lambda *_: None)
+
+    user_id = db.execute(text("SELECT user_id FROM events ORDER BY random() LIMIT 1")).scalar()
+    link_id = db.execute(text("SELECT link_id FROM clicks ORDER BY random() LIMIT 1")).scalar()
+    return {"user_id": user_id, "link_id": link_id}
+
+def cases(fixtures: dict, portal):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.core.database import SessionLocal, AsyncSessionLocal
+    from app.services import analytics_service as analytics
+    from app.services import experiment_service as experiments
+    from app.services import churn_scoring_service as churn
+
+    user_id, link_id = fixtures["user_id"], fixtures["link_id"]
+    today = date.today()
+
+    def service(fn, *args, **kwargs):
+        def run():
+            with SessionLocal() as db:
+                result = fn(db, *args, **kwargs)
+                if hasattr(result, "__next__"):
+                    for _ in result:
+                        pass
+        return run
+
+    def async_service(fn, *args):
+        async def call():
+            async with AsyncSessionLocal() as db:
+                await fn(db, *args)
+        return lambda: portal.call(call)
+
+    # No lifespan (the scheduler and click buffer stay off). Requests and
+    # async calls share one event loop, which the async engine's pooled
+    # connections are bound to.
+    client = TestClient(app)
+    client.portal = portal
+
+    def endpoint(method, path):
+        def run():
+            response = client.request(method, path)
+            response.read()
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method} {path}: {response.status_code}")
+        return run
+
+    yield Case("get_daily_active_users", "analytics", service(analytics.get_daily_active_users))
+    yield Case("get_daily_active_users[approx]", "analytics", service(analytics.get_daily_active_users, approx=True))
+    yield Case("get_approx_active_users[7d]", "analytics",
+               service(analytics.get_approx_active_users, today - timedelta(days=6), today))
+    yield Case("get_rolling_dau", "analytics", service(analytics.get_rolling_dau))
+    yield Case("get_rolling_dau[approx]", "analytics", service(analytics.get_rolling_dau, approx=True))
+    yield Case("get_mau", "analytics", service(analytics.get_mau))
+    yield Case("get_mau[approx]", "analytics", service(analytics.get_mau, approx=True))
+    yield Case("get_click_count_for_link", "analytics", service(analytics.get_click_count_for_link, link_id))
+    yield Case("get_top_links", "analytics", service(analytics.get_top_links))
+    yield Case("get_clicks_by_day", "analytics", service(analytics.get_clicks_by_day))
+    yield Case("get_event_counts_by_day", "analytics", service(analytics.get_event_counts_by_day))
+    yield Case("get_day1_retention", "analytics", service(analytics.get_day1_retention), heavy=True)
+    yield Case("get_cohort_retention[day]", "analytics", service(analytics.get_cohort_retention), heavy=True)
+    yield Case("get_cohort_retention[week]", "analytics",
+               service(analytics.get_cohort_retention, 4, "week"), heavy=True)
+    yield Case("get_user_experiment_flag", "analytics", service(analytics.get_user_experiment_flag, user_id))
+    yield Case("get_user_churn_features", "analytics", service(analytics.get_user_churn_features, user_id))
+    yield Case("iter_churn_features", "analytics", service(analytics.iter_churn_features), heavy=True)
+    yield Case("get_executive_metrics", "analytics", service(analytics.get_executive_metrics))
+    yield Case("get_executive_metrics_async", "analytics", async_service(analytics.get_executive_metrics_async))
+    yield Case("get_top_churn_risk_users", "analytics", service(analytics.get_top_churn_risk_users))
+
+    yield Case("load_experiment_config", "experiment", service(experiments.load_experiment_config, EXPERIMENT))
+    yield Case("assign_variant", "experiment", service(experiments.assign_variant, user_id, EXPERIMENT))
+    yield Case("evaluate_experiment", "experiment", service(experiments.evaluate_experiment, EXPERIMENT))
+    yield Case("churn_by_variant", "experiment", service(experiments.churn_by_variant, EXPERIMENT))
+
+    yield Case("update_churn_probabilities_incremental", "churn",
+               service(churn.update_churn_probabilities_incremental))
+    yield Case("update_all_churn_probabilities", "churn",
+               service(churn.update_all_churn_probabilities, progress=lambda *_: None), heavy=True)
+
+    for path, route, heavy in [
+        ("/api/v1/analytics/dau", "/api/v1/analytics/dau", False),
+        ("/api/v1/analytics/rolling-dau", "/api/v1/analytics/rolling-dau", False),
+        ("/api/v1/analytics/mau", "/api/v1/analytics/mau", False),
+        (f"/api/v1/analytics/links/{link_id}/clicks", "/api/v1/analytics/links/{link_id}/clicks", False),
+        ("/api/v1/analytics/top-links", "/api/v1/analytics/top-links", False),
+        ("/api/v1/analytics/clicks-by-day", "/api/v1/analytics/clicks-by-day", False),
+        ("/api/v1/analytics/events-by-day", "/api/v1/analytics/events-by-day", False),
+        ("/api/v1/analytics/retention/day1", "/api/v1/analytics/retention/day1", True),
+        ("/api/v1/analytics/retention/cohort", "/api/v1/analytics/retention/cohort", True),
+        ("/api/v1/analytics/churn/features?format=ndjson", "/api/v1/analytics/churn/features", True),
+        (f"/api/v1/analytics/churn/predict/{user_id}", "/api/v1/analytics/churn/predict/{user_id}", False),
+        ("/api/v1/analytics/churn/top-risk", "/api/v1/analytics/churn/top-risk", False),
+        ("/api/v1/analytics/executive", "/api/v1/analytics/executive", False),
+        (f"/api/v1/analytics/experiments/evaluate/{EXPERIMENT}",
+         "/api/v1/analytics/experiments/evaluate/{experiment_name}", False),
+        (f"/api/v1/analytics/experiments/churn-impact/{EXPERIMENT}",
+         "/api/v1/analytics/experiments/churn-impact/{experiment_name}", False),
+    ]:
+        yield Case(f"GET {route}", "endpoint", endpoint("GET", path), route=route, heavy=heavy)
+
+def _route_queries(route: str) -> float:
+    from prometheus_client import REGISTRY
+    return REGISTRY.get_sample_value("app_request_db_queries_sum", {"endpoint": route}) or 0.0
+
+def measure(case: Case, repeat: int) -> dict:
+    from app.core.metrics import QueryStats, current_query_stats
+
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    route_before = _route_queries(case.route) if case.route else 0.0
+    try:
+        case.run()  # warm-up (caches, plans, connections)
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            case.run()
+            timings.append(time.perf_counter() - start)
+    finally:
+        current_query_stats.reset(token)
+
+    # Endpoints run on the portal's thread: count through the request metric
+    # (recorded after the body, so streamed endpoints count every chunk's queries)
+    statements = stats.count
+    if case.route:
+        statements = _route_queries(case.route) - route_before
+
+    # Peak memory from a separate run: tracing slows everything down
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    ms = np.array(timings) * 1000
+    return {
+        "group": case.group,
+        "repeat": repeat,
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "queries": round(statements / (repeat + 1), 2),
+        "peak_memory_mb": round(peak / 2**20, 3),
+    }
+
+def child_main(args):
+    from app.core.database import SessionLocal
+
+    n_users = SCALES[args.child]
+
+    started = time.perf_counter()
+    rows = seed_database(n_users, args.seed, args.workers)
+    seed_seconds = time.perf_counter() - started
+    print(f"[{args.child}] seeded {rows} in {seed_seconds:.1f}s", file=sys.stderr)
+
+    with SessionLocal() as db:
+        fixtures = prepare(db)
+
+    results = {}
+    with start_blocking_portal() as portal:
+        for case in cases(fixtures, portal):
+            repeat = args.heavy_repeat if case.heavy else args.repeat
+            try:
+                results[case.name] = measure(case, repeat)
+            except Exception as e:
+                results[case.name] = {"group": case.group, "error": f"{type(e).__name__}: {e}"}
+            summary = results[case.name]
+            print(f"[{args.child}] {case.name}: {summary.get('p50_ms', summary.get('error'))}", file=sys.stderr)
+
+    with open(args.child_output, "w") as f:
+        json.dump({
+            "rows": rows,
+            "seed_seconds": round(seed_seconds, 2),
+            # Linux reports KiB
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "cases": results,
+        }, f)
+
+
+# ---------------------------
+# Comparing runs
+# ---------------------------
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    regressions = 0
+    print(f"{'scale':<6}{'case':<62}{'old p50':>10}{'new p50':>10}{'change':>9}{'queries':>12}")
+    for scale, new_scale in new["scales"].items():
+        old_cases = old.get("scales", {}).get(scale, {}).get("cases", {})
+        for name, result in new_scale["cases"].items():
+            before = old_cases.get(name)
+            if not before or "p50_ms" not in before or "p50_ms" not in result:
+                continue
+
+            change = result["p50_ms"] / before["p50_ms"] - 1 if before["p50_ms"] else 0.0
+            more_queries = result["queries"] > before["queries"]
+            flag = ""
+            if change > threshold or more_queries:
+                regressions += 1
+                flag = "  <-- regression"
+            print(
+                f"{scale:<6}{name[:60]:<62}{before['p50_ms']:>10.2f}{result['p50_ms']:>10.2f}"
+                f"{change:>+9.0%}{before['queries']:>6g}->{result['queries']:<5g}{flag}"
+            )
+
+    print(f"{regressions} regression(s) (p50 > +{threshold:.0%} or more queries per call)")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["10k", "100k"])
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per case")
+    parser.add_argument("--heavy-repeat", type=int, default=3, help="Timed runs per full-scan case")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Seeding processes")
+    parser.add_argument("--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--keep-databases", action="store_true", help="Keep the seeded databases for inspection")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown that counts as a regression")
+    parser.add_argument("--child", choices=list(SCALES), help=argparse.SUPPRESS)
+    parser.add_argument("--child-output", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+
+    if args.child:
+        child_main(args)
+        return
+
+    base_url = os.getenv("DATABASE_URL")
+    if not base_url:
+        raise RuntimeError("DATABASE_URL must be set")
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "repeat": args.repeat,
+        "heavy_repeat": args.heavy_repeat,
+        "seed": args.seed,
+        "scales": {},
+    }
+    for scale in args.scales:
+        url = bench_database_url(base_url, scale)
+        recreate_database(base_url, url)
+        try:
+            report["scales"][scale] = run_child(url, scale, args)
+        finally:
+            if not args.keep_databases:
+                drop_database(base_url, url)
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(f"Results written to {args.output}")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
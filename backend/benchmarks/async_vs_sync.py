@@ -0,0 +1,212 @@
+"""Sync vs async request path under high concurrency.
+
+Serves the hot endpoints (redirect, single event ingest with auth lookup,
+executive dashboard) twice with uvicorn: once with the old sync handlers on
+the threadpool, once with the async routers, and drives both with the same
+concurrent load.
+
+    cd backend && python -m benchmarks.async_vs_sync --concurrency 200 --requests 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+
+import httpx
+import numpy as np
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.responses import RedirectResponse
+from sqlalchemy.orm import Session
+
+from app.api.v1 import analytics, events, links
+from app.core.database import SessionLocal, get_db
+from app.core.dependencies import get_current_user
+from app.core.security import create_access_token
+from app.infrastructure.database.models import User
+from app.services.analytics_service import get_executive_metrics
+from app.services.click_service import click_buffer
+from app.services.event_service import log_event
+from app.services.link_service import create_short_link, resolve_short_code
+from app.services.user_service import create_user
+
+
+@asynccontextmanager
+async def buffered_clicks(app: FastAPI):
+    click_buffer.start()
+    yield
+    click_buffer.stop()
+
+
+# Async path: the application's own routers
+async_app = FastAPI(lifespan=buffered_clicks)
+async_app.include_router(links.router, prefix="/api/v1/links")
+async_app.include_router(events.router, prefix="/api/v1/events")
+async_app.include_router(analytics.router, prefix="/api/v1/analytics")
+
+
+# Sync path: the same endpoints as threadpool handlers on the sync engine
+sync_app = FastAPI(lifespan=buffered_clicks)
+
+
+@sync_app.get("/api/v1/links/{short_code}")
+def sync_redirect(short_code: str, request: Request, db: Session = Depends(get_db)):
+    link = resolve_short_code(db, short_code)
+    if not link:
+        raise HTTPException(status_code=404, detail="Link not found")
+
+    link_id, original_url = link
+    click_buffer.add(
+        link_id,
+        request.client.host if request.client else None,
+        request.headers.get("user-agent")
+    )
+    return RedirectResponse(str(original_url))
+
+
+@sync_app.post("/api/v1/events/")
+def sync_create_event(
+    event_type: str,
+    metadata: dict,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    event = log_event(db, current_user.id, event_type, metadata)
+    return {"id": str(event.id), "event_type": event.event_type}
+
+
+@sync_app.get("/api/v1/analytics/executive")
+def sync_executive(db: Session = Depends(get_db)):
+    return get_executive_metrics(db)
+
+
+APPS = {
+    "sync": "benchmarks.async_vs_sync:sync_app",
+    "async": "benchmarks.async_vs_sync:async_app",
+}
+
+
+def prepare_fixtures():
+    with SessionLocal() as db:
+        user = create_user(db, f"bench-{uuid.uuid4().hex[:12]}@bench.test", "Password123")
+        link = create_short_link(db, "https://example.com/benchmark", user.id)
+        return create_access_token({"sub": str(user.id)}), link.short_code
+
+
+def scenarios(token: str, short_code: str):
+    auth = {"Authorization": f"Bearer {token}"}
+    return {
+        "redirect": lambda client: client.get(f"/api/v1/links/{short_code}"),
+        "event_ingest": lambda client: client.post(
+            "/api/v1/events/?event_type=bench",
+            json={"source": "benchmark"},
+            headers=auth
+        ),
+        "executive": lambda client: client.get("/api/v1/analytics/executive"),
+    }
+
+
+async def run_load(base_url: str, send, concurrency: int, total: int):
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def one():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await send(client)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        # Warm up connections and caches before measuring
+        await asyncio.gather(*(one() for _ in range(min(concurrency, total))))
+        latencies.clear()
+        errors = 0
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        elapsed = time.perf_counter() - start
+
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+    }
+
+
+def start_server(target: str, port: int):
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env=os.environ.copy()
+    )
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/docs", timeout=1)
+            return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+
+    server.terminate()
+    raise RuntimeError(f"{target} did not start on port {port}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scenario", action="append", choices=["redirect", "event_ingest", "executive"])
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    token, short_code = prepare_fixtures()
+    selected = scenarios(token, short_code)
+    if args.scenario:
+        selected = {name: selected[name] for name in args.scenario}
+
+    results = {}
+    for mode, target in APPS.items():
+        server = start_server(target, args.port)
+        try:
+            for name, send in selected.items():
+                results.setdefault(name, {})[mode] = asyncio.run(
+                    run_load(f"http://127.0.0.1:{args.port}", send, args.concurrency, args.requests)
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        print(json.dumps({"concurrency": args.concurrency, "results": results}, indent=2))
+        return
+
+    print(f"concurrency={args.concurrency} requests={args.requests}")
+    print(f"{'scenario':<14}{'mode':<7}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, modes in results.items():
+        for mode, r in modes.items():
+            print(
+                f"{name:<14}{mode:<7}{r['throughput_rps']:>10}{r['p50_ms']:>10}"
+                f"{r['p95_ms']:>10}{r['p99_ms']:>10}{r['errors']:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,222 @@
+"""Out-of-core churn model training.
+
+Per-user features stream from Postgres through a server-side cursor in
+fixed-size chunks, once: the first pass spills them to a Parquet snapshot
+(temporary unless --snapshot keeps it for later runs), which every further
+pass reads. A StandardScaler and an SGD logistic regression are fitted
+incrementally with partial_fit, so peak memory depends on the chunk size,
+not on the number of users. The model is published as a new version in the
+model registry, and every serving process picks it up from there.
+
+    cd backend && python -m ml.training.churn_training [--snapshot PATH] [--refresh-snapshot]
+"""
+import argparse
+import itertools
 import os
 import pickle
+import shutil
+import tempfile
+import time
+from datetime import datetime, timezone
+import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
-from sklearn.linear_model import LogisticRegression
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-
-engine = create_engine(DATABASE_URL) # type: ignore
-
-query = """
-SELECT 
-    u.id as user_id,
-    COUNT(e.id) as total_events,
-    EXTRACT(DAY FROM NOW() - MAX(e.timestamp)) as days_since_last_event,
-    CASE WHEN a.user_id IS NOT NULL THEN 1 ELSE 0 END as experiment_exposed
-FROM users u
-LEFT JOIN events e ON u.id = e.user_id
-LEFT JOIN assignments a ON u.id = a.user_id
-GROUP BY u.id, a.user_id
-"""
+import sklearn
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import log_loss
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+FEATURE_COLUMNS = ["total_events", "days_since_last_event", "experiment_exposed"]
+LABEL_COLUMN = "churned"
+CLASSES = np.array([0, 1])
+
+MODEL_PATH = os.path.join("ml", "models", "churn_model.pkl")
+DEFAULT_CHUNK_SIZE = 50000
+DEFAULT_EPOCHS = 5
+
+
+def _database_chunks(chunk_size: int):
+    # Correctly aggregated features (one row per user), read with yield_per
+    from app.core.database import SessionLocal
+    from app.services.analytics_service import iter_churn_features
+
+    with SessionLocal() as db:
+        rows = iter_churn_features(db, chunk_size=chunk_size)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield pd.DataFrame.from_records(chunk, columns=FEATURE_COLUMNS + [LABEL_COLUMN])
+
+
+def _snapshot_chunks(path: str, chunk_size: int):
+    import pyarrow.parquet as pq
+
+    snapshot = pq.ParquetFile(path)
+    for batch in snapshot.iter_batches(batch_size=chunk_size, columns=FEATURE_COLUMNS + [LABEL_COLUMN]):
+        yield batch.to_pandas()
+
+
+def write_snapshot(chunks, path: str):
+    # Passes chunks through while writing them to a Parquet file, one row group each
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    partial = path + ".partial"
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(partial, table.schema)
+            writer.write_table(table)
+            yield chunk
+    finally:
+        if writer is not None:
+            writer.close()
+
+    # Only a complete snapshot replaces the previous one
+    if writer is not None:
+        os.replace(partial, path)
+
+
+class FeatureSource:
+    # Re-iterable chunks: the first pass reads the database once and spills it
+    # to a Parquet snapshot, later passes (scaler, then every epoch) read the
+    # snapshot, so they all see the same data. Without `snapshot` the spill
+    # goes to a temporary file that close() removes.
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, snapshot=None, refresh_snapshot: bool = False):
+        self.chunk_size = chunk_size
+        self._temporary_dir = None
+        if not snapshot:
+            self._temporary_dir = tempfile.mkdtemp(prefix="churn-features-")
+            snapshot = os.path.join(self._temporary_dir, "features.parquet")
+        self.snapshot = snapshot
+        self.use_snapshot = os.path.exists(snapshot) and not refresh_snapshot
+
+    def chunks(self):
+        if self.use_snapshot:
+            yield from _snapshot_chunks(self.snapshot, self.chunk_size)
+            return
+
+        yield from write_snapshot(_database_chunks(self.chunk_size), self.snapshot)
+        self.use_snapshot = True
+
+    def close(self):
+        if self._temporary_dir is not None:
+            shutil.rmtree(self._temporary_dir, ignore_errors=True)
+            self._temporary_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def train(source: FeatureSource, epochs: int = DEFAULT_EPOCHS, random_state: int = 0):
+    scaler = StandardScaler()
+    classifier = SGDClassifier(loss="log_loss", alpha=1e-4, random_state=random_state)
+    rng = np.random.default_rng(random_state)
+
+    # 1️⃣ Feature scaling statistics in one pass
+    users = 0
+    for chunk in source.chunks():
+        scaler.partial_fit(chunk[FEATURE_COLUMNS])
+        users += len(chunk)
+
+    if users == 0:
+        raise RuntimeError("No users to train on")
+
+    # 2️⃣ Incremental fit, chunk by chunk, shuffled within each chunk
+    loss = correct = positives = scored = 0.0
+    for epoch in range(epochs):
+        last_epoch = epoch == epochs - 1
+        for chunk in source.chunks():
+            chunk = chunk.iloc[rng.permutation(len(chunk))]
+            X = scaler.transform(chunk[FEATURE_COLUMNS])
+            y = chunk[LABEL_COLUMN].to_numpy()
+
+            # 3️⃣ Progressive validation: score each chunk of the last epoch
+            # before fitting it, so metrics need no extra pass
+            if last_epoch and hasattr(classifier, "coef_"):
+                p = classifier.predict_proba(X)[:, 1]
+                loss += log_loss(y, p, labels=CLASSES) * len(y)
+                correct += float(((p >= 0.5) == y).sum())
+                scored += len(y)
+            if last_epoch:
+                positives += float(y.sum())
+
+            classifier.partial_fit(X, y, classes=CLASSES)
+
+    metrics = {
+        "log_loss": round(loss / scored, 6) if scored else None,
+        "accuracy": round(correct / scored, 6) if scored else None,
+        "churn_rate": round(positives / users, 6),
+    }
+
+    print(f"Trained on {users} users ({epochs} epochs):", metrics)
+    model = Pipeline([("scaler", scaler), ("classifier", classifier)])
+    return model, {"rows": users, "epochs": epochs, "metrics": metrics}
+
+
+def save_model(model, path: str = MODEL_PATH):
+    # Written next to the target and renamed, so readers never see a partial file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + ".partial"
+    with open(partial, "wb") as f:
+        pickle.dump(model, f)
+    os.replace(partial, path)
+
+
+def train_and_publish(
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    epochs: int = DEFAULT_EPOCHS,
+    snapshot=None,
+    refresh_snapshot: bool = False
+) -> dict:
+    # Entry point for the scheduler's training process: returns the metadata
+    # of the version it published
+    from app.ml_inference.model_registry import model_registry
+
+    started = time.perf_counter()
+    with FeatureSource(chunk_size, snapshot, refresh_snapshot) as source:
+        model, stats = train(source, epochs)
 
-df = pd.read_sql(query, engine)
+    metadata = {
+        **stats,
+        "trained_at": datetime.now(timezone.utc).isoformat(),
+        "training_seconds": round(time.perf_counter() - started, 3),
+        "chunk_size": chunk_size,
+        "features": FEATURE_COLUMNS,
+        "estimator": type(model.steps[-1][1]).__name__,
+        "sklearn_version": sklearn.__version__,
+        "snapshot": snapshot,
+    }
+    version = model_registry.publish(model, metadata)
+    return model_registry.metadata(version)
 
-df["days_since_last_event"] = df["days_since_last_event"].fillna(999)
-df["churned"] = (df["days_since_last_event"] > 7).astype(int)
 
-X = df[["total_events", "days_since_last_event", "experiment_exposed"]]
-y = df["churned"]
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--epochs", type=int, default=DEFAULT_EPOCHS)
+    parser.add_argument("--snapshot", help="Keep the Parquet feature snapshot here, reusing it if it exists")
+    parser.add_argument("--refresh-snapshot", action="store_true", help="Rebuild the snapshot from the database")
+    parser.add_argument("--output", help="Write a plain pickle here instead of publishing to the registry")
+    args = parser.parse_args()
 
-model = LogisticRegression()
-model.fit(X, y)
+    if args.output:
+        with FeatureSource(args.chunk_size, args.snapshot, args.refresh_snapshot) as source:
+            model, _ = train(source, args.epochs)
+        save_model(model, args.output)
+        print("Churn model trained and saved to", args.output)
+        return
 
-os.makedirs("ml/models", exist_ok=True)
+    metadata = train_and_publish(args.chunk_size, args.epochs, args.snapshot, args.refresh_snapshot)
+    print(f"Churn model {metadata['version']} published.")
 
-with open("ml/models/churn_model.pkl", "wb") as f:
-    pickle.dump(model, f)
 
-print("Churn model trained and saved.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os
+
+# TestClient runs every request on its own event loop, so pooled asyncpg
+# connections can't be reused across requests
+os.environ.setdefault("DB_NULL_POOL", "true")
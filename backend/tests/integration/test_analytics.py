@@ -0,0 +1,70 @@
+import json
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+def test_cohort_retention_granularities():
+    for granularity in ["day", "week", "month"]:
+        response = client.get(
+            f"/api/v1/analytics/retention/cohort?max_days=3&granularity={granularity}"
+        )
+        assert response.status_code == 200
+
+        for periods in response.json().values():
+            assert list(periods) == [f"{granularity}_{n}" for n in range(4)]
+
+def test_cohort_retention_rejects_unknown_granularity():
+    response = client.get("/api/v1/analytics/retention/cohort?granularity=year")
+    assert response.status_code == 422
+
+def test_churn_features_streams_ndjson_and_csv():
+    response = client.get("/api/v1/analytics/churn/features?format=ndjson")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    for row in rows:
+        assert set(row) == {
+            "user_id", "total_events", "days_since_last_event",
+            "experiment_exposed", "churned"
+        }
+
+    response = client.get("/api/v1/analytics/churn/features?format=csv")
+    assert response.status_code == 200
+
+    lines = response.text.splitlines()
+    assert lines[0] == "user_id,total_events,days_since_last_event,experiment_exposed,churned"
+    assert len(lines) == len(rows) + 1
+
+    response = client.get("/api/v1/analytics/churn/features")
+    assert len(response.json()) == len(rows)
+
+def test_executive_dashboard_reports_server_timing():
+    response = client.get("/api/v1/analytics/executive")
+    assert response.status_code == 200
+
+    assert set(response.json()) == {
+        "total_users", "daily_active_users", "monthly_active_users",
+        "average_churn_probability", "high_risk_users"
+    }
+
+    phases = [part.split(";")[0] for part in response.headers["server-timing"].split(", ")]
+    assert phases == ["db", "app", "total"]
+
+def test_evaluate_experiment_compares_variants_to_control():
+    response = client.get("/api/v1/analytics/experiments/evaluate/button_test?control=A")
+    assert response.status_code == 200
+    body = response.json()
+
+    names = [v["variant_name"] for v in body["variants"]]
+    assert body["control"] == "A"
+    assert [c["variant_name"] for c in body["comparisons"]] == [n for n in names if n != "A"]
+    assert body["omnibus"]["dof"] == len(names) - 1
+    if len(names) == 2:
+        assert body["p_value"] == body["comparisons"][0]["p_value"]
+
+def test_evaluate_experiment_unknown_experiment_and_control():
+    assert client.get("/api/v1/analytics/experiments/evaluate/missing").json() == {"error": "Experiment not found"}
+    response = client.get("/api/v1/analytics/experiments/evaluate/button_test?control=Z")
+    assert "error" in response.json()
@@ -0,0 +1,122 @@
+from datetime import timedelta
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.linear_model import LogisticRegression
+from app.main import app
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.infrastructure.database.models import ChurnFeatures, User
+from app.ml_inference import churn_predictor as predictor_module
+from app.ml_inference.churn_predictor import ChurnPredictor
+from app.services.churn_scoring_service import (
+    get_churn_watermark,
+    update_all_churn_probabilities,
+    update_churn_probabilities_incremental
+)
+
+client = TestClient(app)
+
+def fit_model():
+    X = pd.DataFrame({
+        "total_events": [1, 2, 30, 40, 3, 25],
+        "days_since_last_event": [15, 12, 1, 0, 999, 2],
+        "experiment_exposed": [0, 1, 0, 1, 0, 1],
+    })
+    return LogisticRegression().fit(X, [1, 1, 0, 0, 1, 0])
+
+@pytest.fixture
+def predictor(monkeypatch):
+    predictor = ChurnPredictor(load=False)
+    predictor.swap(fit_model(), "v1")
+    monkeypatch.setattr(predictor_module, "churn_predictor", predictor)
+    monkeypatch.setattr(settings, "CHURN_WATERMARK_LAG_SECONDS", 0)
+    monkeypatch.setattr(settings, "ROLLUP_LOOKBACK_DAYS", 0)
+    return predictor
+
+def signup(email):
+    credentials = {"email": email, "password": "Password123"}
+    client.post("/api/v1/auth/signup", json=credentials)
+    token = client.post("/api/v1/auth/login", json=credentials).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def stored(db, email):
+    return (
+        db.query(ChurnFeatures, User.churn_probability)
+        .join(User, User.id == ChurnFeatures.user_id)
+        .filter(User.email == email)
+        .one()
+    )
+
+def test_incremental_scoring_rescores_active_users_and_ages_the_rest(predictor):
+    with SessionLocal() as db:
+        full = update_all_churn_probabilities(db)
+        total_users = db.query(User).count()
+        assert full["updated_users"] == total_users
+        assert db.query(ChurnFeatures).count() == total_users
+        assert get_churn_watermark(db).model_version == "v1"
+
+    headers = signup("churn-incremental@test.com")
+    for _ in range(3):
+        client.post("/api/v1/events/?event_type=page_view", json={}, headers=headers)
+
+    with SessionLocal() as db:
+        # Only the new, active user is recomputed from events
+        result = update_churn_probabilities_incremental(db)
+        assert result["mode"] == "incremental"
+        assert result["rescored_users"] == 1
+        assert not result["model_changed"]
+
+        features, probability = stored(db, "churn-incremental@test.com")
+        assert features.total_events == 3
+        assert features.days_since_last_event == 0
+        assert probability == predictor.predict(3, 0)
+
+        # Three days pass without activity: aged from the stored features
+        features.last_event_at -= timedelta(days=3)
+        features.next_age_at -= timedelta(days=3)
+        db.commit()
+
+        result = update_churn_probabilities_incremental(db)
+        assert result["rescored_users"] == 0
+        assert result["aged_users"] >= 1
+
+        features, probability = stored(db, "churn-incremental@test.com")
+        assert features.days_since_last_event == 3
+        assert probability == predictor.predict(3, 3)
+
+        # Nothing new: nothing to do, and the stored age is not due again for a day
+        result = update_churn_probabilities_incremental(db)
+        assert result["rescored_users"] == result["aged_users"] == 0
+        db.refresh(features)
+        assert features.next_age_at == features.last_event_at + timedelta(days=4)
+
+def test_due_rows_leave_the_due_set_even_if_their_age_held(predictor):
+    headers = signup("churn-stale-due@test.com")
+    client.post("/api/v1/events/?event_type=page_view", json={}, headers=headers)
+
+    with SessionLocal() as db:
+        update_churn_probabilities_incremental(db)
+        features, _ = stored(db, "churn-stale-due@test.com")
+        assert features.days_since_last_event == 0
+
+        # Due, but still the same whole-day age
+        features.next_age_at = features.last_event_at
+        db.commit()
+
+        assert update_churn_probabilities_incremental(db)["aged_users"] == 1
+        db.refresh(features)
+        assert features.days_since_last_event == 0
+        assert features.next_age_at == features.last_event_at + timedelta(days=1)
+
+        assert update_churn_probabilities_incremental(db)["aged_users"] == 0
+
+def test_model_change_rescores_all_stored_features(predictor):
+    with SessionLocal() as db:
+        update_all_churn_probabilities(db)
+        predictor.swap(fit_model(), "v2")
+
+        result = update_churn_probabilities_incremental(db)
+        assert result["model_changed"]
+        assert result["aged_users"] == db.query(ChurnFeatures).count()
+        assert get_churn_watermark(db).model_version == "v2"
@@ -0,0 +1,100 @@
+import json
+from datetime import datetime, timedelta, timezone
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def auth_headers():
+    credentials = {"email": "events@test.com", "password": "Password123"}
+    client.post("/api/v1/auth/signup", json=credentials)
+    token = client.post("/api/v1/auth/login", json=credentials).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_batch_json_array_reports_per_item_errors(auth_headers):
+    events = [
+        {"event_type": "page_view", "metadata": {"page": "home\twith\ttabs"}},
+        {"event_type": "login", "timestamp": (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()},
+        {"metadata": {"missing": "event_type"}},
+        {"event_type": "page_view", "timestamp": "not-a-date"},
+    ]
+
+    response = client.post("/api/v1/events/batch", json=events, headers=auth_headers)
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["inserted"] == 2
+    assert [e["index"] for e in body["errors"]] == [2, 3]
+
+def test_batch_ndjson(auth_headers):
+    lines = [
+        json.dumps({"event_type": "feature_use", "metadata": {"feature": "export"}}),
+        "{not json",
+        json.dumps({"event_type": "feature_use"}),
+    ]
+
+    response = client.post(
+        "/api/v1/events/batch",
+        content="\n".join(lines),
+        headers={**auth_headers, "Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["inserted"] == 2
+    assert [e["index"] for e in body["errors"]] == [1]
+
+def test_batch_rejects_nul_characters_per_item(auth_headers):
+    events = [
+        {"event_type": "page_view", "metadata": {"page": "home"}},
+        {"event_type": "page\u0000view"},
+        {"event_type": "search", "metadata": {"query": ["ok", "bad\u0000"]}},
+        {"event_type": "search", "metadata": {"nul\u0000key": 1}},
+    ]
+
+    response = client.post("/api/v1/events/batch", json=events, headers=auth_headers)
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["inserted"] == 1
+    assert [e["index"] for e in body["errors"]] == [1, 2, 3]
+    assert all("NUL" in e["error"] for e in body["errors"])
+
+def test_batch_rejects_timestamps_outside_the_rollup_window(auth_headers):
+    now = datetime.now(timezone.utc)
+    events = [
+        {"event_type": "login", "timestamp": (now - timedelta(days=1)).isoformat()},
+        {"event_type": "login", "timestamp": (now - timedelta(days=30)).isoformat()},
+        {"event_type": "login", "timestamp": (now + timedelta(days=400)).isoformat()},
+    ]
+
+    response = client.post("/api/v1/events/batch", json=events, headers=auth_headers)
+    assert response.status_code == 200
+
+    body = response.json()
+    assert body["inserted"] == 1
+    assert [e["index"] for e in body["errors"]] == [1, 2]
+    assert all(e["error"].startswith("timestamp:") for e in body["errors"])
+
+def test_batch_rejects_non_array_body(auth_headers):
+    response = client.post("/api/v1/events/batch", json={"event_type": "x"}, headers=auth_headers)
+    assert response.status_code == 400
+
+def test_single_event(auth_headers):
+    response = client.post(
+        "/api/v1/events/?event_type=login",
+        json={"source": "test"},
+        headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json()["event_type"] == "login"
+
+def test_invalid_token_is_rejected():
+    response = client.post(
+        "/api/v1/events/batch",
+        json=[{"event_type": "login"}],
+        headers={"Authorization": "Bearer not-a-token"}
+    )
+    assert response.status_code == 401
@@ -0,0 +1,60 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.infrastructure.database.models import Assignment, User, Variant
+from app.services.experiment_service import assign_variant
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def auth_headers():
+    credentials = {"email": "experiments@test.com", "password": "Password123"}
+    client.post("/api/v1/auth/signup", json=credentials)
+    token = client.post("/api/v1/auth/login", json=credentials).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_assignment_is_sticky_and_recorded_once(auth_headers):
+    first = client.post("/api/v1/analytics/experiments/assign/button_test", headers=auth_headers)
+    second = client.post("/api/v1/analytics/experiments/assign/button_test", headers=auth_headers)
+
+    assert first.status_code == 200
+    assert first.json() == second.json()
+
+    with SessionLocal() as db:
+        assignments = (
+            db.query(Assignment.variant_id)
+            .join(User, User.id == Assignment.user_id)
+            .filter(User.email == "experiments@test.com")
+            .all()
+        )
+    assert [str(variant_id) for (variant_id,) in assignments] == [first.json()["variant_id"]]
+
+def test_unknown_experiment(auth_headers):
+    response = client.post("/api/v1/analytics/experiments/assign/missing", headers=auth_headers)
+    assert response.json() == {"error": "Experiment not found"}
+
+@pytest.fixture(scope="module")
+def legacy_user():
+    # Assigned before hash bucketing, to the variant the hash would not pick
+    credentials = {"email": "legacy-assignment@test.com", "password": "Password123"}
+    client.post("/api/v1/auth/signup", json=credentials)
+    token = client.post("/api/v1/auth/login", json=credentials).json()["access_token"]
+
+    with SessionLocal() as db:
+        user_id = db.query(User.id).filter(User.email == credentials["email"]).scalar()
+        experiment_id, hashed = assign_variant(db, user_id, "button_test")
+        other = db.query(Variant.id).filter(Variant.experiment_id == experiment_id, Variant.id != hashed).first()[0]
+        db.add(Assignment(user_id=user_id, experiment_id=experiment_id, variant_id=other))
+        db.commit()
+
+    return {"Authorization": f"Bearer {token}"}, str(other)
+
+@pytest.mark.parametrize("write_mode", ["async", "sync", "off"])
+def test_recorded_assignment_wins_over_hash_bucket(legacy_user, write_mode, monkeypatch):
+    monkeypatch.setattr(settings, "EXPERIMENT_ASSIGNMENT_WRITE", write_mode)
+    headers, recorded = legacy_user
+
+    response = client.post("/api/v1/analytics/experiments/assign/button_test", headers=headers)
+    assert response.json() == {"variant_id": recorded}
@@ -0,0 +1,35 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.database import SessionLocal
+from app.infrastructure.database.models import Link
+from app.services.analytics_service import get_click_count_for_link
+
+client = TestClient(app)
+
+def auth_headers():
+    credentials = {"email": "links@test.com", "password": "Password123"}
+    client.post("/api/v1/auth/signup", json=credentials)
+    token = client.post("/api/v1/auth/login", json=credentials).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_redirect_records_click():
+    response = client.post(
+        "/api/v1/links/",
+        json={"original_url": "https://example.com/landing"},
+        headers=auth_headers()
+    )
+    assert response.status_code == 200
+    short_code = response.json()["short_code"]
+
+    response = client.get(f"/api/v1/links/{short_code}", follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"] == "https://example.com/landing"
+
+    # Outside the app lifespan the click buffer writes through
+    with SessionLocal() as db:
+        link = db.query(Link).filter(Link.short_code == short_code).one()
+        assert get_click_count_for_link(db, link.id) == 1
+
+def test_unknown_short_code_returns_404():
+    response = client.get("/api/v1/links/does-not-exist", follow_redirects=False)
+    assert response.status_code == 404
@@ -0,0 +1,54 @@
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from app.main import app
+
+client = TestClient(app)
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+def test_requests_are_labelled_by_route_template():
+    template = "/api/v1/links/{short_code}"
+    before = sample("app_requests_total", method="GET", endpoint=template, http_status="404")
+
+    for code in ("missing-a", "missing-b", "missing-c"):
+        client.get(f"/api/v1/links/{code}", follow_redirects=False)
+
+    assert sample("app_requests_total", method="GET", endpoint=template, http_status="404") == before + 3
+    assert sample("app_requests_total", method="GET", endpoint="/api/v1/links/missing-a", http_status="404") == 0
+
+def test_unmatched_paths_share_one_label():
+    before = sample("app_requests_total", method="GET", endpoint="unmatched", http_status="404")
+    client.get("/no/such/route")
+    assert sample("app_requests_total", method="GET", endpoint="unmatched", http_status="404") == before + 1
+
+def test_db_time_is_recorded_per_request_and_service():
+    endpoint = "/api/v1/analytics/mau"
+    queries_before = sample("app_request_db_queries_sum", endpoint=endpoint)
+    requests_before = sample("app_request_db_queries_count", endpoint=endpoint)
+    service_before = sample("db_query_duration_seconds_count", service="analytics_service.get_mau")
+
+    assert client.get(endpoint).status_code == 200
+
+    assert sample("app_request_db_queries_count", endpoint=endpoint) == requests_before + 1
+    assert sample("app_request_db_queries_sum", endpoint=endpoint) > queries_before
+    assert sample("app_request_db_seconds_sum", endpoint=endpoint) > 0
+    assert sample("db_query_duration_seconds_count", service="analytics_service.get_mau") > service_before
+
+def test_async_queries_are_attributed_to_their_service():
+    service = "analytics_service.get_executive_metrics_async"
+    before = sample("db_query_duration_seconds_count", service=service)
+
+    assert client.get("/api/v1/analytics/executive").status_code == 200
+
+    assert sample("db_query_duration_seconds_count", service=service) > before
+
+def test_queries_made_while_streaming_are_counted():
+    endpoint = "/api/v1/analytics/churn/features"
+    queries_before = sample("app_request_db_queries_sum", endpoint=endpoint)
+
+    # The endpoint returns before its generator runs a single query
+    response = client.get(endpoint, params={"format": "ndjson"})
+    assert response.status_code == 200
+
+    assert sample("app_request_db_queries_sum", endpoint=endpoint) > queries_before
@@ -0,0 +1,62 @@
+import re
+import pytest
+from datetime import datetime, timezone
+from sqlalchemy import text
+from app.core.database import SessionLocal
+from app.services.partition_service import (
+    add_months,
+    partition_name,
+    list_partitions,
+    create_partition,
+    ensure_future_partitions,
+    expire_partitions
+)
+
+def test_future_partitions_exist():
+    with SessionLocal() as db:
+        ensure_future_partitions(db, months_ahead=2)
+        current = datetime.now(timezone.utc).date().replace(day=1)
+
+        for table in ("events", "clicks"):
+            partitions = list_partitions(db, table)
+            for offset in range(3):
+                assert partition_name(table, add_months(current, offset)) in partitions
+
+def test_expired_partitions_are_detached():
+    with SessionLocal() as db:
+        old_month = add_months(datetime.now(timezone.utc).date().replace(day=1), -120)
+        assert create_partition(db, "clicks", old_month)
+        db.commit()
+
+        expired = expire_partitions(db, retention_months=24, action="drop")
+
+        assert partition_name("clicks", old_month) in expired
+        assert partition_name("clicks", old_month) not in list_partitions(db, "clicks")
+
+def test_unknown_retention_action_is_rejected():
+    with SessionLocal() as db:
+        old_month = add_months(datetime.now(timezone.utc).date().replace(day=1), -121)
+        assert create_partition(db, "clicks", old_month)
+        db.commit()
+
+        with pytest.raises(ValueError, match="retention action"):
+            expire_partitions(db, retention_months=24, action="Drop")
+
+        # Nothing was detached
+        assert partition_name("clicks", old_month) in list_partitions(db, "clicks")
+        expire_partitions(db, retention_months=24, action="drop")
+
+def test_queries_prune_partitions():
+    with SessionLocal() as db:
+        plan = db.execute(text(
+            "EXPLAIN SELECT count(*) FROM events "
+            "WHERE timestamp >= date_trunc('month', now()) AND timestamp < date_trunc('month', now()) + interval '1 day'"
+        )).scalars().all()
+        scanned = {
+            match.group(1)
+            for line in plan
+            for match in re.finditer(r" on (events_(?:p\d{4}_\d{2}|default))\b", line)
+        }
+
+        # Only the current month's partition is left after pruning
+        assert len(scanned) <= 1
@@ -0,0 +1,55 @@
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, exc
+from sqlalchemy.pool import NullPool
+from app.core.database import DATABASE_URL, InstrumentedQueuePool, advisory_lock, instrument_pool, lock_engine
+from app.core.config import settings
+
+def sample(name, pool):
+    return REGISTRY.get_sample_value(name, {"pool": pool}) or 0
+
+@pytest.fixture
+def small_engine(monkeypatch):
+    # The test session runs with DB_NULL_POOL, which skips instrumentation
+    monkeypatch.setattr(settings, "DB_NULL_POOL", False)
+    engine = create_engine(
+        DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        pool_logging_name="test",
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05
+    )
+    instrument_pool(engine, "test")
+    yield engine
+    engine.dispose()
+
+def test_pool_metrics_track_checkouts_and_timeouts(small_engine):
+    waits_before = sample("db_pool_wait_seconds_count", "test")
+    timeouts_before = sample("db_pool_timeouts_total", "test")
+
+    first = small_engine.connect()
+    second = small_engine.connect()
+    assert sample("db_pool_checked_out", "test") == 2
+    assert sample("db_pool_overflow", "test") == 1
+
+    with pytest.raises(exc.TimeoutError):
+        small_engine.connect()
+    assert sample("db_pool_timeouts_total", "test") == timeouts_before + 1
+
+    second.close()
+    first.close()
+    assert sample("db_pool_checked_out", "test") == 0
+    assert sample("db_pool_wait_seconds_count", "test") == waits_before + 3
+
+def test_advisory_lock_is_exclusive_and_stays_out_of_the_app_pool():
+    # Held on its own unpooled connection, not one of the application's
+    assert isinstance(lock_engine.pool, NullPool)
+
+    with advisory_lock("test_pool_lock") as acquired:
+        assert acquired
+        with advisory_lock("test_pool_lock") as again:
+            assert not again
+
+    with advisory_lock("test_pool_lock") as acquired:
+        assert acquired
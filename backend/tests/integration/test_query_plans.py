@@ -0,0 +1,77 @@
+import json
+import re
+from contextlib import contextmanager
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import event
+from app.core.database import SessionLocal, engine
+from app.infrastructure.database.models import Click, Link, User
+from app.services.analytics_service import (
+    get_daily_active_users,
+    get_day1_retention,
+    get_click_count_for_link,
+    get_user_churn_features,
+    get_rolling_dau
+)
+
+# Parent tables and their monthly/default partitions
+HOT_TABLE = re.compile(r"^(events|clicks|users)(_p\d{4}_\d{2}|_default)?$")
+
+@contextmanager
+def captured_statements():
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+def unindexed_scans(db, statements):
+    # A hot-table scan counts as indexed only if an index condition narrows it;
+    # full index scans (used just for ordering) are as bad as seq scans here.
+    cursor = db.connection().connection.cursor()
+    cursor.execute("SET LOCAL enable_seqscan = off")
+
+    tables = set()
+    for statement, parameters in statements:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + statement, parameters)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        for node in plan_nodes(plan[0]["Plan"]):
+            if not HOT_TABLE.match(node.get("Relation Name", "")):
+                continue
+            if "Index Cond" not in node and "Recheck Cond" not in node:
+                tables.add(node["Relation Name"])
+    return tables
+
+@pytest.mark.parametrize("query", [
+    lambda db, ids: get_daily_active_users(db, date.today() + timedelta(days=1)),
+    lambda db, ids: get_rolling_dau(db, 7),
+    lambda db, ids: get_day1_retention(db),
+    lambda db, ids: get_click_count_for_link(db, ids["link_id"]),
+    lambda db, ids: get_user_churn_features(db, ids["user_id"]),
+])
+def test_hot_queries_use_indexes(query):
+    with SessionLocal() as db:
+        ids = {
+            "link_id": db.query(Link.id).join(Click, Click.link_id == Link.id).limit(1).scalar(),
+            "user_id": db.query(User.id).limit(1).scalar(),
+        }
+        if None in ids.values():
+            pytest.skip("requires a seeded database")
+
+        with captured_statements() as statements:
+            query(db, ids)
+
+        assert statements
+        assert unindexed_scans(db, statements) == set()
@@ -0,0 +1,89 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+
+client = TestClient(app)
+
+ADMIN = {"email": "profiling-admin@test.com", "password": "Password123"}
+MEMBER = {"email": "profiling-member@test.com", "password": "Password123"}
+
+def token_headers(credentials):
+    client.post("/api/v1/auth/signup", json=credentials)
+    token = client.post("/api/v1/auth/login", json=credentials).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture(scope="module")
+def admin():
+    return token_headers(ADMIN)
+
+@pytest.fixture(scope="module")
+def member():
+    return token_headers(MEMBER)
+
+@pytest.fixture
+def profiling(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", frozenset([ADMIN["email"]]))
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "PROFILING_MODE", "header")
+    monkeypatch.setattr(settings, "PROFILE_REPEATED_QUERY_THRESHOLD", 0)
+
+def test_admin_request_is_profiled_and_saved(profiling, admin):
+    response = client.get("/api/v1/analytics/mau", headers={**admin, "X-Debug-Profile": "1"})
+
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+    assert int(response.headers["X-Profile-Statements"]) >= 1
+    assert "db;dur=" in response.headers["Server-Timing"]
+
+    summary = client.get(f"/api/v1/debug/profiles/{profile_id}", headers=admin).json()
+    assert summary["route"] == "/api/v1/analytics/mau"
+    assert summary["db"]["statements"] == int(response.headers["X-Profile-Statements"])
+    # Threshold 0: every shape counts as repeated
+    assert summary["warnings"]
+
+    folded = client.get(f"/api/v1/debug/profiles/{profile_id}/folded", headers=admin)
+    assert folded.status_code == 200
+    assert folded.headers["content-type"].startswith("text/plain")
+
+def test_streamed_statements_are_in_the_saved_profile(profiling, admin):
+    response = client.get(
+        "/api/v1/analytics/churn/features",
+        params={"format": "ndjson"},
+        headers={**admin, "X-Debug-Profile": "1"}
+    )
+    assert response.status_code == 200
+
+    # The endpoint returns before its generator queries anything
+    assert response.headers["X-Profile-Statements"] == "0"
+    summary = client.get(f"/api/v1/debug/profiles/{response.headers['X-Profile-Id']}", headers=admin).json()
+    assert summary["db"]["statements"] >= 1
+
+def test_only_the_newest_profiles_are_kept(profiling, admin, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "PROFILE_KEEP", 2)
+
+    ids = []
+    for _ in range(3):
+        response = client.get("/api/v1/analytics/mau", headers={**admin, "X-Debug-Profile": "1"})
+        ids.append(response.headers["X-Profile-Id"])
+
+    assert client.get(f"/api/v1/debug/profiles/{ids[0]}", headers=admin).status_code == 404
+    assert client.get(f"/api/v1/debug/profiles/{ids[2]}", headers=admin).status_code == 200
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+        f"{profile_id}.{suffix}" for profile_id in ids[1:] for suffix in ("json", "folded")
+    )
+
+def test_profiling_is_admin_only(profiling, member):
+    response = client.get("/api/v1/analytics/mau", headers={**member, "X-Debug-Profile": "1"})
+
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+
+    assert client.get(f"/api/v1/debug/profiles/{'0' * 32}", headers=member).status_code == 403
+
+def test_unprofiled_without_header(profiling, admin):
+    response = client.get("/api/v1/analytics/mau", headers=admin)
+    assert "X-Profile-Id" not in response.headers
+
+def test_unknown_profile(profiling, admin):
+    assert client.get("/api/v1/debug/profiles/not-an-id", headers=admin).status_code == 404
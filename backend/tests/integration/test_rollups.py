@@ -0,0 +1,48 @@
+from datetime import date, timedelta
+from app.core.database import SessionLocal
+from app.services.analytics_service import (
+    get_daily_active_users,
+    get_clicks_by_day,
+    get_top_links,
+    get_click_count_for_link,
+    get_event_counts_by_day,
+    get_mau
+)
+from app.services.rollup_service import refresh_rollups, get_rollup_watermark
+from app.infrastructure.database.models import Link
+
+def snapshot(db):
+    link_ids = [link_id for (link_id,) in db.query(Link.id).limit(5)]
+    return {
+        "dau": [get_daily_active_users(db, date.today() - timedelta(days=n)) for n in range(5)],
+        "clicks_by_day": [tuple(r) for r in get_clicks_by_day(db)],
+        "top_links": sorted(tuple(r) for r in get_top_links(db, limit=1000)),
+        "link_clicks": [get_click_count_for_link(db, link_id) for link_id in link_ids],
+        "events_by_day": [tuple(r) for r in get_event_counts_by_day(db)],
+    }
+
+def test_rollups_match_raw_tables():
+    with SessionLocal() as db:
+        before = snapshot(db)
+
+        refresh_rollups(db)
+        assert get_rollup_watermark(db) is not None
+        after = snapshot(db)
+
+        # Incremental refresh is idempotent
+        refresh_rollups(db)
+        again = snapshot(db)
+
+    assert before == after == again
+
+def test_approximate_active_users_close_to_exact():
+    with SessionLocal() as db:
+        refresh_rollups(db)
+
+        exact = get_daily_active_users(db, date.today() - timedelta(days=1))
+        approx = get_daily_active_users(db, date.today() - timedelta(days=1), approx=True)
+        assert abs(approx - exact) <= max(0.05 * exact, 2)
+
+        exact_mau = get_mau(db)
+        approx_mau = get_mau(db, approx=True)
+        assert abs(approx_mau - exact_mau) <= max(0.05 * exact_mau, 2)
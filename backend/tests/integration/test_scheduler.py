@@ -0,0 +1,19 @@
+import pytest
+from app.core import scheduler
+from app.core.database import advisory_lock
+
+@pytest.mark.parametrize("job, lock, service", [
+    (scheduler.update_rollups, "refresh_rollups", "refresh_rollups"),
+    (scheduler.manage_partitions, "maintain_partitions", "maintain_partitions"),
+])
+def test_jobs_skip_while_another_worker_holds_the_lock(monkeypatch, job, lock, service):
+    calls = []
+    monkeypatch.setattr(scheduler, service, lambda db: calls.append(db) or {})
+
+    with advisory_lock(lock) as acquired:
+        assert acquired
+        job()
+    assert calls == []
+
+    job()
+    assert len(calls) == 1
@@ -0,0 +1,94 @@
+import json
+import pytest
+import pyarrow as pa
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.services.sql_service import console_lanes
+
+client = TestClient(app)
+
+def run(payload):
+    return client.post("/api/v1/analytics/sql/query", json=payload)
+
+def test_buffered_json_keeps_row_limit():
+    body = run({"query": "SELECT n FROM generate_series(1, 500) AS n"}).json()
+    assert body["columns"] == ["n"]
+    assert len(body["rows"]) == 100
+
+def test_stream_ndjson_with_column_types_and_row_cap():
+    response = run({
+        "query": "SELECT n, n::text AS label, now() AS at FROM generate_series(1, 12000) AS n",
+        "format": "ndjson",
+        "max_rows": 10500
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert json.loads(response.headers["x-columns"]) == [
+        {"name": "n", "type": "integer"},
+        {"name": "label", "type": "text"},
+        {"name": "at", "type": "timestamp with time zone"},
+    ]
+
+    lines = response.text.splitlines()
+    assert len(lines) == 10500
+    assert json.loads(lines[-1])[:2] == [10500, "10500"]
+
+def test_stream_csv():
+    response = run({"query": "SELECT id, email FROM users;", "format": "csv"})
+    lines = response.text.splitlines()
+    assert lines[0] == "id,email"
+    assert len(lines) > 1
+
+def test_stream_arrow_batches():
+    response = run({
+        "query": "SELECT n, n * 0.5 AS half FROM generate_series(1, 12000) AS n",
+        "format": "arrow"
+    })
+    table = pa.ipc.open_stream(response.content).read_all()
+
+    assert table.num_rows == 12000
+    assert table.schema.field("n").type == pa.int32()
+    assert table.schema.field("half").metadata == {b"pg_type": b"numeric"}
+
+def test_stream_rejects_writes_and_reports_sql_errors():
+    assert "error" in run({"query": "DELETE FROM users", "format": "ndjson"}).json()
+    assert "error" in run({"query": "SELECT missing_column FROM users", "format": "csv"}).json()
+
+def test_only_a_single_statement_is_admitted():
+    heavy = "SELECT n FROM generate_series(1, 1000000) AS n ORDER BY md5(n::text)"
+    for fmt in (None, "ndjson"):
+        body = run({"query": f"SELECT 1; {heavy}", "format": fmt}).json()
+        assert body["error"] == "Only a single statement is allowed."
+
+    assert run({"query": "SELECT 1 AS one;", "format": "ndjson"}).status_code == 200
+
+def test_expensive_queries_are_rejected_before_running(monkeypatch):
+    monkeypatch.setattr(settings, "SQL_MAX_PLAN_COST", 1000)
+    body = run({"query": "SELECT n FROM generate_series(1, 1000000) AS n ORDER BY md5(n::text)"}).json()
+
+    assert "exceeds the limit" in body["error"]
+    assert body["estimated_cost"] > 1000
+
+def test_costly_streams_run_in_the_heavy_lane(monkeypatch):
+    monkeypatch.setattr(settings, "SQL_HEAVY_PLAN_COST", 10)
+    response = run({"query": "SELECT n FROM generate_series(1, 5000) AS n ORDER BY n DESC", "format": "ndjson"})
+
+    assert response.headers["x-query-lane"] == "heavy"
+    assert response.text.splitlines()[0] == "[5000]"
+    # The slot is released once the stream has been sent
+    assert console_lanes["heavy"]._active == 0
+
+def test_failing_stream_releases_its_heavy_slot(monkeypatch):
+    monkeypatch.setattr(settings, "SQL_HEAVY_PLAN_COST", 10)
+    monkeypatch.setattr(settings, "SQL_STREAM_BATCH_ROWS", 1000)
+
+    # Division by zero on the 5th fetch, after the response has started
+    with pytest.raises(Exception, match="division by zero"):
+        run({"query": "SELECT 1 / (n - 5000) FROM generate_series(1, 10000) AS n", "format": "ndjson"})
+    assert console_lanes["heavy"]._active == 0
+
+    # The lane (concurrency 1) still admits the next heavy query
+    response = run({"query": "SELECT n FROM generate_series(1, 5000) AS n ORDER BY n DESC", "format": "ndjson"})
+    assert response.headers["x-query-lane"] == "heavy"
+    assert len(response.text.splitlines()) == 5000
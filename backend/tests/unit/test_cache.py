@@ -0,0 +1,48 @@
+from app.core.cache import TTLCache, MISSING
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache("test", max_size=10, ttl=60, clock=clock)
+
+    cache.set("abc", ("id", "https://example.com"))
+    assert cache.get("abc") == ("id", "https://example.com")
+
+    clock.now = 61
+    assert cache.get("abc") is MISSING
+
+def test_negative_entries_use_their_own_ttl():
+    clock = FakeClock()
+    cache = TTLCache("test", max_size=10, ttl=60, negative_ttl=5, clock=clock)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return None
+
+    assert cache.get_or_load("missing", loader) is None
+    assert cache.get_or_load("missing", loader) is None
+    assert len(loads) == 1
+
+    clock.now = 6
+    cache.get_or_load("missing", loader)
+    assert len(loads) == 2
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache("test", max_size=2, ttl=60)
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert len(cache) == 2
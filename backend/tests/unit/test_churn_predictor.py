@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from app.ml_inference.churn_predictor import ChurnPredictor
+
+def make_predictor():
+    X = pd.DataFrame({
+        "total_events": [1, 2, 30, 40, 3, 25],
+        "days_since_last_event": [15, 12, 1, 0, 999, 2],
+        "experiment_exposed": [0, 1, 0, 1, 0, 1],
+    })
+    y = [1, 1, 0, 0, 1, 0]
+
+    predictor = ChurnPredictor(load=False)
+    predictor.swap(LogisticRegression().fit(X, y))
+    return predictor, X
+
+def test_predict_batch_matches_predict():
+    predictor, _ = make_predictor()
+
+    total_events = np.array([0, 5, 12, 50])
+    days_since_last_event = np.array([999, 8, 3, 0])
+
+    batch = predictor.predict_batch(total_events, days_since_last_event)
+    single = [
+        predictor.predict(t, d)
+        for t, d in zip(total_events, days_since_last_event)
+    ]
+
+    assert batch.tolist() == single
+
+def test_predict_batch_without_model():
+    predictor = ChurnPredictor(load=False)
+    assert predictor.predict_batch(np.array([1]), np.array([1])) is None
+
+def test_predict_matches_sklearn():
+    predictor, X = make_predictor()
+    expected = predictor.model.predict_proba(X)[:, 1]
+
+    for row, p in zip(X.itertuples(index=False), expected):
+        assert predictor.predict(*row) == round(float(p), 4)
+
+def test_predict_many_matches_sklearn():
+    predictor, X = make_predictor()
+
+    np.testing.assert_allclose(
+        predictor.predict_many(X.to_numpy()),
+        predictor.model.predict_proba(X)[:, 1],
+        atol=1e-9
+    )
@@ -0,0 +1,88 @@
+import os
+import numpy as np
+import pandas as pd
+from ml.training import churn_training
+from ml.training.churn_training import FEATURE_COLUMNS, LABEL_COLUMN, FeatureSource, train, write_snapshot
+from app.ml_inference.compiled_model import LinearModel, compile_model
+
+def feature_chunks(chunks=4, size=250, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(chunks):
+        days = rng.integers(0, 30, size)
+        yield pd.DataFrame({
+            "total_events": rng.poisson(20, size),
+            "days_since_last_event": days,
+            "experiment_exposed": rng.integers(0, 2, size),
+            "churned": (days > 7).astype(int),
+        })
+
+class ListSource:
+    def __init__(self, chunks):
+        self.passes = 0
+        self._chunks = list(chunks)
+
+    def chunks(self):
+        self.passes += 1
+        yield from self._chunks
+
+def test_train_streams_chunks_and_compiles():
+    source = ListSource(feature_chunks())
+    model, stats = train(source, epochs=3)
+
+    # One pass for the scaler, one per epoch
+    assert source.passes == 4
+    assert stats["rows"] == 1000
+    assert stats["metrics"]["accuracy"] > 0.9
+
+    data = pd.concat(source._chunks)
+    accuracy = (model.predict(data[FEATURE_COLUMNS]) == data[LABEL_COLUMN]).mean()
+    assert accuracy > 0.9
+
+    assert isinstance(compile_model(model), LinearModel)
+
+def test_snapshot_is_reused_on_later_passes(tmp_path, monkeypatch):
+    snapshot = str(tmp_path / "features.parquet")
+    reads = []
+
+    def database_chunks(chunk_size):
+        reads.append(chunk_size)
+        yield from feature_chunks(chunks=2, size=100)
+
+    monkeypatch.setattr(churn_training, "_database_chunks", database_chunks)
+
+    source = FeatureSource(chunk_size=100, snapshot=snapshot)
+    first = pd.concat(source.chunks(), ignore_index=True)
+    second = pd.concat(source.chunks(), ignore_index=True)
+
+    assert reads == [100]
+    pd.testing.assert_frame_equal(first, second, check_dtype=False)
+
+    # A fresh run finds the snapshot and skips the database
+    assert FeatureSource(chunk_size=100, snapshot=snapshot).use_snapshot
+
+def test_interrupted_snapshot_is_discarded(tmp_path):
+    snapshot = str(tmp_path / "features.parquet")
+    chunks = write_snapshot(feature_chunks(), snapshot)
+    next(chunks)
+    chunks.close()
+
+    assert not (tmp_path / "features.parquet").exists()
+
+def test_database_is_read_once_without_a_snapshot(monkeypatch):
+    reads = []
+
+    def database_chunks(chunk_size):
+        reads.append(chunk_size)
+        yield from feature_chunks(chunks=2, size=100)
+
+    monkeypatch.setattr(churn_training, "_database_chunks", database_chunks)
+
+    with FeatureSource(chunk_size=100) as source:
+        _, stats = train(source, epochs=3)
+        spill = source.snapshot
+        assert os.path.exists(spill)
+
+    # Scaler pass plus three epochs, one database read; the spill is removed
+    assert reads == [100]
+    assert stats["rows"] == 200
+    assert not os.path.exists(spill)
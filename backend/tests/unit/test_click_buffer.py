@@ -0,0 +1,64 @@
+import threading
+import time
+from app.services.click_service import ClickBuffer
+
+def test_writes_through_when_not_started():
+    batches = []
+    buffer = ClickBuffer(writer=batches.append, max_batch=10)
+
+    buffer.add("link", "127.0.0.1", "pytest")
+
+    assert len(batches) == 1
+    assert batches[0][0]["link_id"] == "link"
+    assert batches[0][0]["timestamp"] is not None
+
+def test_flushes_in_batches_and_drains_on_stop():
+    batches = []
+    buffer = ClickBuffer(writer=batches.append, max_batch=3, flush_interval=60)
+    buffer.start()
+
+    for _ in range(7):
+        buffer.add("link", "127.0.0.1", "pytest")
+
+    # Size-triggered flush
+    deadline = time.time() + 5
+    while sum(len(b) for b in batches) < 6 and time.time() < deadline:
+        time.sleep(0.01)
+
+    buffer.stop()
+
+    # The timer can flush a partial batch at any point: check totals and caps
+    assert sum(len(b) for b in batches) == 7
+    assert all(0 < len(b) <= 3 for b in batches)
+
+def test_failed_flush_is_requeued():
+    calls = []
+
+    def failing_writer(rows):
+        calls.append(len(rows))
+        raise RuntimeError("database unavailable")
+
+    buffer = ClickBuffer(writer=failing_writer, max_batch=10, max_queue=2)
+    buffer.add("link", None, None)
+    buffer.add("link", None, None)
+    buffer.add("link", None, None)
+
+    assert len(buffer._queue) == 2
+
+def test_full_buffer_drops_instead_of_writing_inline():
+    writer_threads = []
+    buffer = ClickBuffer(
+        writer=lambda rows: writer_threads.append(threading.current_thread()),
+        max_batch=100,
+        flush_interval=60,
+        max_queue=2
+    )
+    buffer.start()
+
+    assert buffer.add("link", None, None)
+    assert buffer.add("link", None, None)
+    assert not buffer.add("link", None, None)
+
+    # Nothing was written on the caller's thread
+    assert threading.current_thread() not in writer_threads
+    buffer.stop()
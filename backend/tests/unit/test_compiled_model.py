@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from app.ml_inference.compiled_model import LinearModel, SklearnModel, compile_model
+
+def training_data(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        "total_events": rng.poisson(20, n),
+        "days_since_last_event": rng.integers(0, 30, n),
+        "experiment_exposed": rng.integers(0, 2, n),
+    })
+    y = (X["days_since_last_event"] + rng.normal(0, 3, n) > 7).astype(int)
+    return X, y
+
+@pytest.mark.parametrize("model", [
+    LogisticRegression(),
+    make_pipeline(StandardScaler(), LogisticRegression()),
+    SGDClassifier(loss="log_loss", random_state=0),
+    make_pipeline(StandardScaler(), SGDClassifier(loss="log_loss", random_state=0)),
+])
+def test_linear_models_compile_and_match_sklearn(model):
+    X, y = training_data()
+    model.fit(X, y)
+
+    compiled = compile_model(model)
+    assert isinstance(compiled, LinearModel)
+
+    expected = model.predict_proba(X)[:, 1]
+    np.testing.assert_allclose(compiled.predict_many(X.to_numpy()), expected, atol=1e-9)
+    for row, p in zip(X.to_numpy()[:20], expected[:20]):
+        assert compiled.predict_one(row) == pytest.approx(p, abs=1e-9)
+
+def test_predict_many_writes_into_out():
+    X, y = training_data()
+    compiled = compile_model(LogisticRegression().fit(X, y))
+    matrix = X.to_numpy(dtype=np.float64)
+
+    out = np.empty(len(matrix))
+    assert compiled.predict_many(matrix, out=out) is out
+
+def test_extreme_inputs_stay_finite():
+    X, y = training_data()
+    compiled = compile_model(LogisticRegression().fit(X, y))
+
+    probabilities = compiled.predict_many(np.array([[0, 1e6, 0], [1e6, -1e6, 1]]))
+    assert np.all(np.isfinite(probabilities))
+    assert compiled.predict_one([0, 1e6, 0]) == pytest.approx(probabilities[0])
+
+def test_non_linear_models_fall_back_to_sklearn():
+    X, y = training_data()
+    model = RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y)
+
+    compiled = compile_model(model)
+    assert isinstance(compiled, SklearnModel)
+    np.testing.assert_allclose(compiled.predict_many(X.to_numpy()), model.predict_proba(X)[:, 1])
+
+def test_hinge_loss_is_not_treated_as_logistic():
+    X, y = training_data()
+    model = SGDClassifier(loss="modified_huber", random_state=0).fit(X, y)
+    assert isinstance(compile_model(model), SklearnModel)
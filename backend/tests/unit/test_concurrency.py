@@ -0,0 +1,32 @@
+import threading
+import pytest
+from app.core.concurrency import AdmissionRejected, ConcurrencyLimiter
+
+def test_slots_bound_concurrency_and_time_out():
+    limiter = ConcurrencyLimiter("test_timeout", max_concurrent=1, max_queue=5, queue_timeout=0.05)
+
+    limiter.acquire()
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.acquire()
+    assert rejected.value.reason == "queue_timeout"
+
+    limiter.release()
+    with limiter.slot():
+        pass
+
+def test_full_queue_rejects_immediately():
+    limiter = ConcurrencyLimiter("test_queue", max_concurrent=1, max_queue=1, queue_timeout=5)
+    limiter.acquire()
+
+    waiter = threading.Thread(target=limiter.acquire)
+    waiter.start()
+    while limiter._queued == 0:
+        pass
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        limiter.acquire()
+    assert rejected.value.reason == "queue_full"
+
+    limiter.release()
+    waiter.join()
+    assert limiter._active == 1
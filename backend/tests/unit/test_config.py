@@ -0,0 +1,27 @@
+import pytest
+from app.core.config import _env_choice, _env_int_range
+from app.core.hll import MAX_PRECISION, MIN_PRECISION
+
+def test_env_choice_accepts_known_values(monkeypatch):
+    monkeypatch.setenv("PARTITION_RETENTION_ACTION", "drop")
+    assert _env_choice("PARTITION_RETENTION_ACTION", "detach", {"detach", "drop"}) == "drop"
+
+    monkeypatch.delenv("PARTITION_RETENTION_ACTION")
+    assert _env_choice("PARTITION_RETENTION_ACTION", "detach", {"detach", "drop"}) == "detach"
+
+@pytest.mark.parametrize("value", ["Drop", "delete", ""])
+def test_env_choice_rejects_anything_else(monkeypatch, value):
+    monkeypatch.setenv("PARTITION_RETENTION_ACTION", value)
+    with pytest.raises(ValueError, match="PARTITION_RETENTION_ACTION"):
+        _env_choice("PARTITION_RETENTION_ACTION", "detach", {"detach", "drop"})
+
+@pytest.mark.parametrize("value", ["3", "19", "0"])
+def test_hll_precision_out_of_range_fails_at_load(monkeypatch, value):
+    monkeypatch.setenv("HLL_PRECISION", value)
+    with pytest.raises(ValueError, match="HLL_PRECISION must be between 4 and 18"):
+        _env_int_range("HLL_PRECISION", 14, MIN_PRECISION, MAX_PRECISION)
+
+def test_hll_precision_bounds_are_accepted(monkeypatch):
+    for value in (MIN_PRECISION, MAX_PRECISION):
+        monkeypatch.setenv("HLL_PRECISION", str(value))
+        assert _env_int_range("HLL_PRECISION", 14, MIN_PRECISION, MAX_PRECISION) == value
@@ -0,0 +1,37 @@
+import uuid
+from app.services.experiment_service import (
+    ASSIGNMENT_BUCKETS,
+    ExperimentConfig,
+    assignment_bucket,
+    choose_variant
+)
+
+def make_config(*traffic):
+    variants, cumulative = [], 0
+    for percentage in traffic:
+        cumulative += percentage * ASSIGNMENT_BUCKETS // 100
+        variants.append((uuid.uuid4(), cumulative))
+    return ExperimentConfig(uuid.uuid4(), tuple(variants))
+
+def test_bucket_is_stable_and_in_range():
+    user_id = uuid.uuid4()
+    bucket = assignment_bucket("button_test", user_id)
+
+    assert 0 <= bucket < ASSIGNMENT_BUCKETS
+    assert assignment_bucket("button_test", user_id) == bucket
+    assert assignment_bucket("button_test", str(user_id)) == bucket
+
+def test_buckets_follow_traffic_split():
+    config = make_config(20, 30, 50)
+    counts = dict.fromkeys((variant_id for variant_id, _ in config.variants), 0)
+
+    for _ in range(20000):
+        counts[choose_variant(config, assignment_bucket("split", uuid.uuid4()))] += 1
+
+    shares = [counts[variant_id] / 20000 for variant_id, _ in config.variants]
+    for share, expected in zip(shares, [0.2, 0.3, 0.5]):
+        assert abs(share - expected) < 0.02
+
+def test_unallocated_buckets_fall_back_to_last_variant():
+    config = make_config(10, 10)
+    assert choose_variant(config, ASSIGNMENT_BUCKETS - 1) == config.variants[-1][0]
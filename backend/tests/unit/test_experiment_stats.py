@@ -0,0 +1,44 @@
+import pytest
+from statsmodels.stats.proportion import proportions_ztest
+from app.services.experiment_service import multi_variant_test
+
+def test_two_arms_match_proportions_ztest():
+    conversions, nobs = [26, 42], [242, 258]
+    z_stat, p_value = proportions_ztest(conversions[::-1], nobs[::-1])
+
+    comparison = multi_variant_test(conversions, nobs)["comparisons"][0]
+
+    assert comparison["z_stat"] == pytest.approx(z_stat, abs=1e-4)
+    assert comparison["p_value"] == pytest.approx(p_value, abs=1e-4)
+    # With a single comparison there is nothing to correct for
+    assert comparison["adjusted_p_value"] == comparison["p_value"]
+
+def test_every_arm_is_compared_to_control_with_holm_correction():
+    conversions, nobs = [50, 80, 52, 120], [1000, 1000, 1000, 1000]
+
+    result = multi_variant_test(conversions, nobs, control=0)
+    comparisons = result["comparisons"]
+
+    assert [c["index"] for c in comparisons] == [1, 2, 3]
+    for comparison, arm in zip(comparisons, [1, 2, 3]):
+        _, p_value = proportions_ztest([conversions[arm], conversions[0]], [nobs[arm], nobs[0]])
+        assert comparison["p_value"] == pytest.approx(p_value, abs=1e-4)
+        assert comparison["adjusted_p_value"] >= comparison["p_value"]
+
+    assert result["omnibus"]["dof"] == 3
+    assert result["omnibus"]["p_value"] < 0.05
+    assert [c["significant"] for c in comparisons] == [True, False, True]
+
+def test_rate_intervals_contain_observed_rates():
+    conversions, nobs = [5, 0, 30], [40, 40, 40]
+    result = multi_variant_test(conversions, nobs, control=2)
+
+    for (low, high), x, n in zip(result["rate_ci"], conversions, nobs):
+        assert low <= x / n <= high
+
+def test_no_variance_is_reported_as_missing():
+    result = multi_variant_test([0, 0], [100, 100])
+
+    assert result["omnibus"]["p_value"] is None
+    assert result["comparisons"][0]["p_value"] is None
+    assert result["comparisons"][0]["significant"] is False
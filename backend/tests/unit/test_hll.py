@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from app.core.hll import HyperLogLog, standard_error
+
+def random_hashes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    info = np.iinfo(np.int64)
+    return rng.integers(info.min, info.max, n, dtype=np.int64)
+
+@pytest.mark.parametrize("n", [0, 50, 5000, 200000])
+def test_estimate_within_error_bound(n):
+    sketch = HyperLogLog(12).add_hashes(random_hashes(n))
+    tolerance = max(4 * standard_error(12) * n, 2)
+    assert abs(sketch.count() - n) <= tolerance
+
+def test_duplicates_do_not_change_estimate():
+    hashes = random_hashes(1000)
+    once = HyperLogLog(10).add_hashes(hashes).count()
+    twice = HyperLogLog(10).add_hashes(np.concatenate([hashes, hashes])).count()
+    assert once == twice
+
+def test_merge_equals_sketch_of_union():
+    hashes = random_hashes(30000)
+    left = HyperLogLog(11).add_hashes(hashes[:20000])
+    right = HyperLogLog(11).add_hashes(hashes[10000:])
+    union = HyperLogLog(11).add_hashes(hashes)
+
+    assert left.merge(right).count() == union.count()
+
+def test_bytes_round_trip():
+    sketch = HyperLogLog(8).add_hashes(random_hashes(500))
+    restored = HyperLogLog.from_bytes(sketch.to_bytes())
+
+    assert restored.precision == 8
+    assert restored.count() == sketch.count()
+
+def test_merge_rejects_mismatched_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(10).merge(HyperLogLog(11))
@@ -0,0 +1,88 @@
+import threading
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from app.ml_inference.churn_predictor import ChurnPredictor
+from app.ml_inference.model_registry import ModelRegistry
+
+def fit_model(flip=False):
+    X = pd.DataFrame({
+        "total_events": [1, 2, 30, 40, 3, 25],
+        "days_since_last_event": [15, 12, 1, 0, 999, 2],
+        "experiment_exposed": [0, 1, 0, 1, 0, 1],
+    })
+    y = [1, 1, 0, 0, 1, 0]
+    if flip:
+        y = [1 - label for label in y]
+    return LogisticRegression().fit(X, y)
+
+def test_publish_activates_new_version(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    assert registry.current_version() is None
+
+    first = registry.publish(fit_model(), {"rows": 6})
+    second = registry.publish(fit_model(flip=True), {"rows": 6})
+
+    assert registry.versions() == [first, second]
+    assert registry.current_version() == second
+
+    model, metadata = registry.load(first)
+    assert metadata["version"] == first
+    assert metadata["rows"] == 6
+    assert model.predict_proba(pd.DataFrame([[1, 15, 0]], columns=model.feature_names_in_))[0, 1] > 0.5
+
+def test_activate_rejects_unknown_version(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    with pytest.raises(ValueError):
+        registry.activate("missing")
+
+def test_prune_keeps_current_version(tmp_path):
+    registry = ModelRegistry(str(tmp_path), keep=2)
+    first = registry.publish(fit_model(), {})
+    versions = [registry.publish(fit_model(), {}, activate=False) for _ in range(3)]
+
+    assert registry.current_version() == first
+    assert registry.versions() == [first, versions[-1]]
+
+def test_predictor_refresh_swaps_to_current_version(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    predictor = ChurnPredictor(registry, load=False)
+    assert predictor.refresh() is False
+
+    first = registry.publish(fit_model(), {})
+    assert predictor.refresh() is True
+    assert predictor.version == first
+    assert predictor.predict(1, 15) > 0.5
+
+    # Nothing new published: no reload
+    assert predictor.refresh() is False
+
+    registry.publish(fit_model(flip=True), {})
+    assert predictor.refresh() is True
+    assert predictor.predict(1, 15) < 0.5
+
+def test_predictions_never_fail_during_swaps(tmp_path):
+    predictor = ChurnPredictor(ModelRegistry(str(tmp_path)), load=False)
+    models = [fit_model(), fit_model(flip=True)]
+    predictor.swap(models[0])
+
+    errors = []
+    done = threading.Event()
+
+    def serve():
+        while not done.is_set():
+            try:
+                assert predictor.predict(1, 15) is not None
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=serve) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for i in range(200):
+        predictor.swap(models[i % 2])
+    done.set()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
@@ -0,0 +1,68 @@
+import sys
+import threading
+import time
+from app.core.profiling import RequestProfile, StackSampler, statement_shape
+
+def test_statement_shape_folds_parameters_and_literals():
+    first = statement_shape("SELECT * FROM users\n WHERE id = %(id_1)s AND score > 5 AND name = 'a'")
+    second = statement_shape("SELECT * FROM users WHERE id = %(id_1)s AND score > 17 AND name = 'it''s'")
+    assert first == second == "SELECT * FROM users WHERE id = ? AND score > ? AND name = ?"
+
+def test_statement_shape_folds_in_lists_and_positional_parameters():
+    assert statement_shape("SELECT 1 FROM t WHERE id IN ($1, $2, $3)") == statement_shape("SELECT 1 FROM t WHERE id IN ($1)")
+    # Identifiers with digits are left alone
+    assert statement_shape("SELECT * FROM events_p2026_10") == "SELECT * FROM events_p2026_10"
+
+def test_repeated_shapes_above_threshold_are_flagged():
+    profile = RequestProfile("id", repeated_threshold=3)
+    for user_id in range(5):
+        profile.record(f"SELECT count(*) FROM events WHERE user_id = {user_id}", 0.001)
+    profile.record("SELECT count(*) FROM users", 0.002)
+
+    summary = profile.summary()
+    assert summary["db"]["statements"] == 6
+    assert summary["db"]["distinct_statements"] == 2
+    assert [item["count"] for item in summary["repeated_statements"]] == [5]
+    assert len(summary["warnings"]) == 1
+
+def spin(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+def served(stop):
+    spin(stop)
+
+def concurrent(stop):
+    spin(stop)
+
+def test_sampler_follows_only_the_serving_thread():
+    stop = threading.Event()
+    threads = [threading.Thread(target=target, args=(stop,)) for target in (served, concurrent)]
+    for thread in threads:
+        thread.start()
+
+    sampler = StackSampler(0.001, lambda: (threads[0].ident, None))
+    sampler.start()
+    time.sleep(0.1)
+    sampler.stop()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert sampler.samples > 0
+    assert all(".served;" in stack for stack in sampler.stacks)
+
+def test_sampler_skips_the_thread_while_another_frame_runs():
+    # Event loop case: the thread is shared, only this request's coroutine counts
+    stop = threading.Event()
+    thread = threading.Thread(target=served, args=(stop,))
+    thread.start()
+
+    sampler = StackSampler(0.001, lambda: (thread.ident, sys._getframe()))
+    sampler.start()
+    time.sleep(0.05)
+    sampler.stop()
+    stop.set()
+    thread.join()
+
+    assert sampler.samples == 0
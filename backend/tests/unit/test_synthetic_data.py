@@ -0,0 +1,53 @@
+import time
+import uuid
+import numpy as np
+from app.scripts.seed_data import DAY_US, EXPERIMENT, GeneratorConfig, experiment_config, row_ids, user_chunk, link_chunk
+from app.services.experiment_service import assignment_bucket, choose_variant
+
+CONFIG = GeneratorConfig(users=2500, events_per_user=10, links_per_user=0.1, chunk_size=1000,
+                         now_us=int(time.time()) * 1_000_000)
+
+def fields(lines, column):
+    return [line.rstrip("\n").split("\t")[column] for line in lines]
+
+def test_row_ids_are_unique_v4_uuids():
+    ids = row_ids(7, "events", np.arange(100000))
+
+    assert len(set(ids)) == len(ids)
+    assert all(uuid.UUID(hex=i).version == 4 for i in ids[:1000])
+    assert set(ids).isdisjoint(row_ids(7, "users", np.arange(100000)))
+    assert set(ids).isdisjoint(row_ids(8, "events", np.arange(100000)))
+
+def test_chunks_are_deterministic():
+    assert user_chunk(CONFIG, 2) == user_chunk(CONFIG, 2)
+    assert link_chunk(CONFIG, 0) == link_chunk(CONFIG, 0)
+
+    # The last chunk is partial; chunks never overlap
+    first, last = user_chunk(CONFIG, 0), user_chunk(CONFIG, 2)
+    assert len(last["users"][1]) == 500
+    assert set(fields(first["users"][1], 0)).isdisjoint(fields(last["users"][1], 0))
+
+def test_events_fall_between_signup_and_now_with_heavy_tail():
+    chunk = user_chunk(CONFIG, 0)
+    signups = dict(zip(fields(chunk["users"][1], 0), fields(chunk["users"][1], 3)))
+
+    users, timestamps = fields(chunk["events"][1], 1), fields(chunk["events"][1], 4)
+    now = np.datetime64(CONFIG.now_us, "us")
+    assert all(signups[user] <= ts <= f"{now}+00" for user, ts in zip(users, timestamps))
+
+    counts = np.bincount(np.unique(users, return_inverse=True)[1])
+    assert counts.max() > 10 * np.median(counts)
+    # Some users churned: no events in the last week
+    last_event = {}
+    for user, ts in zip(users, timestamps):
+        last_event[user] = max(last_event.get(user, ts), ts)
+    week_ago = f"{now - np.timedelta64(7 * DAY_US, 'us')}+00"
+    assert any(ts < week_ago for ts in last_event.values())
+
+def test_assignments_match_api_buckets():
+    experiment = experiment_config(CONFIG.seed)
+    assignments = user_chunk(CONFIG, 1)["assignments"][1]
+
+    for user_id, variant_id in zip(fields(assignments, 1)[:200], fields(assignments, 3)[:200]):
+        expected = choose_variant(experiment, assignment_bucket(EXPERIMENT, uuid.UUID(hex=user_id)))
+        assert uuid.UUID(variant_id) == expected